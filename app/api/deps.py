@@ -1,6 +1,12 @@
-from app.core.db import get_vectorstore
-from app.core.llm import get_llm
+from functools import partial
+from typing import Callable
+from fastapi import Depends, Request
+from langchain_core.vectorstores import VectorStore
+import redis.asyncio as aioredis
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from app.core.prompt_manager import prompt_manager
+from app.core.registry import ClientRegistry
+from app.service.ingestion_jobs import IngestionJobManager
 from app.core.config import settings
 
 
@@ -8,16 +14,72 @@ def get_prompt_manager_deps():
     return prompt_manager
 
 
-def get_vectorstore_deps(collection_name: str):
-    return get_vectorstore(
+def get_client_registry_deps(request: Request) -> ClientRegistry:
+    return request.app.state.client_registry
+
+
+def get_job_manager_deps(request: Request) -> IngestionJobManager:
+    return request.app.state.job_manager
+
+
+def get_qdrant_client_deps(
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+) -> QdrantClient:
+    return registry.get_qdrant_client(settings.VECTORDB_PERSIST_URL)
+
+
+def get_async_qdrant_client_deps(
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+) -> AsyncQdrantClient:
+    return registry.get_async_qdrant_client(settings.VECTORDB_PERSIST_URL)
+
+
+def get_async_redis_deps(
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+) -> aioredis.Redis:
+    return registry.get_async_redis(settings.REDIS_URL)
+
+
+def get_vectorstore_deps(
+    collection_name: str,
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+):
+    return registry.get_vectorstore(
         vector_db=settings.VECTOR_DB,
         embedding_provider=settings.EMBEDDING_PROVIDER,
         collection_name=collection_name,
         model_name=settings.EMBEDDING_MODEL_NAME,
-        persist_directory=settings.VECTORDB_PERSIST_DIRECTORY,
         persist_url=settings.VECTORDB_PERSIST_URL,
     )
 
 
-def get_llm_deps():
-    return get_llm(settings.LLM_PROVIDER, model_name=settings.LLM_MODEL_NAME)
+def get_vectorstore_factory_deps(
+    collection_name: str,
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+    # Built now as well, so an unknown collection fails the request
+    vectorstore: VectorStore = Depends(get_vectorstore_deps),
+) -> Callable[[], VectorStore]:
+    """
+    Builds the collection's vector store for work that starts later, once it
+    holds the collection, as a reindex may change its embedding model meanwhile.
+    """
+    return partial(
+        registry.get_vectorstore,
+        vector_db=settings.VECTOR_DB,
+        embedding_provider=settings.EMBEDDING_PROVIDER,
+        collection_name=collection_name,
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        persist_url=settings.VECTORDB_PERSIST_URL,
+        refresh_alias=True,
+    )
+
+
+def get_collection_version_deps(
+    collection_name: str,
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+) -> str:
+    return registry.resolve_collection(collection_name, settings.VECTORDB_PERSIST_URL)
+
+
+def get_llm_deps(registry: ClientRegistry = Depends(get_client_registry_deps)):
+    return registry.get_llm(settings.LLM_PROVIDER, model_name=settings.LLM_MODEL_NAME)
@@ -1,12 +1,33 @@
-from fastapi import APIRouter
-from app.schema.collection import ListCollectionResponse
+import asyncio
+from functools import partial
+from fastapi import APIRouter, Depends, status
+from qdrant_client import QdrantClient
+import redis.asyncio as aioredis
+from app.schema.collection import (
+    CollectionCreateRequest,
+    ListCollectionResponse,
+    ReindexRequest,
+)
 from app.schema.api import ApiResponse
+from app.schema.ingest import IngestJobApiResponse
+from app.api.deps import (
+    get_async_redis_deps,
+    get_client_registry_deps,
+    get_job_manager_deps,
+    get_qdrant_client_deps,
+)
+from app.core.registry import ClientRegistry
+from app.core.collection_lock import areindex_running, collection_reindex
+from app.exception import CollectionBusyError
+from app.service.ingestion_jobs import IngestionJob, IngestionJobManager
+from app.service.reindex_service import ReindexService
 from app.core.logging_config import get_logger
 from app.core.db import (
     create_collection_qdrant,
     delete_collection_qdrant,
     list_collection_qdrant,
 )
+from app.core.config import settings
 
 logger = get_logger(__name__)
 
@@ -14,17 +35,30 @@ router = APIRouter()
 
 
 @router.post("/{collection_name}", response_model=ApiResponse)
-def create_collection_(collection_name: str):
-    success = create_collection_qdrant(collection_name=collection_name)
+def create_collection_(
+    collection_name: str,
+    request: CollectionCreateRequest | None = None,
+    client: QdrantClient = Depends(get_qdrant_client_deps),
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+):
+    success = create_collection_qdrant(
+        collection_name=collection_name,
+        client=client,
+        embedding_function=registry.get_embedding_function(
+            settings.EMBEDDING_PROVIDER, settings.EMBEDDING_MODEL_NAME
+        ),
+        # Options left out of the request fall back to the COLLECTION_* settings
+        **(request.model_dump(exclude_none=True) if request is not None else {}),
+    )
 
     if success:
         return {"message": "Successfully created collection"}
 
 
 @router.get("", response_model=ListCollectionResponse)
-def list_collections():
+def list_collections(client: QdrantClient = Depends(get_qdrant_client_deps)):
     try:
-        return {"data": {"collections": list_collection_qdrant()}}
+        return {"data": {"collections": list_collection_qdrant(client)}}
     except Exception as e:
         logger.error(
             f"List collection is not supported by the current vectorstore: {e}"
@@ -33,9 +67,14 @@ def list_collections():
 
 
 @router.delete("/{collection_name}", response_model=ApiResponse)
-def delete_collection(collection_name: str):
+def delete_collection(
+    collection_name: str,
+    client: QdrantClient = Depends(get_qdrant_client_deps),
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+):
     try:
-        deleted: bool = delete_collection_qdrant(collection_name)
+        deleted: bool = delete_collection_qdrant(collection_name, client)
+        registry.evict_collection(collection_name)
         if deleted:
             return {"messages": "Successfully Deleted Collection"}
         else:
@@ -45,3 +84,42 @@ def delete_collection(collection_name: str):
             f"Delete collection is not supported by the current vectorstore: {e}"
         )
     return {"success": False, "message": "Failed to Delete Collection"}
+
+
+@router.post(
+    "/{collection_name}/reindex",
+    response_model=IngestJobApiResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def reindex_collection(
+    collection_name: str,
+    request: ReindexRequest | None = None,
+    client: QdrantClient = Depends(get_qdrant_client_deps),
+    registry: ClientRegistry = Depends(get_client_registry_deps),
+    job_manager: IngestionJobManager = Depends(get_job_manager_deps),
+    redis_client: aioredis.Redis = Depends(get_async_redis_deps),
+):
+    """Rebuild the collection in the background, see `ReindexService`."""
+    if collection_name not in await asyncio.to_thread(list_collection_qdrant, client):
+        raise ValueError(f"Collection {collection_name} does not exist.")
+    if await areindex_running(redis_client, collection_name):
+        raise CollectionBusyError(f"Collection {collection_name} is already being reindexed.")
+
+    reindex_service = ReindexService()
+    options = request.model_dump(exclude_none=True) if request is not None else {}
+
+    async def run(job: IngestionJob):
+        await reindex_service.reindex(
+            collection_name,
+            client,
+            registry,
+            stats=job.stats,
+            **options,
+        )
+
+    # Ingestions into the collection wait meanwhile, and the reindex waits for
+    # running ones before taking a job slot
+    job = job_manager.submit(
+        collection_name, run, lock=partial(collection_reindex, redis_client, collection_name)
+    )
+    return {"message": "Reindex job submitted", "data": job.to_dict()}
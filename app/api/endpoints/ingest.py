@@ -1,12 +1,24 @@
+import asyncio
 import shutil
-from fastapi import APIRouter, UploadFile, File, Depends
+from dataclasses import asdict
+from functools import partial
+from typing import Callable
+from fastapi import APIRouter, Depends, Request, status
 from langchain_core.vectorstores import VectorStore
+import redis.asyncio as aioredis
 import tempfile
-import os
-from app.schema.ingest import UrlRequest
-from app.api.deps import get_vectorstore_deps
+from app.schema.ingest import UrlRequest, IngestJobApiResponse, IngestStatsApiResponse
+from app.api.deps import (
+    get_async_redis_deps,
+    get_job_manager_deps,
+    get_vectorstore_factory_deps,
+)
+from app.api.uploads import UploadReceiver
+from app.core.collection_lock import collection_writer
 from app.service.ingestion_service import IngestionService
-from app.schema.api import ApiResponse
+from app.service.ingestion_jobs import IngestionJob, IngestionJobManager
+from app.exception import UploadTooLargeError
+from app.core.config import settings
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -14,36 +26,116 @@ logger = get_logger(__name__)
 router = APIRouter()
 
 
-@router.post("/{collection_name}/ingest-documents", response_model=ApiResponse)
+@router.post(
+    "/{collection_name}/ingest-documents",
+    response_model=IngestJobApiResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    # The body is parsed from the stream below, so it is declared here for the docs
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["files"],
+                        "properties": {
+                            "files": {
+                                "type": "array",
+                                "items": {"type": "string", "format": "binary"},
+                            }
+                        },
+                    }
+                }
+            },
+        }
+    },
+)
 async def ingest_documents(
-    files: list[UploadFile] = File(...),
-    vectorstore: VectorStore = Depends(get_vectorstore_deps),
+    request: Request,
+    collection_name: str,
+    get_vectorstore: Callable[[], VectorStore] = Depends(get_vectorstore_factory_deps),
+    job_manager: IngestionJobManager = Depends(get_job_manager_deps),
+    redis_client: aioredis.Redis = Depends(get_async_redis_deps),
 ):
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > settings.UPLOAD_MAX_REQUEST_BYTES:
+        raise UploadTooLargeError("Request exceeds the upload size limit.")
+
+    ingestion_service = IngestionService(redis_client=redis_client)
     tmpdir = tempfile.mkdtemp()
-    paths = []
     try:
-        for file in files:
-            filename = file.filename
-            dest = os.path.join(tmpdir, filename)
+        # Small files in buffer-parseable formats skip the temp file
+        receiver = UploadReceiver(tmpdir, keep_in_memory=ingestion_service.supports_buffer)
+        files = await receiver.receive(request)
+    except BaseException:
+        shutil.rmtree(tmpdir)
+        raise
 
-            with open(dest, "wb") as out_file:
-                out_file.write(await file.read())
+    sources = [
+        ingestion_service.buffer_source(file.filename, file.data)
+        if file.data is not None
+        else ingestion_service.file_source(file.path)
+        for file in files
+    ]
 
-            paths.append(dest)
+    async def run(job: IngestionJob):
+        # Built once the job holds the collection, a reindex it waited for may
+        # have changed the embedding model
+        vectorstore = await asyncio.to_thread(get_vectorstore)
+        await ingestion_service.ingest_sources(
+            sources,
+            vectorstore,
+            parse_executor=job_manager.parse_executor,
+            stats=job.stats,
+            skip_failed_sources=True,
+        )
+
+    # The uploaded files are removed once the job finishes
+    job = job_manager.submit(
+        collection_name,
+        run,
+        cleanup=partial(shutil.rmtree, tmpdir, ignore_errors=True),
+        lock=partial(collection_writer, redis_client, collection_name),
+    )
+
+    return {"message": "Ingestion job submitted", "data": job.to_dict()}
 
-        ingestion_service = IngestionService()
-        ingestion_service.ingest_documents(paths, vectorstore)
-    finally:
-        shutil.rmtree(tmpdir)
 
-    return {"success": True, "message": "Successfully Ingested Documents"}
+@router.get(
+    "/{collection_name}/ingest-jobs/{job_id}", response_model=IngestJobApiResponse
+)
+async def get_ingest_job(
+    collection_name: str,
+    job_id: str,
+    job_manager: IngestionJobManager = Depends(get_job_manager_deps),
+):
+    job = job_manager.get(job_id, collection_name)
+    return {"data": job.to_dict()}
+
+
+@router.delete(
+    "/{collection_name}/ingest-jobs/{job_id}", response_model=IngestJobApiResponse
+)
+async def cancel_ingest_job(
+    collection_name: str,
+    job_id: str,
+    job_manager: IngestionJobManager = Depends(get_job_manager_deps),
+):
+    job = job_manager.cancel(job_id, collection_name)
+    return {"message": "Cancellation requested", "data": job.to_dict()}
 
 
-@router.post("/{collection_name}/ingest-urls", response_model=ApiResponse)
+@router.post("/{collection_name}/ingest-urls", response_model=IngestStatsApiResponse)
 async def ingest_urls(
-    request: UrlRequest, vectorstore: VectorStore = Depends(get_vectorstore_deps)
+    request: UrlRequest,
+    collection_name: str,
+    get_vectorstore: Callable[[], VectorStore] = Depends(get_vectorstore_factory_deps),
+    redis_client: aioredis.Redis = Depends(get_async_redis_deps),
 ):
-    ingestion_service = IngestionService()
+    ingestion_service = IngestionService(redis_client=redis_client)
 
-    ingestion_service.ingest_urls(urls=request.urls, vectorstore=vectorstore)
-    return {"message": "Successfully Ingested Urls"}
+    stats = await ingestion_service.ingest_urls(
+        urls=request.urls, collection_name=collection_name, get_vectorstore=get_vectorstore
+    )
+    return {"message": "Successfully Ingested Urls", "data": asdict(stats)}
@@ -1,29 +1,96 @@
+import json
+from typing import AsyncIterator
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from langchain_core.vectorstores import VectorStore
 from langchain_core.language_models import BaseChatModel
-from app.api.deps import get_llm_deps, get_prompt_manager_deps, get_vectorstore_deps
+from qdrant_client import AsyncQdrantClient
+import redis.asyncio as aioredis
+from app.api.deps import (
+    get_async_qdrant_client_deps,
+    get_async_redis_deps,
+    get_collection_version_deps,
+    get_llm_deps,
+    get_prompt_manager_deps,
+    get_vectorstore_deps,
+)
+from app.core.config import settings
 from app.core.prompt_manager import PromptManager
 from app.service.query_service import QueryService
-from app.schema.query import ChatRequest, QueryApiResponse
+from app.schema.query import ChatRequest, QueryApiResponse, QueryPipeline
 
 router = APIRouter()
 
 
 @router.post("/{collection_name}/chat", response_model=QueryApiResponse)
-def chat(
+async def chat(
     request: ChatRequest,
     llm: BaseChatModel = Depends(get_llm_deps),
     vectorstore: VectorStore = Depends(get_vectorstore_deps),
     prompt_manager: PromptManager = Depends(get_prompt_manager_deps),
+    async_client: AsyncQdrantClient = Depends(get_async_qdrant_client_deps),
+    redis_client: aioredis.Redis = Depends(get_async_redis_deps),
+    collection_version: str = Depends(get_collection_version_deps),
 ):
     query_service = QueryService()
 
-    query_response = query_service.query_agentic(
+    if settings.QUERY_PIPELINE == QueryPipeline.RAG:
+        answer = query_service.aquery
+    else:
+        answer = query_service.aquery_agentic
+
+    query_response = await query_service.acached_query(
+        answer,
         query=request.query,
         session_id=request.session_id,
         llm=llm,
         vectorstore=vectorstore,
         prompt_manager=prompt_manager,
+        async_client=async_client,
+        redis_client=redis_client,
+        collection_version=collection_version,
+        filters=request.filters,
+        bypass_cache=request.bypass_cache,
     )
 
     return {"data": query_response}
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[tuple[str, dict]]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield _sse_event(event, data)
+
+
+@router.post("/{collection_name}/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    llm: BaseChatModel = Depends(get_llm_deps),
+    vectorstore: VectorStore = Depends(get_vectorstore_deps),
+    prompt_manager: PromptManager = Depends(get_prompt_manager_deps),
+    async_client: AsyncQdrantClient = Depends(get_async_qdrant_client_deps),
+    redis_client: aioredis.Redis = Depends(get_async_redis_deps),
+):
+    """Stream the chat answer as server-sent events, see `QueryService.astream_agentic`."""
+    query_service = QueryService()
+
+    events = query_service.astream_agentic(
+        query=request.query,
+        session_id=request.session_id,
+        llm=llm,
+        vectorstore=vectorstore,
+        prompt_manager=prompt_manager,
+        async_client=async_client,
+        redis_client=redis_client,
+        filters=request.filters,
+    )
+
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,160 @@
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.exception import UploadTooLargeError
+from app.core.config import settings
+
+
+@dataclass
+class ReceivedFile:
+    """An uploaded file, written to `path` or kept in memory as `data`."""
+
+    filename: str
+    path: str | None = None
+    data: bytes | None = None
+
+
+def _decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+class UploadReceiver:
+    """
+    Receives the files of a multipart/form-data upload straight from the
+    request stream.
+
+    Files of the `field_name` field are written to `directory` as they
+    arrive, or kept in memory when `keep_in_memory(filename)` holds and they
+    stay within `in_memory_max_bytes`. Reading stops with UploadTooLargeError
+    at the first file over `max_file_bytes` or once the request exceeds
+    `max_request_bytes`, so an oversized upload never fully reaches disk or
+    memory. Files sharing a name are rejected with ValueError. Other fields
+    are ignored.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        field_name: str = "files",
+        max_file_bytes: int = settings.UPLOAD_MAX_FILE_BYTES,
+        max_request_bytes: int = settings.UPLOAD_MAX_REQUEST_BYTES,
+        in_memory_max_bytes: int = settings.UPLOAD_IN_MEMORY_PARSE_MAX_BYTES,
+        keep_in_memory: Callable[[str], bool] = lambda filename: False,
+    ):
+        self.directory = directory
+        self.field_name = field_name
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        self.in_memory_max_bytes = in_memory_max_bytes
+        self.keep_in_memory = keep_in_memory
+        self.files: list[ReceivedFile] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        # State of the file part being received, None while in any other part
+        self._filename: str | None = None
+        self._size = 0
+        self._buffer: bytearray | None = None
+        self._out: BinaryIO | None = None
+
+    async def receive(self, request: Request) -> list[ReceivedFile]:
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise ValueError("Expected a multipart/form-data upload.")
+
+        parser = MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+        received = 0
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > self.max_request_bytes:
+                    raise UploadTooLargeError("Request exceeds the upload size limit.")
+                parser.write(chunk)
+            parser.finalize()
+        finally:
+            if self._out is not None:
+                self._out.close()
+
+        if not self.files:
+            raise ValueError(f"No files were uploaded in the '{self.field_name}' field.")
+        return self.files
+
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._filename = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if options.get(b"name") != self.field_name.encode() or b"filename" not in options:
+            return
+        filename = os.path.basename(_decode(options[b"filename"]))
+        if not filename:
+            raise ValueError("Uploaded files must have a name.")
+        # Files are stored and ingested under their name, one would replace the other
+        if any(file.filename == filename for file in self.files):
+            raise ValueError(f"File {filename} was uploaded more than once.")
+        self._filename = filename
+        self._size = 0
+        if self.keep_in_memory(filename):
+            self._buffer = bytearray()
+        else:
+            self._out = open(os.path.join(self.directory, filename), "wb")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._filename is None:
+            return
+        self._size += end - start
+        if self._size > self.max_file_bytes:
+            raise UploadTooLargeError(f"File {self._filename} exceeds the upload size limit.")
+        if self._buffer is not None and self._size > self.in_memory_max_bytes:
+            # Too large to parse from memory after all
+            self._out = open(os.path.join(self.directory, self._filename), "wb")
+            self._out.write(self._buffer)
+            self._buffer = None
+        if self._buffer is not None:
+            self._buffer += data[start:end]
+        else:
+            self._out.write(data[start:end])
+
+    def _on_part_end(self):
+        if self._filename is None:
+            return
+        if self._buffer is not None:
+            self.files.append(ReceivedFile(self._filename, data=bytes(self._buffer)))
+            self._buffer = None
+        else:
+            self._out.close()
+            self._out = None
+            self.files.append(
+                ReceivedFile(self._filename, path=os.path.join(self.directory, self._filename))
+            )
+        self._filename = None
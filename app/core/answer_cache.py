@@ -0,0 +1,158 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+import numpy as np
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.schema.query import QueryResponse
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+GENERATION_KEY_PREFIX = "answer_cache:generation:"
+
+
+@dataclass
+class _Entry:
+    scope: tuple
+    vector: np.ndarray
+    response: QueryResponse
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    Per-worker cache of chat answers, matched by query embedding similarity.
+
+    Entries are scoped to a collection version (the collection its name points
+    to, so a reindexed or recreated collection starts empty), its generation and
+    the search filters. The generation is a per-collection counter in Redis,
+    bumped after every ingestion into the collection, so answers built from
+    older content stop matching in every worker. A lookup returns the most
+    similar entry of its scope at or above `similarity_threshold`. Entries
+    expire after `ttl_seconds` and the least recently used are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = settings.ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.ANSWER_CACHE_TTL_SECONDS,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[int, _Entry] = {}
+        self._ids = itertools.count()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidated = 0
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _drop_outdated(self, collection_version: str, generation: int, now: float):
+        for entry_id, entry in list(self._entries.items()):
+            if entry.expires_at <= now:
+                del self._entries[entry_id]
+                self._expired += 1
+            elif entry.scope[0] == collection_version and entry.scope[1] < generation:
+                del self._entries[entry_id]
+                self._invalidated += 1
+
+    def get(
+        self, collection_version: str, generation: int, filters_key: str | None, vector: list[float]
+    ) -> QueryResponse | None:
+        scope = (collection_version, generation, filters_key)
+        query = self._normalize(vector)
+        with self._lock:
+            self._drop_outdated(collection_version, generation, time.monotonic())
+            candidates = [
+                (entry_id, entry)
+                for entry_id, entry in self._entries.items()
+                if entry.scope == scope and len(entry.vector) == len(query)
+            ]
+            if candidates:
+                similarities = np.stack([entry.vector for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id, entry = candidates[best]
+                    # Reinsert to mark it most recently used
+                    self._entries[entry_id] = self._entries.pop(entry_id)
+                    self._hits += 1
+                    logger.info(f"Answer cache hit (similarity {similarities[best]:.3f})")
+                    return entry.response.model_copy(deep=True)
+            self._misses += 1
+            return None
+
+    def put(
+        self,
+        collection_version: str,
+        generation: int,
+        filters_key: str | None,
+        vector: list[float],
+        response: QueryResponse,
+    ):
+        entry = _Entry(
+            scope=(collection_version, generation, filters_key),
+            vector=self._normalize(vector),
+            response=response.model_copy(deep=True),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[next(self._ids)] = entry
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+                self._evictions += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self._bypassed += 1
+
+    async def ageneration(self, redis_client: aioredis.Redis, collection_name: str) -> int:
+        """Current generation of `collection_name`, 0 until its first ingestion."""
+        value = await redis_client.get(GENERATION_KEY_PREFIX + collection_name)
+        return int(value) if value is not None else 0
+
+    async def ainvalidate(self, redis_client: aioredis.Redis, collection_name: str):
+        """Bump the generation of `collection_name`, in every worker."""
+        try:
+            generation = await redis_client.incr(GENERATION_KEY_PREFIX + collection_name)
+            logger.info(f"Answer cache generation of {collection_name} is now {generation}")
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate cached answers of {collection_name}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "bypassed": self._bypassed,
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "invalidated": self._invalidated,
+            }
+
+
+_answer_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
@@ -0,0 +1,111 @@
+"""
+Coordinates ingestion and reindexing of a collection across workers.
+
+A reindex copies the collection into a new version and then deletes the old
+one, so chunks written to the old version meanwhile would be lost. Ingestions
+therefore register as writers of the collection, and a reindex takes the
+collection for itself and waits for the writers that started before it.
+Writers set their key before checking for a reindex and a reindex sets its key
+before checking for writers, so one of them always sees the other.
+"""
+import asyncio
+import re
+import uuid
+from contextlib import asynccontextmanager
+import redis.asyncio as aioredis
+
+from app.exception import CollectionBusyError
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "collection_lock:"
+# Held locks are renewed while their holder runs, a crashed worker's expire
+LOCK_TTL_SECONDS = 30
+POLL_SECONDS = 1.0
+
+
+def _reindex_key(collection_name: str) -> str:
+    return f"{KEY_PREFIX}{collection_name}:reindex"
+
+
+def _writer_key(collection_name: str, token: str) -> str:
+    return f"{KEY_PREFIX}{collection_name}:writer:{token}"
+
+
+async def _renew(redis_client: aioredis.Redis, key: str):
+    while True:
+        await asyncio.sleep(LOCK_TTL_SECONDS / 3)
+        await redis_client.expire(key, LOCK_TTL_SECONDS)
+
+
+@asynccontextmanager
+async def _held(redis_client: aioredis.Redis, key: str):
+    renewal = asyncio.create_task(_renew(redis_client, key))
+    try:
+        yield
+    finally:
+        renewal.cancel()
+        await redis_client.delete(key)
+
+
+async def areindex_running(redis_client: aioredis.Redis, collection_name: str) -> bool:
+    return bool(await redis_client.exists(_reindex_key(collection_name)))
+
+
+async def _ahas_writers(redis_client: aioredis.Redis, collection_name: str) -> bool:
+    # Glob characters in the name match literally
+    pattern = _writer_key(re.sub(r"([*?\[\]\\])", r"\\\1", collection_name), "*")
+    async for _ in redis_client.scan_iter(match=pattern, count=100):
+        return True
+    return False
+
+
+@asynccontextmanager
+async def collection_writer(
+    redis_client: aioredis.Redis, collection_name: str, wait: bool = True
+):
+    """
+    Held while ingesting into `collection_name`. While the collection is being
+    reindexed, waits for the reindex to finish, or with `wait=False` raises
+    CollectionBusyError.
+    """
+    key = _writer_key(collection_name, uuid.uuid4().hex)
+    waited = False
+    while True:
+        await redis_client.set(key, 1, ex=LOCK_TTL_SECONDS)
+        if not await areindex_running(redis_client, collection_name):
+            break
+        await redis_client.delete(key)
+        if not wait:
+            raise CollectionBusyError(
+                f"Collection {collection_name} is being reindexed, retry once it finishes."
+            )
+        if not waited:
+            logger.info(f"Waiting for the reindex of {collection_name} before ingesting")
+            waited = True
+        await asyncio.sleep(POLL_SECONDS)
+
+    async with _held(redis_client, key):
+        yield
+
+
+@asynccontextmanager
+async def collection_reindex(redis_client: aioredis.Redis, collection_name: str):
+    """
+    Held while reindexing `collection_name`. Raises CollectionBusyError when
+    it is already being reindexed, otherwise new ingestions wait and the block
+    starts once running ones have finished.
+    """
+    key = _reindex_key(collection_name)
+    if not await redis_client.set(key, 1, nx=True, ex=LOCK_TTL_SECONDS):
+        raise CollectionBusyError(f"Collection {collection_name} is already being reindexed.")
+
+    async with _held(redis_client, key):
+        waited = False
+        while await _ahas_writers(redis_client, collection_name):
+            if not waited:
+                logger.info(f"Waiting for running ingestions into {collection_name}")
+                waited = True
+            await asyncio.sleep(POLL_SECONDS)
+        yield
@@ -2,7 +2,8 @@ from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from dotenv import load_dotenv
 from app.schema.llm import EmbeddingProvider, LLMProvider
-from app.schema.db import VectorDB
+from app.schema.db import VectorDB, VectorQuantization
+from app.schema.query import QueryPipeline, SpeculativeMode
 
 load_dotenv()
 
@@ -18,24 +19,108 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 50
 
+    INGEST_EMBED_BATCH_SIZE: int = 64
+    INGEST_MAX_IN_FLIGHT_EMBEDDINGS: int = 4
+    INGEST_PARSE_CONCURRENCY: int = 2
+    INGEST_QUEUE_SIZE: int = 8
+    INGEST_MAX_CONCURRENT_JOBS: int = 2
+    INGEST_PARSE_PROCESSES: int = 2
+    INGEST_MAX_RETAINED_JOBS: int = 100
+
+    UPLOAD_MAX_FILE_BYTES: int = 200 * 1024 * 1024
+    UPLOAD_MAX_REQUEST_BYTES: int = 1024 * 1024 * 1024
+    UPLOAD_IN_MEMORY_PARSE_MAX_BYTES: int = 16 * 1024 * 1024
+
     VECTOR_DB: VectorDB = VectorDB.QDRANT
     VECTORDB_PERSIST_DIRECTORY: str = "./vectorstore"
     VECTORDB_PERSIST_URL: str = "http://localhost:6333"
+    COLLECTION_HYBRID_SEARCH: bool = False
+    HYBRID_PREFETCH_MULTIPLIER: int = 4
+    COLLECTION_QUANTIZATION: VectorQuantization = VectorQuantization.NONE
+    COLLECTION_HNSW_M: int = 16
+    COLLECTION_HNSW_EF_CONSTRUCT: int = 100
+    COLLECTION_ON_DISK_VECTORS: bool = False
+    COLLECTION_ON_DISK_PAYLOAD: bool = False
+    COLLECTION_EMBEDDING_DIMENSIONS: int | None = None
+    COLLECTION_ALIAS_CACHE_SECONDS: float = 5.0
 
     VECTOR_SEARCH_SIMILARITY_THRESHOLD: float = 0.3
     VECTOR_SEARCH_TOP_K: int = 5
+    VECTOR_SEARCH_HNSW_EF: int = 128
+    VECTOR_SEARCH_QUANTIZATION_RESCORE: bool = True
+    VECTOR_SEARCH_QUANTIZATION_OVERSAMPLING: float = 2.0
+
+    RERANKER: str = "bm25"
+    RERANK_MODEL: str = "rerank-v3.5"
+    RERANK_CANDIDATES: int = 20
+    RERANK_LEXICAL_WEIGHT: float = 0.5
+
+    CONTEXT_PACKING_ENABLED: bool = True
+    CONTEXT_MAX_TOKENS: int = 3000
+    CONTEXT_MMR_LAMBDA: float = 0.7
 
     EMBEDDING_PROVIDER: EmbeddingProvider = EmbeddingProvider.GOOGLE
     EMBEDDING_MODEL_NAME: str = "gemini-embedding-001"
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000
+    EMBEDDING_CACHE_MMAP_SIZE: int = 1024 * 1024 * 1024
+
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_IN_FLIGHT: int = 4
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_GOOGLE_REQUESTS_PER_SECOND: float = 20.0
+    RATE_LIMIT_COHERE_REQUESTS_PER_SECOND: float = 10.0
+    RATE_LIMIT_BEDROCK_REQUESTS_PER_SECOND: float = 10.0
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_MAX_RETRIES: int = 3
+    RATE_LIMIT_BACKOFF_SECONDS: float = 1.0
+    RATE_LIMIT_MAX_BACKOFF_SECONDS: float = 60.0
+    RATE_LIMIT_RECOVERY_SECONDS: float = 30.0
     
     LLM_PROVIDER: LLMProvider = LLMProvider.GOOGLE
     LLM_MODEL_NAME: str = "gemini-2.5-flash"
 
     TAVILY_API_KEY: str = ""
     WEB_SEARCH_TOP_K: int = 5
+
+    WEB_CACHE_ENABLED: bool = True
+    WEB_SEARCH_CACHE_TTL_SECONDS: float = 60 * 60
+    WEB_SEARCH_CACHE_STALE_SECONDS: float = 24 * 60 * 60
+    WEB_SEARCH_CACHE_MAX_ENTRIES: int = 10_000
+    WEB_EXTRACT_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+    WEB_EXTRACT_CACHE_STALE_SECONDS: float = 7 * 24 * 60 * 60
+    WEB_EXTRACT_CACHE_MAX_ENTRIES: int = 2000
+
+    QUERY_PIPELINE: QueryPipeline = QueryPipeline.AGENTIC
+    QUERY_SPECULATIVE_MODE: SpeculativeMode = SpeculativeMode.SEARCH
+    QUERY_SPECULATION_BUDGET_SECONDS: float = 15.0
+
+    QUERY_ROUTER_ENABLED: bool = True
+    QUERY_ROUTER_VECTOR_SCORE_THRESHOLD: float = 0.65
+    QUERY_ROUTER_WEB_SCORE_THRESHOLD: float = 0.45
+    QUERY_ROUTER_MIN_LEXICAL_OVERLAP: float = 0.3
+
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: float = 60 * 60
     
     REDIS_URL: str = "redis://localhost:6379"
 
+    CHAT_HISTORY_MAX_TOKENS: int = 2000
+    CHAT_HISTORY_MAX_MESSAGES: int = 200
+    CHAT_HISTORY_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    CHAT_HISTORY_CACHE_SIZE: int = 1024
+    CHAT_HISTORY_SUMMARY_ENABLED: bool = False
+    CHAT_HISTORY_SUMMARY_BATCH: int = 10
+
     GOOGLE_API_KEY: str = ""
     COHERE_API_KEY: str = ""
 
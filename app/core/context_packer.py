@@ -0,0 +1,205 @@
+import threading
+from dataclasses import dataclass, field
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.tokens import CHARS_PER_TOKEN, content_terms, estimate_tokens
+
+logger = get_logger(__name__)
+
+# Chunks this many characters apart still read as one passage when joined
+MERGE_MAX_GAP = 2
+
+
+@dataclass
+class _Passage:
+    document: Document
+    relevance: float
+    end: int | None = None
+    terms: set[str] = field(default_factory=set)
+
+    @property
+    def text(self) -> str:
+        return self.document.page_content
+
+
+class ContextPacker:
+    """
+    Turns ranked search results into the context sent to the LLM.
+
+    Chunks of the same source that touch or overlap, by their `start_index`,
+    are merged into one passage with the overlap removed, and duplicates are
+    dropped. Passages are then picked by maximal marginal relevance, trading
+    relevance against lexical similarity to the passages already picked, until
+    `max_tokens` is reached.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = settings.CONTEXT_MAX_TOKENS,
+        mmr_lambda: float = settings.CONTEXT_MMR_LAMBDA,
+    ):
+        self.max_tokens = max_tokens
+        self.mmr_lambda = mmr_lambda
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._tokens_in = 0
+        self._tokens_out = 0
+
+    def pack(
+        self, documents: list[Document], scores: list[float] | None = None
+    ) -> list[Document]:
+        """Packed passages for `documents` ranked best first, with optional `scores`."""
+        if not documents:
+            return []
+        if scores is None:
+            # Rank order is all there is, turn it into a decreasing relevance
+            scores = [1 - i / len(documents) for i in range(len(documents))]
+        top = max(scores) or 1.0
+        passages = [
+            _Passage(document, score / top) for document, score in zip(documents, scores)
+        ]
+
+        passages = self._dedupe(self._merge(passages))
+        packed = self._select(passages)
+
+        tokens_in = sum(estimate_tokens(document.page_content) for document in documents)
+        tokens_out = sum(estimate_tokens(document.page_content) for document in packed)
+        with self._lock:
+            self._requests += 1
+            self._tokens_in += tokens_in
+            self._tokens_out += tokens_out
+        logger.info(
+            f"Packed {len(documents)} chunks into {len(packed)} passages, "
+            f"{tokens_out} tokens ({tokens_in - tokens_out} saved)"
+        )
+        return packed
+
+    def _merge(self, passages: list[_Passage]) -> list[_Passage]:
+        by_source: dict[str, list[_Passage]] = {}
+        merged = []
+        for passage in passages:
+            metadata = passage.document.metadata
+            if isinstance(metadata.get("start_index"), int) and metadata.get("source"):
+                passage.end = metadata["start_index"] + len(passage.text)
+                by_source.setdefault(metadata["source"], []).append(passage)
+            else:
+                merged.append(passage)
+
+        for group in by_source.values():
+            group.sort(key=lambda passage: passage.document.metadata["start_index"])
+            current = group[0]
+            for passage in group[1:]:
+                joined = self._join(current, passage)
+                if joined is None:
+                    merged.append(current)
+                    current = passage
+                else:
+                    current = joined
+            merged.append(current)
+
+        merged.sort(key=lambda passage: passage.relevance, reverse=True)
+        return merged
+
+    def _join(self, first: _Passage, second: _Passage) -> _Passage | None:
+        """`first` followed by `second` without the text they share, if they touch."""
+        start = second.document.metadata["start_index"]
+        overlap = first.end - start
+        if overlap < -MERGE_MAX_GAP:
+            return None
+
+        if overlap >= 0:
+            if second.end <= first.end:
+                text = first.text
+            elif first.text.endswith(second.text[:overlap]):
+                text = first.text + second.text[overlap:]
+            else:
+                # Offsets do not match the text, keep both as they are
+                return None
+        else:
+            text = first.text + " " + second.text
+
+        metadata = dict(first.document.metadata)
+        if second.relevance > first.relevance:
+            # Keep the identity of the best matching chunk
+            metadata.update(second.document.metadata)
+            metadata["start_index"] = first.document.metadata["start_index"]
+            metadata["page"] = first.document.metadata.get("page")
+        return _Passage(
+            Document(page_content=text, metadata=metadata),
+            max(first.relevance, second.relevance),
+            end=max(first.end, second.end),
+        )
+
+    def _dedupe(self, passages: list[_Passage]) -> list[_Passage]:
+        seen = set()
+        unique = []
+        for passage in passages:
+            key = " ".join(passage.text.split())
+            if key not in seen:
+                seen.add(key)
+                unique.append(passage)
+        return unique
+
+    def _select(self, passages: list[_Passage]) -> list[Document]:
+        for passage in passages:
+            passage.terms = content_terms(passage.text)
+
+        selected: list[_Passage] = []
+        remaining = list(passages)
+        budget = self.max_tokens
+        while remaining and budget > 0:
+            best = max(remaining, key=lambda passage: self._mmr(passage, selected))
+            remaining.remove(best)
+
+            tokens = estimate_tokens(best.text)
+            if tokens > budget:
+                if selected:
+                    # A smaller passage may still fit
+                    continue
+                # Never return nothing, cut the best passage down to the budget
+                best = _Passage(
+                    Document(
+                        page_content=best.text[: budget * CHARS_PER_TOKEN],
+                        metadata=best.document.metadata,
+                    ),
+                    best.relevance,
+                    terms=best.terms,
+                )
+                tokens = budget
+            selected.append(best)
+            budget -= tokens
+
+        return [passage.document for passage in selected]
+
+    def _mmr(self, passage: _Passage, selected: list[_Passage]) -> float:
+        redundancy = max(
+            (_jaccard(passage.terms, other.terms) for other in selected), default=0.0
+        )
+        return self.mmr_lambda * passage.relevance - (1 - self.mmr_lambda) * redundancy
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "tokens_in": self._tokens_in,
+                "tokens_out": self._tokens_out,
+                "tokens_saved": self._tokens_in - self._tokens_out,
+            }
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+_packer: ContextPacker | None = None
+
+
+def get_context_packer() -> ContextPacker:
+    global _packer
+    if _packer is None:
+        _packer = ContextPacker()
+    return _packer
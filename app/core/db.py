@@ -1,19 +1,42 @@
-from langchain_community.chat_message_histories import RedisChatMessageHistory
-from qdrant_client import QdrantClient
+import uuid
+from typing import Callable
+import redis
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient, models
 
 from app.exception import CollectionAlreadyExistsError, VectorDBError
 from app.schema.llm import EmbeddingProvider
-from app.schema.db import VectorDB
+from app.schema.db import VectorDB, VectorQuantization
 from app.core.config import settings
 from app.core.logging_config import get_logger
 from app.core.llm import get_embedding_function
+from app.core.history import CompactRedisChatMessageHistory
+from app.core.sparse import SPARSE_VECTOR_NAME, BM25SparseEmbeddings, is_hybrid_collection
+from app.core.reduced_embeddings import (
+    EMBEDDING_DIMENSIONS_KEY,
+    ReducedEmbeddings,
+    collection_dimensions,
+)
 
 logger = get_logger(__name__)
 
 
-def get_session_history(session_id: str):
+_redis_client: redis.Redis | None = None
+
+
+def get_redis_client() -> redis.Redis:
+    """Process-wide sync Redis client, its connection pool is shared by all callers."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def get_session_history(session_id: str) -> CompactRedisChatMessageHistory:
     """Return memory object for the user."""
-    history = RedisChatMessageHistory(session_id=session_id, url=settings.REDIS_URL)
+    history = CompactRedisChatMessageHistory(
+        session_id=session_id, redis_client=get_redis_client()
+    )
 
     return history
 
@@ -25,25 +48,60 @@ def get_vectorstore(
     model_name: str,
     persist_directory: str = None,
     persist_url: str = None,
+    client: QdrantClient | None = None,
+    embedding_function: Embeddings | None = None,
+    embedding_factory: Callable[..., Embeddings] = get_embedding_function,
 ):
-    try:
-        embedding_function = get_embedding_function(
-            embedding_provider=embedding_provider, model_name=model_name
-        )
+    """
+    Build a vector store, reusing `client` and `embedding_function` when given.
+    Otherwise the embedding function is built by `embedding_factory`, called like
+    get_embedding_function.
 
+    `collection_name` may be an alias, Qdrant resolves it on every request.
+    The embedding model and size recorded in the collection metadata take
+    precedence over `embedding_provider` and `model_name`; a given
+    `embedding_function` should match them, a full size one is truncated.
+    """
+    try:
         # vectordb_persist_directory = f"{persist_directory}-{vector_db.value}"
 
         if vector_db == VectorDB.QDRANT:
-            from langchain_qdrant import QdrantVectorStore
-            from qdrant_client import QdrantClient
+            from langchain_qdrant import QdrantVectorStore, RetrievalMode
 
-            client = QdrantClient(url=persist_url)
+            if client is None:
+                client = QdrantClient(url=persist_url)
 
-            vectordb = QdrantVectorStore(
-                client=client,
-                collection_name=collection_name,
-                embedding=embedding_function,
+            collection_info = client.get_collection(collection_name)
+            embedding_provider, model_name, dimensions = collection_embedding(
+                collection_info, embedding_provider, model_name
             )
+            if embedding_function is None:
+                embedding_function = embedding_factory(
+                    embedding_provider=embedding_provider,
+                    model_name=model_name,
+                    dimensions=dimensions,
+                )
+            elif dimensions is not None and getattr(
+                embedding_function, "dimensions", None
+            ) != dimensions:
+                embedding_function = ReducedEmbeddings(embedding_function, dimensions)
+
+            # Collections created with a sparse vector are searched in hybrid mode
+            if is_hybrid_collection(collection_info):
+                vectordb = QdrantVectorStore(
+                    client=client,
+                    collection_name=collection_name,
+                    embedding=embedding_function,
+                    retrieval_mode=RetrievalMode.HYBRID,
+                    sparse_embedding=BM25SparseEmbeddings(),
+                    sparse_vector_name=SPARSE_VECTOR_NAME,
+                )
+            else:
+                vectordb = QdrantVectorStore(
+                    client=client,
+                    collection_name=collection_name,
+                    embedding=embedding_function,
+                )
         else:
             logger.error(f"Vector DB {vector_db} not supported")
             raise VectorDBError(f"Unsupported vector database: {vector_db}")
@@ -56,39 +114,253 @@ def get_vectorstore(
         ) from e
 
 
-def create_collection_qdrant(collection_name: str) -> bool:
-    embedding_function = get_embedding_function(
-        embedding_provider=settings.EMBEDDING_PROVIDER,
-        model_name=settings.EMBEDDING_MODEL_NAME,
+# Collection metadata keys of the embedding model the collection was built with
+EMBEDDING_PROVIDER_KEY = "embedding_provider"
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+# Separates the collection name from the version of the collection behind it
+COLLECTION_VERSION_SEPARATOR = "__"
+
+
+def collection_embedding(
+    collection_info,
+    embedding_provider: EmbeddingProvider = settings.EMBEDDING_PROVIDER,
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+) -> tuple[EmbeddingProvider, str, int | None]:
+    """
+    Embedding provider, model and reduced size of a collection, from
+    `get_collection`. Collections created without them use the given defaults.
+    """
+    metadata = collection_info.config.metadata or {}
+    return (
+        EmbeddingProvider(metadata.get(EMBEDDING_PROVIDER_KEY, embedding_provider)),
+        metadata.get(EMBEDDING_MODEL_KEY, model_name),
+        collection_dimensions(collection_info),
     )
 
-    client = QdrantClient(url=settings.VECTORDB_PERSIST_URL)
+
+def resolve_collection(client: QdrantClient, collection_name: str) -> str:
+    """The collection `collection_name` points to if it is an alias, else itself."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == collection_name:
+            return alias.collection_name
+    return collection_name
+
+
+def new_collection_version(collection_name: str) -> str:
+    """Name for a new physical collection served under the alias `collection_name`."""
+    return f"{collection_name}{COLLECTION_VERSION_SEPARATOR}{uuid.uuid4().hex[:8]}"
+
+
+def swap_alias(client: QdrantClient, alias_name: str, collection_name: str):
+    """Point `alias_name` at `collection_name` in one atomic update."""
+    operations = []
+    if any(alias.alias_name == alias_name for alias in client.get_aliases().aliases):
+        operations.append(
+            models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=alias_name)
+            )
+        )
+    operations.append(
+        models.CreateAliasOperation(
+            create_alias=models.CreateAlias(
+                collection_name=collection_name, alias_name=alias_name
+            )
+        )
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+# Indexed chunk metadata fields
+PAYLOAD_INDEXES = {
+    "source": models.PayloadSchemaType.KEYWORD,
+    "source_type": models.PayloadSchemaType.KEYWORD,
+    "page": models.PayloadSchemaType.INTEGER,
+    "ingested_at": models.PayloadSchemaType.DATETIME,
+}
+
+
+def _get_client(client: QdrantClient | None) -> QdrantClient:
+    if client is None:
+        return QdrantClient(url=settings.VECTORDB_PERSIST_URL)
+    return client
+
+
+def _quantization_config(
+    quantization: VectorQuantization,
+) -> models.QuantizationConfig | None:
+    # Quantized vectors stay in RAM even when the originals are on disk,
+    # searches only read the originals to rescore the top candidates
+    if quantization == VectorQuantization.SCALAR:
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if quantization == VectorQuantization.BINARY:
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def create_collection_qdrant(
+    collection_name: str,
+    client: QdrantClient | None = None,
+    embedding_function: Embeddings | None = None,
+    hybrid: bool = settings.COLLECTION_HYBRID_SEARCH,
+    quantization: VectorQuantization = settings.COLLECTION_QUANTIZATION,
+    hnsw_m: int = settings.COLLECTION_HNSW_M,
+    hnsw_ef_construct: int = settings.COLLECTION_HNSW_EF_CONSTRUCT,
+    on_disk_vectors: bool = settings.COLLECTION_ON_DISK_VECTORS,
+    on_disk_payload: bool = settings.COLLECTION_ON_DISK_PAYLOAD,
+    dimensions: int | None = settings.COLLECTION_EMBEDDING_DIMENSIONS,
+    embedding_provider: EmbeddingProvider = settings.EMBEDDING_PROVIDER,
+    embedding_model: str = settings.EMBEDDING_MODEL_NAME,
+    alias: bool = True,
+) -> bool:
+    """
+    Create a collection, with a BM25 sparse vector next to the dense one if `hybrid`.
+
+    With `alias` the collection is created under a versioned name and
+    `collection_name` is an alias of it, so it can be rebuilt and swapped in
+    later (see ReindexService). `embedding_function` must embed with
+    `embedding_provider` and `embedding_model`, which are recorded in the
+    collection metadata for queries and ingestion.
+
+    `quantization`, the HNSW parameters and the on-disk flags trade memory
+    against recall and latency, see benchmarks/bench_quantization.py.
+    `dimensions` stores embeddings reduced to that size, it is saved in the
+    collection metadata so ingestion and queries reduce theirs to match.
+    """
+    if embedding_function is None:
+        embedding_function = get_embedding_function(
+            embedding_provider=embedding_provider, model_name=embedding_model
+        )
+
+    client = _get_client(client)
 
     collections = client.get_collections().collections
-    collection_names = [col.name for col in collections]
+    collection_names = [col.name for col in collections] + [
+        alias.alias_name for alias in client.get_aliases().aliases
+    ]
     if collection_name in collection_names:
         raise CollectionAlreadyExistsError(
             f"Collection {collection_name} already exists."
         )
+    alias_name = None
+    if alias:
+        alias_name, collection_name = collection_name, new_collection_version(
+            collection_name
+        )
     sample_vector = embedding_function.embed_query("test")
     vector_size = len(sample_vector)
-    return client.create_collection(
+    if dimensions is not None:
+        if dimensions > vector_size:
+            raise ValueError(
+                f"Cannot reduce {vector_size} dimension embeddings to {dimensions}."
+            )
+        vector_size = dimensions
+    created = client.create_collection(
         collection_name=collection_name,
-        vectors_config={
-            "size": vector_size,
-            "distance": "Cosine",
+        vectors_config=models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=on_disk_vectors,
+        ),
+        sparse_vectors_config=(
+            {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+            if hybrid
+            else None
+        ),
+        hnsw_config=models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+        quantization_config=_quantization_config(quantization),
+        on_disk_payload=on_disk_payload,
+        metadata={
+            EMBEDDING_PROVIDER_KEY: EmbeddingProvider(embedding_provider).value,
+            EMBEDDING_MODEL_KEY: embedding_model,
+            **({EMBEDDING_DIMENSIONS_KEY: dimensions} if dimensions is not None else {}),
         },
     )
+    # Re-ingestion looks up the existing chunks of a document by source, searches
+    # filter on every field (see build_filter)
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=f"metadata.{field_name}",
+            field_schema=field_schema,
+        )
+    if alias_name is not None:
+        swap_alias(client, alias_name, collection_name)
+    return created
 
 
-def list_collection_qdrant() -> list:
-    client = QdrantClient(url=settings.VECTORDB_PERSIST_URL)
+def list_collection_qdrant(client: QdrantClient | None = None) -> list:
+    """Collection names as clients use them: aliases and collections without one."""
+    client = _get_client(client)
     collections = client.get_collections().collections
-    collections_list = []
+    aliases = [alias.alias_name for alias in client.get_aliases().aliases]
+    names = set(aliases) | {collection.name for collection in collections}
+    collections_list = list(aliases)
     for collection in collections:
-        collections_list.append(collection.name)
-    return collections_list
+        # Versions behind an alias, and ones being rebuilt, are hidden
+        base_name = collection.name.rpartition(COLLECTION_VERSION_SEPARATOR)[0]
+        if base_name not in names:
+            collections_list.append(collection.name)
+    return sorted(collections_list)
+
+def delete_collection_qdrant(
+    collection_name: str, client: QdrantClient | None = None
+) -> bool:
+    """Delete a collection, or an alias together with the collection behind it."""
+    client = _get_client(client)
+    target = resolve_collection(client, collection_name)
+    if target != collection_name:
+        client.update_collection_aliases(
+            change_aliases_operations=[
+                models.DeleteAliasOperation(
+                    delete_alias=models.DeleteAlias(alias_name=collection_name)
+                )
+            ]
+        )
+    return client.delete_collection(target)
 
-def delete_collection_qdrant(collection_name: str) -> bool:
-    client = QdrantClient(url=settings.VECTORDB_PERSIST_URL)
-    return client.delete_collection(collection_name)
+
+def get_source_point_ids(
+    client: QdrantClient,
+    collection_name: str,
+    source: str,
+    metadata_payload_key: str = "metadata",
+) -> set[str]:
+    """Return the ids of every point ingested from `source`."""
+    source_filter = models.Filter(
+        must=[
+            models.FieldCondition(
+                key=f"{metadata_payload_key}.source",
+                match=models.MatchValue(value=source),
+            )
+        ]
+    )
+    point_ids = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=source_filter,
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.update(str(point.id) for point in points)
+        if offset is None:
+            return point_ids
+
+
+def delete_points(client: QdrantClient, collection_name: str, point_ids: list[str]):
+    if not point_ids:
+        return
+    client.delete(
+        collection_name=collection_name,
+        points_selector=models.PointIdsList(points=point_ids),
+    )
@@ -0,0 +1,236 @@
+import asyncio
+import threading
+from functools import partial
+from typing import Awaitable, Callable
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.singleflight import get_single_flight
+
+logger = get_logger(__name__)
+
+QueryBatchFunction = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+def query_batch_function(embeddings: Embeddings) -> QueryBatchFunction | None:
+    """
+    Call embedding several queries in one provider request, None when the
+    provider has no batch endpoint (Bedrock embeds texts one request each).
+
+    Queries keep their query task type, `embed_documents` would embed them as
+    documents. Batches of a rate limited provider wait for its limiter.
+    """
+    from app.core.rate_limiter import RateLimitedEmbeddings
+
+    if isinstance(embeddings, RateLimitedEmbeddings):
+        embed_batch = query_batch_function(embeddings.underlying)
+        if embed_batch is None:
+            return None
+        return lambda texts: embeddings.acall(embed_batch, texts)
+    try:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        if isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+            task_type = embeddings.task_type or "RETRIEVAL_QUERY"
+            return lambda texts: embeddings.aembed_documents(texts, task_type=task_type)
+    except ImportError:
+        pass
+    try:
+        from langchain_cohere import CohereEmbeddings
+
+        if isinstance(embeddings, CohereEmbeddings):
+            return lambda texts: embeddings.aembed(texts, input_type="search_query")
+    except ImportError:
+        pass
+    return None
+
+
+class QueryEmbeddingBatcher:
+    """
+    Collects query embeddings requested concurrently on the event loop and
+    sends them as one batch call.
+
+    Queries are sent once `max_batch` are waiting or `max_wait_seconds` after
+    the first of them, so a lone query waits at most that long. At most
+    `max_in_flight` batches are sent at once: when the provider slows down,
+    e.g. on its rate limit, queries wait here and go out in larger batches
+    instead of queueing one request each. Identical queries in a batch are
+    embedded once. A failed batch fails all its queries.
+    """
+
+    def __init__(
+        self,
+        embed_batch: QueryBatchFunction,
+        max_batch: int = settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_seconds: float = settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+        max_in_flight: int = settings.EMBEDDING_BATCH_MAX_IN_FLIGHT,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self.max_in_flight = max_in_flight
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        # The oldest pending query has waited `max_wait_seconds`
+        self._due = False
+        self._in_flight = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._provider_texts = 0
+
+    async def embed(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop and (self._pending or self._in_flight):
+            # Batches belong to one event loop, embed alone from any other
+            return (await self.embed_batch([text]))[0]
+
+        self._loop = loop
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None and not self._due:
+            self._timer = loop.call_later(self.max_wait_seconds, self._expire)
+        return await future
+
+    def _expire(self):
+        self._timer = None
+        self._due = True
+        self._flush()
+
+    def _flush(self):
+        while (
+            self._pending
+            and self._in_flight < self.max_in_flight
+            and (self._due or len(self._pending) >= self.max_batch)
+        ):
+            batch = self._pending[: self.max_batch]
+            self._pending = self._pending[self.max_batch :]
+            self._in_flight += 1
+            task = self._loop.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._landed)
+        if not self._pending:
+            self._due = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _landed(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._in_flight -= 1
+        # Queries held back while every slot was taken
+        self._flush()
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        with self._lock:
+            self._queries += len(batch)
+            self._batches += 1
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._provider_texts += len(texts)
+        try:
+            vectors = dict(zip(texts, await self.embed_batch(texts)))
+        except Exception as e:
+            logger.warning(f"Query embedding batch of {len(texts)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future in batch:
+            # Callers cancelled while waiting have nothing to receive
+            if not future.done():
+                future.set_result(vectors[text])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self._queries,
+                "batches": self._batches,
+                "mean_batch_size": self._queries / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "in_flight": self._in_flight,
+                "provider_texts": self._provider_texts,
+            }
+
+
+class BatchedQueryEmbeddings(Embeddings):
+    """Embedding function whose async query embeddings go through a QueryEmbeddingBatcher."""
+
+    def __init__(self, underlying: Embeddings, batcher: QueryEmbeddingBatcher):
+        self.underlying = underlying
+        self.batcher = batcher
+
+    def __getattr__(self, name):
+        # Expose provider specific attributes (model, client, ...) of the wrapped object
+        underlying = self.__dict__.get("underlying")
+        if underlying is None:
+            raise AttributeError(name)
+        return getattr(underlying, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.batcher.embed(text)
+
+
+class CoalescedQueryEmbeddings(Embeddings):
+    """
+    Embedding function whose concurrent async embeddings of the same query
+    share one call to the wrapped function, see `SingleFlight`. Queries of
+    different texts still go through the batcher together.
+    """
+
+    def __init__(self, underlying: Embeddings, namespace: str):
+        self.underlying = underlying
+        self.namespace = namespace
+
+    def __getattr__(self, name):
+        # Expose provider specific attributes (model, client, ...) of the wrapped object
+        underlying = self.__dict__.get("underlying")
+        if underlying is None:
+            raise AttributeError(name)
+        return getattr(underlying, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await get_single_flight("query_embedding").do(
+            (self.namespace, text), partial(self.underlying.aembed_query, text)
+        )
+
+
+_batchers: dict[str, QueryEmbeddingBatcher] = {}
+
+
+def batched_query_embeddings(embeddings: Embeddings, name: str) -> Embeddings:
+    """`embeddings` with batched async query embeddings, unchanged without a batch endpoint."""
+    embed_batch = query_batch_function(embeddings)
+    if embed_batch is None:
+        return embeddings
+    batcher = QueryEmbeddingBatcher(embed_batch)
+    _batchers[name] = batcher
+    return BatchedQueryEmbeddings(embeddings, batcher)
+
+
+def embedding_batcher_stats() -> dict:
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
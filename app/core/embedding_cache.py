@@ -0,0 +1,244 @@
+import asyncio
+import array
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+QUERY = "query"
+DOCUMENT = "document"
+
+
+class EmbeddingCacheStore:
+    """
+    On-disk embedding store shared by every worker on the host.
+
+    Backed by SQLite in WAL mode with memory-mapped I/O, so all processes read
+    the same pages from the OS page cache instead of holding private copies.
+    Entries are evicted least-recently-used once `max_entries` is exceeded.
+    """
+
+    # Hits refresh `last_access` at most this often to keep reads mostly write-free
+    TOUCH_INTERVAL_SECONDS = 60
+    # Number of inserts between size checks
+    EVICTION_CHECK_INTERVAL = 1000
+
+    def __init__(self, path: str, max_entries: int, mmap_size: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.mmap_size = mmap_size
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._inserts_since_check = self.EVICTION_CHECK_INTERVAL
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not be shared across a fork, reopen in each worker
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access "
+                "ON embeddings(last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(namespace: str, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{namespace}:{kind}:{digest}"
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        if not keys:
+            return found
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            stale = []
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector, last_access FROM embeddings "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob, last_access in rows:
+                    vector = array.array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                    if now - last_access > self.TOUCH_INTERVAL_SECONDS:
+                        stale.append((now, key))
+            if stale:
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", stale
+                )
+                conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (key, array.array("f", vector).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+
+            self._inserts_since_check += len(rows)
+            if self._inserts_since_check >= self.EVICTION_CHECK_INTERVAL:
+                self._inserts_since_check = 0
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+            (overflow,),
+        )
+        conn.commit()
+        self.evictions += overflow
+        logger.info(f"Evicted {overflow} least recently used cached embeddings")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding function and serves repeated texts from the shared
+    store. Query and document embeddings are cached separately because
+    providers embed them with different task types. The async methods use
+    the store in a thread, its SQLite reads and writes block.
+    """
+
+    def __init__(self, underlying: Embeddings, namespace: str, store: EmbeddingCacheStore):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.store = store
+
+    def __getattr__(self, name):
+        # Expose provider specific attributes (model, client, ...) of the wrapped object
+        underlying = self.__dict__.get("underlying")
+        if underlying is None:
+            raise AttributeError(name)
+        return getattr(underlying, name)
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        try:
+            return self.store.get_many(keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed, embedding directly: {e}")
+            return {}
+
+    def _save(self, items: dict[str, list[float]]):
+        try:
+            self.store.put_many(items)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write embeddings to cache: {e}")
+
+    def _missing(self, texts: list[str], keys: list[str], cached: dict) -> dict[str, str]:
+        # Unique texts that still need a provider call, keyed by cache key
+        return {key: text for key, text in zip(keys, texts) if key not in cached}
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.store.make_key(self.namespace, DOCUMENT, text) for text in texts]
+        cached = self._lookup(keys)
+        missing = self._missing(texts, keys, cached)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            embedded = dict(zip(missing.keys(), vectors))
+            self._save(embedded)
+            cached.update(embedded)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self.store.make_key(self.namespace, QUERY, text)
+        cached = self._lookup([key])
+        if key not in cached:
+            cached[key] = self.underlying.embed_query(text)
+            self._save(cached)
+        return cached[key]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.store.make_key(self.namespace, DOCUMENT, text) for text in texts]
+        cached = await asyncio.to_thread(self._lookup, keys)
+        missing = self._missing(texts, keys, cached)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            embedded = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self._save, embedded)
+            cached.update(embedded)
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self.store.make_key(self.namespace, QUERY, text)
+        cached = await asyncio.to_thread(self._lookup, [key])
+        if key not in cached:
+            cached[key] = await self.underlying.aembed_query(text)
+            await asyncio.to_thread(self._save, cached)
+        return cached[key]
+
+
+_store: EmbeddingCacheStore | None = None
+
+
+def get_embedding_cache_store() -> EmbeddingCacheStore:
+    global _store
+    if _store is None:
+        _store = EmbeddingCacheStore(
+            path=settings.EMBEDDING_CACHE_PATH,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            mmap_size=settings.EMBEDDING_CACHE_MMAP_SIZE,
+        )
+    return _store
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Sequence
+import redis
+import redis.asyncio as aioredis
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.tokens import estimate_message_tokens
+
+logger = get_logger(__name__)
+
+# Messages read per round trip while filling a window
+WINDOW_PAGE_SIZE = 20
+
+# Encoded message layout: one header byte, then the payload. The header holds the
+# message type code, and the high bit marks a zlib compressed payload. Plain
+# human/ai/system messages store their text as is, anything else stores its
+# compact JSON form.
+_GENERIC = 0
+_TYPE_CODES = {"human": 1, "ai": 2, "system": 3}
+_CODE_TYPES = {code: type_ for type_, code in _TYPE_CODES.items()}
+_COMPRESSED = 0x80
+# Shorter payloads do not shrink under zlib
+COMPRESS_MIN_BYTES = 128
+
+
+def encode_message(message: BaseMessage) -> bytes:
+    data = message_to_dict(message)
+    fields = data["data"]
+    code = _TYPE_CODES.get(data["type"], _GENERIC)
+    plain = isinstance(fields["content"], str) and not any(
+        value for name, value in fields.items() if name not in ("content", "type")
+    )
+
+    if code != _GENERIC and plain:
+        payload = fields["content"].encode("utf-8")
+    else:
+        code = _GENERIC
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload)
+        if len(compressed) < len(payload):
+            return bytes([code | _COMPRESSED]) + compressed
+    return bytes([code]) + payload
+
+
+def decode_message(data: bytes) -> BaseMessage:
+    header, payload = data[0], data[1:]
+    if header & _COMPRESSED:
+        payload = zlib.decompress(payload)
+    code = header & ~_COMPRESSED
+
+    if code == _GENERIC:
+        return messages_from_dict([json.loads(payload)])[0]
+    return messages_from_dict(
+        [{"type": _CODE_TYPES[code], "data": {"content": payload.decode("utf-8")}}]
+    )[0]
+
+
+def _encode_legacy(items: list[bytes]) -> list[bytes]:
+    """Re-encode RedisChatMessageHistory JSON items, keeping their order."""
+    return [encode_message(message) for message in messages_from_dict(
+        [json.loads(item) for item in items]
+    )]
+
+
+class HistoryWindowCache:
+    """
+    Per-worker LRU of decoded history windows.
+
+    An entry is only used while the session's length and message count in Redis
+    still match the ones it was built from, so appends made by other workers are
+    noticed. Appends made through this worker drop the entry right away.
+    """
+
+    def __init__(self, max_sessions: int = settings.CHAT_HISTORY_CACHE_SIZE):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str, max_tokens: int, version: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[:2] != (max_tokens, version):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def put(self, key: str, max_tokens: int, version: tuple, window):
+        with self._lock:
+            self._entries[key] = (max_tokens, version, window)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+_window_cache = HistoryWindowCache()
+
+
+def get_history_window_cache() -> HistoryWindowCache:
+    return _window_cache
+
+
+class _CompactHistoryLayout:
+    """
+    Redis layout shared by the sync and async compact histories.
+
+    `chat:<session>` is a list of encoded messages, newest first, trimmed to
+    `max_messages`. `chat_meta:<session>` is a hash with the number of messages
+    ever appended (`total`) and the rolling summary. Both keys expire `ttl`
+    seconds after the last write. Sessions still stored by
+    RedisChatMessageHistory under `message_store:<session>` are converted the
+    first time they are touched.
+    """
+
+    key_prefix = "chat:"
+    meta_key_prefix = "chat_meta:"
+    legacy_key_prefix = "message_store:"
+
+    def __init__(
+        self,
+        session_id: str,
+        ttl: int | None = settings.CHAT_HISTORY_TTL_SECONDS,
+        max_messages: int = settings.CHAT_HISTORY_MAX_MESSAGES,
+    ):
+        self.session_id = session_id
+        self.ttl = ttl
+        self.max_messages = max_messages
+
+    @property
+    def key(self) -> str:
+        return self.key_prefix + self.session_id
+
+    @property
+    def meta_key(self) -> str:
+        return self.meta_key_prefix + self.session_id
+
+    @property
+    def legacy_key(self) -> str:
+        return self.legacy_key_prefix + self.session_id
+
+    def _queue_append(self, pipe, encoded: list[bytes]):
+        """Queue a push of `encoded` (newest last) onto `pipe`, with trim and TTL."""
+        pipe.lpush(self.key, *encoded)
+        pipe.ltrim(self.key, 0, self.max_messages - 1)
+        pipe.hincrby(self.meta_key, "total", len(encoded))
+        if self.ttl:
+            pipe.expire(self.key, self.ttl)
+            pipe.expire(self.meta_key, self.ttl)
+
+    def _queue_legacy(self, pipe, legacy_items: list[bytes], legacy_length: int):
+        """Queue legacy messages (newest first) behind the stored, newer ones."""
+        pipe.rpush(self.key, *_encode_legacy(legacy_items))
+        pipe.ltrim(self.key, 0, self.max_messages - 1)
+        pipe.hincrby(self.meta_key, "total", legacy_length)
+        if self.ttl:
+            pipe.expire(self.key, self.ttl)
+            pipe.expire(self.meta_key, self.ttl)
+
+
+class CompactRedisChatMessageHistory(_CompactHistoryLayout, BaseChatMessageHistory):
+    """Chat history in the compact layout, on a shared sync Redis client."""
+
+    def __init__(self, session_id: str, redis_client: redis.Redis, **kwargs):
+        super().__init__(session_id, **kwargs)
+        self.redis_client = redis_client
+
+    def _migrate_legacy(self) -> int:
+        # Only the client that wins the rename converts the session
+        migrating_key = self.legacy_key + ":migrating"
+        try:
+            self.redis_client.rename(self.legacy_key, migrating_key)
+        except redis.ResponseError:
+            return 0
+        length = self.redis_client.llen(migrating_key)
+        items = self.redis_client.lrange(migrating_key, 0, self.max_messages - 1)
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            if items:
+                self._queue_legacy(pipe, items, length)
+            pipe.delete(migrating_key)
+            pipe.execute()
+        return length
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        items = self.redis_client.lrange(self.key, 0, -1)
+        if not items and self._migrate_legacy():
+            items = self.redis_client.lrange(self.key, 0, -1)
+        return [decode_message(item) for item in items[::-1]]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            self._queue_append(pipe, [encode_message(m) for m in messages])
+            results = pipe.execute()
+        if results[2] == len(messages):
+            # First write in the compact layout
+            self._migrate_legacy()
+        _window_cache.invalidate(self.key)
+
+    def clear(self) -> None:
+        self.redis_client.delete(self.key, self.meta_key, self.legacy_key)
+        _window_cache.invalidate(self.key)
+
+
+class AsyncRedisChatMessageHistory(_CompactHistoryLayout):
+    """
+    Async counterpart of CompactRedisChatMessageHistory on a shared redis.asyncio
+    client, with bounded reads of the recent window. It only has an async API,
+    so it is not a BaseChatMessageHistory; use CompactRedisChatMessageHistory
+    where one is needed.
+    """
+
+    def __init__(self, session_id: str, redis_client: aioredis.Redis, **kwargs):
+        super().__init__(session_id, **kwargs)
+        self.redis_client = redis_client
+
+    async def _amigrate_legacy(self) -> int:
+        migrating_key = self.legacy_key + ":migrating"
+        try:
+            await self.redis_client.rename(self.legacy_key, migrating_key)
+        except redis.ResponseError:
+            return 0
+        length = await self.redis_client.llen(migrating_key)
+        items = await self.redis_client.lrange(migrating_key, 0, self.max_messages - 1)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            if items:
+                self._queue_legacy(pipe, items, length)
+            pipe.delete(migrating_key)
+            await pipe.execute()
+        logger.info(f"Migrated {length} messages of session {self.session_id}")
+        return length
+
+    async def _aversion(self) -> tuple[int, int]:
+        """(stored messages, messages ever appended) of the session."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.key)
+            pipe.hget(self.meta_key, "total")
+            length, total = await pipe.execute()
+        if not length and await self._amigrate_legacy():
+            return await self._aversion()
+        return length, int(total or length)
+
+    async def aget_messages(self) -> list[BaseMessage]:
+        await self._aversion()
+        items = await self.redis_client.lrange(self.key, 0, -1)
+        return [decode_message(item) for item in items[::-1]]
+
+    async def aget_range(self, start: int, end: int) -> list[BaseMessage]:
+        """
+        Messages `start` to `end` (exclusive), counted from the first message of
+        the session, oldest first. Messages already trimmed away are skipped.
+        """
+        length, total = await self._aversion()
+        start = max(start, total - length)
+        if end <= start:
+            return []
+        items = await self.redis_client.lrange(self.key, total - end, total - 1 - start)
+        return [decode_message(item) for item in items[::-1]]
+
+    async def aget_window(self, max_tokens: int) -> tuple[list[BaseMessage], int]:
+        """
+        The newest messages that fit in `max_tokens`, oldest first, and the number
+        of messages of the session before them. Only the window is read and
+        decoded, so the cost is bounded by the budget rather than by the session
+        length.
+        """
+        version = await self._aversion()
+        length, total = version
+
+        cached = _window_cache.get(self.key, max_tokens, version)
+        if cached is not None:
+            return cached
+
+        window: list[BaseMessage] = []  # Newest first
+        used = 0
+        start = 0
+        full = False
+        while not full and start < length:
+            items = await self.redis_client.lrange(
+                self.key, start, start + WINDOW_PAGE_SIZE - 1
+            )
+            for item in items:
+                message = decode_message(item)
+                used += estimate_message_tokens(message)
+                if used > max_tokens:
+                    full = True
+                    break
+                window.append(message)
+            if len(items) < WINDOW_PAGE_SIZE:
+                break
+            start += WINDOW_PAGE_SIZE
+
+        # Start on a question, an answer without it only confuses the model
+        while window and not isinstance(window[-1], HumanMessage):
+            window.pop()
+
+        result = (window[::-1], total - len(window))
+        _window_cache.put(self.key, max_tokens, version, result)
+        return result
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            self._queue_append(pipe, [encode_message(m) for m in messages])
+            results = await pipe.execute()
+        if results[2] == len(messages):
+            await self._amigrate_legacy()
+        _window_cache.invalidate(self.key)
+
+    async def aget_summary(self) -> tuple[str, int]:
+        """Rolling summary of the oldest messages, and how many messages it covers."""
+        summary, covered = await self.redis_client.hmget(
+            self.meta_key, ["summary", "covered"]
+        )
+        if not summary:
+            return "", 0
+        return summary.decode("utf-8"), int(covered)
+
+    async def aset_summary(self, summary: str, covered: int) -> None:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.meta_key, mapping={"summary": summary, "covered": covered})
+            if self.ttl:
+                pipe.expire(self.meta_key, self.ttl)
+            await pipe.execute()
+
+    async def aclear(self) -> None:
+        await self.redis_client.delete(self.key, self.meta_key, self.legacy_key)
+        _window_cache.invalidate(self.key)
+
+
+def get_async_session_history(
+    session_id: str, redis_client: aioredis.Redis
+) -> AsyncRedisChatMessageHistory:
+    """Return async memory object for the user."""
+    return AsyncRedisChatMessageHistory(session_id=session_id, redis_client=redis_client)
+
+
+async def amigrate_legacy_sessions(redis_client: aioredis.Redis, scan_count: int = 500) -> int:
+    """Convert every RedisChatMessageHistory session to the compact layout."""
+    sessions = 0
+    prefix = _CompactHistoryLayout.legacy_key_prefix
+    async for key in redis_client.scan_iter(match=f"{prefix}*", count=scan_count):
+        key = key.decode("utf-8")
+        if key.endswith(":migrating"):
+            continue
+        history = get_async_session_history(key[len(prefix):], redis_client)
+        if await history._amigrate_legacy():
+            sessions += 1
+    return sessions
+
+
+if __name__ == "__main__":
+    # python -m app.core.history: migrate existing sessions ahead of time
+    async def _main():
+        redis_client = aioredis.Redis.from_url(settings.REDIS_URL)
+        try:
+            sessions = await amigrate_legacy_sessions(redis_client)
+            logger.info(f"Migrated {sessions} chat sessions to the compact layout")
+        finally:
+            await redis_client.aclose()
+
+    asyncio.run(_main())
@@ -12,12 +12,22 @@ from app.core.config import settings
 logger = get_logger(__name__)
 
 
+def _rate_limit_kwargs(provider: LLMProvider) -> dict:
+    """Chat model arguments sharing the provider's rate limiter, see `ProviderRateLimiter`."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return {}
+    from app.core.rate_limiter import RateLimitCallbackHandler, get_rate_limiter
+
+    limiter = get_rate_limiter(LLMProvider(provider).value)
+    return {"rate_limiter": limiter, "callbacks": [RateLimitCallbackHandler(limiter)]}
+
+
 def get_llm(provider: LLMProvider, model_name: str = "gemini-2.5-flash"):
     try:
         if provider == LLMProvider.GOOGLE:
-            return ChatGoogleGenerativeAI(model=model_name)
+            return ChatGoogleGenerativeAI(model=model_name, **_rate_limit_kwargs(provider))
         elif provider == LLMProvider.COHERE:
-            return ChatCohere(model=model_name)
+            return ChatCohere(model=model_name, **_rate_limit_kwargs(provider))
         elif provider == LLMProvider.BEDROCK:
             model_kwargs = {
                 "max_tokens": 2048,
@@ -32,6 +42,7 @@ def get_llm(provider: LLMProvider, model_name: str = "gemini-2.5-flash"):
                 client=bedrock_runtime,
                 model_id=model_name,
                 model_kwargs=model_kwargs,
+                **_rate_limit_kwargs(provider),
             )
         else:
             raise LLMProviderError(f"LLM provider {provider} not supported")
@@ -39,12 +50,42 @@ def get_llm(provider: LLMProvider, model_name: str = "gemini-2.5-flash"):
         logger.exception(f"Error initializing LLM provider: {provider}")
         raise LLMProviderError(f"Failed to initialize LLM provider {provider}") from e
 
-def get_embedding_function(embedding_provider: EmbeddingProvider, model_name: str):
+# Bedrock models that accept an output dimension, and the sizes they accept
+BEDROCK_EMBEDDING_DIMENSIONS = {
+    "amazon.titan-embed-text-v2": (256, 512, 1024),
+}
+
+
+def _bedrock_dimensions(model_name: str, dimensions: int | None) -> int | None:
+    for prefix, supported in BEDROCK_EMBEDDING_DIMENSIONS.items():
+        if model_name.startswith(prefix) and dimensions in supported:
+            return dimensions
+    return None
+
+
+def get_embedding_function(
+    embedding_provider: EmbeddingProvider,
+    model_name: str,
+    cache: bool = True,
+    dimensions: int | None = None,
+):
+    """
+    Embedding function for a provider and model.
+
+    With `dimensions` the vectors are reduced to that size, by the provider
+    where it supports it and by truncation and renormalization otherwise.
+    With RATE_LIMIT_ENABLED provider calls share the provider's rate limiter
+    with its chat models, see `ProviderRateLimiter`. With
+    EMBEDDING_BATCH_ENABLED concurrent async query embeddings are sent to the
+    provider in batches, see `QueryEmbeddingBatcher`. Concurrent async
+    embeddings of the same query share one call, see `CoalescedQueryEmbeddings`.
+    """
     if embedding_provider == EmbeddingProvider.GOOGLE:
         from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
         embedding_function = GoogleGenerativeAIEmbeddings(
             model=model_name,
+            output_dimensionality=dimensions,
         )
     elif embedding_provider == EmbeddingProvider.COHERE:
         from langchain_cohere import CohereEmbeddings
@@ -61,9 +102,47 @@ def get_embedding_function(embedding_provider: EmbeddingProvider, model_name: st
 
         embedding_function = BedrockEmbeddings(
             client=bedrock_runtime,
-            model_id=model_name
+            model_id=model_name,
+            dimensions=_bedrock_dimensions(model_name, dimensions),
         )
     else:
         logger.error(f"Embedding provider {embedding_provider} not supported")
         raise LLMProviderError(f"Unsupported embedding provider: {embedding_provider}")
-    return embedding_function
\ No newline at end of file
+
+    namespace = f"{EmbeddingProvider(embedding_provider).value}:{model_name}"
+    if dimensions is not None:
+        namespace = f"{namespace}:{dimensions}"
+
+    if settings.RATE_LIMIT_ENABLED:
+        from app.core.rate_limiter import RateLimitedEmbeddings, get_rate_limiter
+
+        embedding_function = RateLimitedEmbeddings(
+            embedding_function,
+            get_rate_limiter(EmbeddingProvider(embedding_provider).value),
+            # Bedrock embeds every text in its own request
+            per_text=embedding_provider == EmbeddingProvider.BEDROCK,
+        )
+
+    if settings.EMBEDDING_BATCH_ENABLED:
+        from app.core.embedding_batcher import batched_query_embeddings
+
+        embedding_function = batched_query_embeddings(embedding_function, namespace)
+
+    from app.core.embedding_batcher import CoalescedQueryEmbeddings
+
+    embedding_function = CoalescedQueryEmbeddings(embedding_function, namespace)
+
+    if dimensions is not None:
+        from app.core.reduced_embeddings import ReducedEmbeddings
+
+        embedding_function = ReducedEmbeddings(embedding_function, dimensions)
+
+    if cache and settings.EMBEDDING_CACHE_ENABLED:
+        from app.core.embedding_cache import CachedEmbeddings, get_embedding_cache_store
+
+        embedding_function = CachedEmbeddings(
+            underlying=embedding_function,
+            namespace=namespace,
+            store=get_embedding_cache_store(),
+        )
+    return embedding_function
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_stats_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_stats_provider(name: str, provider: Callable[[], dict]):
+    """Register a callable returning a snapshot of counters under `name`."""
+    _stats_providers[name] = provider
+
+
+def unregister_stats_provider(name: str):
+    _stats_providers.pop(name, None)
+
+
+def collect_stats() -> dict[str, dict]:
+    """Collect a snapshot from every registered stats provider."""
+    stats = {}
+    for name, provider in list(_stats_providers.items()):
+        try:
+            stats[name] = provider()
+        except Exception as e:
+            logger.error(f"Failed to collect stats for '{name}': {e}")
+            stats[name] = {}
+    return stats
+
+
+class StageTimings:
+    """Durations of request stages (retrieval, rerank, ...), with recent percentiles."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.window = window
+        self._stages: dict[str, dict] = {}
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(
+                stage, {"count": 0, "total": 0.0, "recent": deque(maxlen=self.window)}
+            )
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["recent"].append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for stage, entry in self._stages.items():
+                recent = sorted(entry["recent"])
+                stats[stage] = {
+                    "count": entry["count"],
+                    "mean_ms": entry["total"] / entry["count"] * 1000,
+                    "p50_ms": recent[len(recent) // 2] * 1000,
+                    "p95_ms": recent[int(len(recent) * 0.95)] * 1000,
+                }
+            return stats
+
+
+_stage_timings = StageTimings()
+
+
+def get_stage_timings() -> StageTimings:
+    return _stage_timings
+
+
+@contextmanager
+def timed(stage: str):
+    """Record how long the block takes under `stage` in the stage timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_timings.record(stage, time.perf_counter() - started)
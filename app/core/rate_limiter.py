@@ -0,0 +1,309 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, TypeVar
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from app.schema.llm import RateLimitLane
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.metrics import StageTimings
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Waiting calls re-check at least this often, the rate changes while they wait
+MAX_POLL_SECONDS = 1.0
+# Backoff never slows a provider below this share of its configured rate
+MIN_RATE_SHARE = 0.05
+
+_lane: ContextVar[RateLimitLane] = ContextVar(
+    "rate_limit_lane", default=RateLimitLane.INTERACTIVE
+)
+
+
+@contextmanager
+def rate_limit_lane(lane: RateLimitLane):
+    """Run provider calls made in the block, and tasks started in it, in `lane`."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether `error`, or an error it was raised from, is a provider rate limit or quota error."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        for attribute in ("status_code", "code", "status"):
+            if getattr(error, attribute, None) in (429, "429", "RESOURCE_EXHAUSTED"):
+                return True
+        # botocore ClientError
+        code = getattr(error, "response", None)
+        if isinstance(code, dict):
+            code = code.get("Error", {}).get("Code")
+            if code in ("ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"):
+                return True
+        if type(error).__name__ in ("TooManyRequestsError", "ThrottlingException", "ResourceExhausted"):
+            return True
+        message = str(error)
+        if "429" in message or "RESOURCE_EXHAUSTED" in message or "Too Many Requests" in message:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """
+    Token bucket shared by every embedding and LLM call to one provider in the
+    worker.
+
+    Tokens are added at `requests_per_second`, up to `burst`. Waiting calls are
+    served by lane, interactive (chat) before bulk (ingestion, summaries), in
+    arrival order within a lane. A call may cost several requests, leaving the
+    bucket in debt for the following calls.
+
+    A rate limit error from the provider (see `throttle`) pauses the bucket,
+    for `backoff_seconds` doubling on repeated errors up to
+    `max_backoff_seconds`, and halves the rate, which then climbs back to
+    `requests_per_second` over `recovery_seconds`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        burst: int = settings.RATE_LIMIT_BURST,
+        backoff_seconds: float = settings.RATE_LIMIT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = settings.RATE_LIMIT_MAX_BACKOFF_SECONDS,
+        recovery_seconds: float = settings.RATE_LIMIT_RECOVERY_SECONDS,
+    ):
+        self.name = name
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self._rate = requests_per_second
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = backoff_seconds
+        self._last_throttle = float("-inf")
+        self._tickets = itertools.count()
+        self._queues: dict[RateLimitLane, deque[int]] = {lane: deque() for lane in RateLimitLane}
+        self._acquired = {lane.value: 0 for lane in RateLimitLane}
+        self._throttles = 0
+        self._waits = StageTimings()
+
+    def _refill(self, now: float):
+        # Nothing accrues while paused
+        start = max(self._updated, self._paused_until)
+        self._updated = now
+        if now <= start:
+            return
+        elapsed = now - start
+        self._rate = min(
+            self.requests_per_second,
+            self._rate + self.requests_per_second * elapsed / self.recovery_seconds,
+        )
+        self._tokens = min(float(self.burst), self._tokens + self._rate * elapsed)
+
+    def _is_next(self, lane: RateLimitLane, ticket: int) -> bool:
+        queue = self._queues[lane]
+        if not queue or queue[0] != ticket:
+            return False
+        return lane == RateLimitLane.INTERACTIVE or not self._queues[RateLimitLane.INTERACTIVE]
+
+    def _attempt(self, lane: RateLimitLane, ticket: int, cost: float) -> float:
+        """0 once a token was taken for `ticket`, else how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._is_next(lane, ticket) and self._tokens >= 1:
+                self._queues[lane].popleft()
+                self._tokens -= cost
+                self._acquired[lane.value] += 1
+                return 0.0
+            wait = max(self._paused_until - now, (1 - self._tokens) / self._rate, 1 / self._rate)
+            return min(wait, MAX_POLL_SECONDS)
+
+    def _enqueue(self, lane: RateLimitLane) -> int:
+        with self._lock:
+            ticket = next(self._tickets)
+            self._queues[lane].append(ticket)
+            return ticket
+
+    def _leave(self, lane: RateLimitLane, ticket: int):
+        with self._lock:
+            if ticket in self._queues[lane]:
+                self._queues[lane].remove(ticket)
+
+    def acquire(self, *, blocking: bool = True, cost: float = 1) -> bool:
+        lane = _lane.get()
+        started = time.monotonic()
+        ticket = self._enqueue(lane)
+        try:
+            while delay := self._attempt(lane, ticket, cost):
+                if not blocking:
+                    return False
+                time.sleep(delay)
+        finally:
+            self._leave(lane, ticket)
+        self._waits.record(lane.value, time.monotonic() - started)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True, cost: float = 1) -> bool:
+        lane = _lane.get()
+        started = time.monotonic()
+        ticket = self._enqueue(lane)
+        try:
+            while delay := self._attempt(lane, ticket, cost):
+                if not blocking:
+                    return False
+                await asyncio.sleep(delay)
+        finally:
+            self._leave(lane, ticket)
+        self._waits.record(lane.value, time.monotonic() - started)
+        return True
+
+    def throttle(self):
+        """Back off after the provider rejected a call for rate limits or quota."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                # Calls sent before the pause failing too, already accounted for
+                return
+            self._refill(now)
+            if now - self._last_throttle > self.recovery_seconds:
+                self._backoff = self.backoff_seconds
+            else:
+                self._backoff = min(self._backoff * 2, self.max_backoff_seconds)
+            self._paused_until = now + self._backoff
+            self._rate = max(self._rate / 2, self.requests_per_second * MIN_RATE_SHARE)
+            self._tokens = min(self._tokens, 0.0)
+            self._last_throttle = now
+            self._throttles += 1
+            backoff, rate = self._backoff, self._rate
+        logger.warning(
+            f"{self.name} is rate limiting, pausing for {backoff:.1f}s "
+            f"and slowing down to {rate:.2f} requests/s"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "requests_per_second": self.requests_per_second,
+                "current_rate": self._rate,
+                "tokens": self._tokens,
+                "paused_seconds": max(0.0, self._paused_until - now),
+                "throttles": self._throttles,
+                "waiting": {lane.value: len(queue) for lane, queue in self._queues.items()},
+                "acquired": dict(self._acquired),
+                "wait": self._waits.stats(),
+            }
+
+
+class RateLimitCallbackHandler(BaseCallbackHandler):
+    """Reports chat model rate limit errors to the provider's limiter."""
+
+    run_inline = True
+
+    def __init__(self, limiter: ProviderRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any):
+        if is_rate_limit_error(error):
+            self.limiter.throttle()
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embedding function whose calls wait for the provider's limiter, and are
+    retried up to `max_retries` times after a rate limit error.
+    `per_text` counts one request per text, for providers without a batch
+    endpoint.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        limiter: ProviderRateLimiter,
+        per_text: bool = False,
+        max_retries: int = settings.RATE_LIMIT_MAX_RETRIES,
+    ):
+        self.underlying = underlying
+        self.limiter = limiter
+        self.per_text = per_text
+        self.max_retries = max_retries
+
+    def __getattr__(self, name):
+        # Expose provider specific attributes (model, client, ...) of the wrapped object
+        underlying = self.__dict__.get("underlying")
+        if underlying is None:
+            raise AttributeError(name)
+        return getattr(underlying, name)
+
+    def _cost(self, texts: list[str]) -> int:
+        return max(1, len(texts)) if self.per_text else 1
+
+    def call(self, embed: Callable[[list[str]], T], texts: list[str]) -> T:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(cost=self._cost(texts))
+            try:
+                return embed(texts)
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                self.limiter.throttle()
+
+    async def acall(self, embed: Callable[[list[str]], Awaitable[T]], texts: list[str]) -> T:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire(cost=self._cost(texts))
+            try:
+                return await embed(texts)
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                self.limiter.throttle()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.call(self.underlying.embed_documents, texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.call(lambda texts: self.underlying.embed_query(texts[0]), [text])
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.acall(self.underlying.aembed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.acall(lambda texts: self.underlying.aembed_query(texts[0]), [text])
+
+
+_limiters: dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """The worker's limiter for `provider` (`google`, `cohere`, `bedrock`)."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate = getattr(settings, f"RATE_LIMIT_{provider.upper()}_REQUESTS_PER_SECOND")
+            _limiters[provider] = ProviderRateLimiter(provider, rate)
+        return _limiters[provider]
+
+
+def rate_limiter_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
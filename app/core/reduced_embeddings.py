@@ -0,0 +1,58 @@
+import math
+from langchain_core.embeddings import Embeddings
+
+# Collection metadata key holding the reduced embedding size
+EMBEDDING_DIMENSIONS_KEY = "embedding_dimensions"
+
+
+def truncate(vector: list[float], dimensions: int) -> list[float]:
+    """First `dimensions` values of `vector`, renormalized to unit length."""
+    vector = vector[:dimensions]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class ReducedEmbeddings(Embeddings):
+    """
+    Matryoshka-style reduced embeddings of a wrapped embedding function.
+
+    Models trained that way (gemini-embedding-001, Titan v2, ...) keep most of
+    their quality in the leading dimensions. Vectors are cut to `dimensions`
+    and renormalized, which is a no-op for vectors the provider already
+    returned at that size.
+    """
+
+    def __init__(self, underlying: Embeddings, dimensions: int):
+        self.underlying = underlying
+        self.dimensions = dimensions
+
+    def __getattr__(self, name):
+        # Expose provider specific attributes (model, client, ...) of the wrapped object
+        underlying = self.__dict__.get("underlying")
+        if underlying is None:
+            raise AttributeError(name)
+        return getattr(underlying, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [
+            truncate(vector, self.dimensions)
+            for vector in self.underlying.embed_documents(texts)
+        ]
+
+    def embed_query(self, text: str) -> list[float]:
+        return truncate(self.underlying.embed_query(text), self.dimensions)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [
+            truncate(vector, self.dimensions)
+            for vector in await self.underlying.aembed_documents(texts)
+        ]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return truncate(await self.underlying.aembed_query(text), self.dimensions)
+
+
+def collection_dimensions(collection_info) -> int | None:
+    """Reduced embedding size of a collection, from `get_collection`, None for full size."""
+    metadata = collection_info.config.metadata or {}
+    return metadata.get(EMBEDDING_DIMENSIONS_KEY)
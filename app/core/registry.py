@@ -0,0 +1,231 @@
+import inspect
+import threading
+import time
+from typing import Any, Callable
+import redis.asyncio as aioredis
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.vectorstores import VectorStore
+
+from app.exception import VectorDBError
+from app.schema.db import VectorDB
+from app.schema.llm import EmbeddingProvider, LLMProvider
+from app.core.config import settings
+from app.core.db import get_vectorstore, resolve_collection
+from app.core.llm import get_embedding_function, get_llm
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClientRegistry:
+    """
+    Process-wide pool of reusable Qdrant, Redis, embedding and LLM clients.
+
+    One registry is created per worker in the application lifespan. Clients are
+    built lazily on first use, keyed by (kind, provider, model, collection), and
+    shared by every request handled by the worker.
+
+    Vector stores are also keyed by the collection their name resolves to, so
+    when an alias is moved (e.g. by a reindex) the store is rebuilt for the new
+    collection within `alias_cache_seconds`.
+    """
+
+    def __init__(self, alias_cache_seconds: float = settings.COLLECTION_ALIAS_CACHE_SECONDS):
+        self._lock = threading.RLock()
+        self._clients: dict[tuple, Any] = {}
+        self._key_locks: dict[tuple, threading.Lock] = {}
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self.alias_cache_seconds = alias_cache_seconds
+        self._aliases: dict[tuple[str, str], tuple[str, float]] = {}
+
+    def _get_or_create(self, key: tuple, factory: Callable[[], Any]):
+        kind = key[0]
+        with self._lock:
+            if key in self._clients:
+                self._hits[kind] = self._hits.get(kind, 0) + 1
+                return self._clients[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Built outside the registry lock, so a slow client only holds back
+        # requests for the same key
+        with key_lock:
+            with self._lock:
+                if key in self._clients:
+                    self._hits[kind] = self._hits.get(kind, 0) + 1
+                    return self._clients[key]
+                self._misses[kind] = self._misses.get(kind, 0) + 1
+
+            client = factory()
+            with self._lock:
+                self._clients[key] = client
+                self._key_locks.pop(key, None)
+            logger.info(f"Created pooled {kind} client for {key[1:]}")
+            return client
+
+    def get_qdrant_client(self, url: str) -> QdrantClient:
+        return self._get_or_create(("qdrant", url), lambda: QdrantClient(url=url))
+
+    def get_async_qdrant_client(self, url: str) -> AsyncQdrantClient:
+        return self._get_or_create(
+            ("async_qdrant", url), lambda: AsyncQdrantClient(url=url)
+        )
+
+    def get_async_redis(self, url: str) -> aioredis.Redis:
+        return self._get_or_create(
+            ("async_redis", url), lambda: aioredis.Redis.from_url(url)
+        )
+
+    def get_embedding_function(
+        self,
+        embedding_provider: EmbeddingProvider,
+        model_name: str,
+        dimensions: int | None = None,
+    ) -> Embeddings:
+        return self._get_or_create(
+            ("embedding", embedding_provider, model_name, dimensions),
+            lambda: get_embedding_function(
+                embedding_provider=embedding_provider,
+                model_name=model_name,
+                dimensions=dimensions,
+            ),
+        )
+
+    def get_llm(self, provider: LLMProvider, model_name: str) -> BaseChatModel:
+        return self._get_or_create(
+            ("llm", provider, model_name),
+            lambda: get_llm(provider, model_name=model_name),
+        )
+
+    def get_vectorstore(
+        self,
+        vector_db: VectorDB,
+        embedding_provider: EmbeddingProvider,
+        collection_name: str,
+        model_name: str,
+        persist_url: str,
+        refresh_alias: bool = False,
+    ) -> VectorStore:
+        """
+        Pooled vector store of `collection_name`. With `refresh_alias` the
+        collection an alias points to is looked up again instead of cached, e.g.
+        right after waiting for a reindex.
+        """
+        client = self.get_qdrant_client(persist_url)
+        target = self._resolve_collection(
+            client, persist_url, collection_name, refresh=refresh_alias
+        )
+
+        def create():
+            # Stores built for the collection the alias pointed to before
+            self._evict_vectorstores(collection_name)
+            # Built with the collection's own embedding model and size, see
+            # create_collection_qdrant
+            return get_vectorstore(
+                vector_db=vector_db,
+                embedding_provider=embedding_provider,
+                collection_name=collection_name,
+                model_name=model_name,
+                persist_url=persist_url,
+                client=client,
+                embedding_factory=self.get_embedding_function,
+            )
+
+        return self._get_or_create(
+            (
+                "vectorstore",
+                vector_db,
+                embedding_provider,
+                model_name,
+                collection_name,
+                target,
+            ),
+            create,
+        )
+
+    def resolve_collection(self, collection_name: str, persist_url: str) -> str:
+        """Collection `collection_name` points to, cached for `alias_cache_seconds`."""
+        return self._resolve_collection(
+            self.get_qdrant_client(persist_url), persist_url, collection_name
+        )
+
+    def _resolve_collection(
+        self, client: QdrantClient, persist_url: str, collection_name: str, refresh: bool = False
+    ) -> str:
+        key = (persist_url, collection_name)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._aliases.get(key)
+            if cached is not None and cached[1] > now and not refresh:
+                return cached[0]
+        try:
+            target = resolve_collection(client, collection_name)
+        except Exception as e:
+            logger.exception(f"Error occurred while resolving collection {collection_name}")
+            raise VectorDBError(
+                f"An error occurred while resolving collection {collection_name}."
+            ) from e
+        with self._lock:
+            self._aliases[key] = (target, now + self.alias_cache_seconds)
+        return target
+
+    def _evict_vectorstores(self, collection_name: str):
+        with self._lock:
+            stale = [
+                key
+                for key in self._clients
+                if key[0] == "vectorstore" and collection_name in key[-2:]
+            ]
+            for key in stale:
+                del self._clients[key]
+
+    def evict_collection(self, collection_name: str):
+        """Drop pooled vector stores bound to `collection_name`, an alias or a collection."""
+        with self._lock:
+            self._evict_vectorstores(collection_name)
+            for key in [key for key in self._aliases if key[1] == collection_name]:
+                del self._aliases[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds = {key[0] for key in self._clients} | set(self._hits) | set(
+                self._misses
+            )
+            by_kind = {
+                kind: {
+                    "size": sum(1 for key in self._clients if key[0] == kind),
+                    "hits": self._hits.get(kind, 0),
+                    "misses": self._misses.get(kind, 0),
+                }
+                for kind in sorted(kinds)
+            }
+            return {
+                "size": len(self._clients),
+                "hits": sum(self._hits.values()),
+                "misses": sum(self._misses.values()),
+                "by_kind": by_kind,
+            }
+
+    async def aclose(self):
+        """Close every pooled client. Vector stores share the pooled clients."""
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+
+        for key, client in clients:
+            if key[0] == "vectorstore":
+                continue
+            # Embedding and LLM wrappers hold their transport client (e.g. boto3)
+            for target in (client, getattr(client, "client", None)):
+                close = getattr(target, "aclose", None) or getattr(target, "close", None)
+                if not callable(close):
+                    continue
+                try:
+                    result = close()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.warning(f"Failed to close pooled {key[0]} client: {e}")
+        logger.info(f"Closed {len(clients)} pooled clients")
@@ -0,0 +1,184 @@
+import asyncio
+import math
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Callable
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.metrics import timed
+from app.core.tokens import content_tokens
+
+logger = get_logger(__name__)
+
+
+class Reranker(ABC):
+    """
+    Scores retrieval candidates against the query, all candidates in one call.
+
+    Candidates come with their first stage (similarity) score, or None when the
+    search did not return one. Higher scores rank first.
+    """
+
+    @abstractmethod
+    def score(
+        self, query: str, candidates: list[tuple[Document, float | None]]
+    ) -> list[float]:
+        """Scores of `candidates`, in the same order."""
+
+    async def ascore(
+        self, query: str, candidates: list[tuple[Document, float | None]]
+    ) -> list[float]:
+        return await asyncio.to_thread(self.score, query, candidates)
+
+
+class BM25Reranker(Reranker):
+    """
+    BM25 over the candidate set, blended with the first stage score.
+
+    Term statistics come from the candidates themselves, so there is nothing to
+    build or store. BM25 scores are scaled to [0, 1] by the best candidate and
+    blended with the cosine similarity using `lexical_weight`. Without first
+    stage scores the rank is used instead.
+    """
+
+    def __init__(
+        self,
+        lexical_weight: float = settings.RERANK_LEXICAL_WEIGHT,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.lexical_weight = lexical_weight
+        self.k1 = k1
+        self.b = b
+
+    def _bm25(self, query: str, documents: list[Document]) -> list[float]:
+        query_terms = set(content_tokens(query))
+        term_counts = [Counter(content_tokens(doc.page_content)) for doc in documents]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        avg_length = sum(lengths) / len(lengths) or 1.0
+        n = len(documents)
+
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for counts in term_counts if term in counts)
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for counts, length in zip(term_counts, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores.append(
+                sum(
+                    idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                    for term in query_terms
+                    if term in counts
+                )
+            )
+        return scores
+
+    def score(
+        self, query: str, candidates: list[tuple[Document, float | None]]
+    ) -> list[float]:
+        if not candidates:
+            return []
+        lexical = self._bm25(query, [doc for doc, _ in candidates])
+        top = max(lexical)
+        lexical = [score / top if top > 0 else 0.0 for score in lexical]
+
+        first_stage = [score for _, score in candidates]
+        if any(score is None for score in first_stage):
+            first_stage = [1 - i / len(candidates) for i in range(len(candidates))]
+        return [
+            self.lexical_weight * lex + (1 - self.lexical_weight) * min(max(dense, 0.0), 1.0)
+            for lex, dense in zip(lexical, first_stage)
+        ]
+
+    async def ascore(
+        self, query: str, candidates: list[tuple[Document, float | None]]
+    ) -> list[float]:
+        # A few dozen short texts, cheaper inline than a thread hop
+        return self.score(query, candidates)
+
+
+class CohereReranker(Reranker):
+    """Cohere rerank API, a cross-encoder served by Cohere."""
+
+    def __init__(self, model: str = settings.RERANK_MODEL):
+        from langchain_cohere import CohereRerank
+
+        self.client = CohereRerank(model=model, cohere_api_key=settings.COHERE_API_KEY)
+
+    def score(
+        self, query: str, candidates: list[tuple[Document, float | None]]
+    ) -> list[float]:
+        scores = [0.0] * len(candidates)
+        results = self.client.rerank([doc.page_content for doc, _ in candidates], query)
+        for result in results:
+            scores[result["index"]] = result["relevance_score"]
+        return scores
+
+
+_reranker_factories: dict[str, Callable[[], Reranker]] = {
+    "bm25": BM25Reranker,
+    "cohere": CohereReranker,
+}
+_rerankers: dict[str, Reranker] = {}
+
+
+def register_reranker(name: str, factory: Callable[[], Reranker]):
+    """Make a reranker selectable with RERANKER=`name`, e.g. a local cross-encoder."""
+    _reranker_factories[name] = factory
+    _rerankers.pop(name, None)
+
+
+def get_reranker(name: str = settings.RERANKER) -> Reranker | None:
+    """The reranker registered as `name`, None when reranking is off."""
+    if name == "none":
+        return None
+    if name not in _rerankers:
+        if name not in _reranker_factories:
+            raise ValueError(f"Unknown reranker: {name}")
+        _rerankers[name] = _reranker_factories[name]()
+    return _rerankers[name]
+
+
+def candidate_count() -> int:
+    """How many results to fetch from the vector store for the reranker."""
+    if get_reranker() is None:
+        return settings.VECTOR_SEARCH_TOP_K
+    return max(settings.RERANK_CANDIDATES, settings.VECTOR_SEARCH_TOP_K)
+
+
+def _ranked(
+    candidates: list[tuple[Document, float | None]], scores: list[float], top_n: int
+) -> list[tuple[Document, float]]:
+    ranked = sorted(
+        zip((doc for doc, _ in candidates), scores), key=lambda pair: pair[1], reverse=True
+    )
+    return ranked[:top_n]
+
+
+def rerank(
+    query: str,
+    candidates: list[tuple[Document, float | None]],
+    top_n: int = settings.VECTOR_SEARCH_TOP_K,
+) -> list[tuple[Document, float | None]]:
+    """The `top_n` best candidates by the configured reranker, with their scores."""
+    reranker = get_reranker()
+    if reranker is None or not candidates:
+        return candidates[:top_n]
+    with timed("rerank"):
+        return _ranked(candidates, reranker.score(query, candidates), top_n)
+
+
+async def arerank(
+    query: str,
+    candidates: list[tuple[Document, float | None]],
+    top_n: int = settings.VECTOR_SEARCH_TOP_K,
+) -> list[tuple[Document, float | None]]:
+    reranker = get_reranker()
+    if reranker is None or not candidates:
+        return candidates[:top_n]
+    with timed("rerank"):
+        return _ranked(candidates, await reranker.ascore(query, candidates), top_n)
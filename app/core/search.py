@@ -0,0 +1,222 @@
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore, RetrievalMode
+from qdrant_client import AsyncQdrantClient, models
+
+from app.core.config import settings
+from app.core.metrics import timed
+from app.core.singleflight import get_single_flight, normalize_query
+from app.schema.query import SearchFilter
+
+
+def _document_from_point(point, vectorstore: QdrantVectorStore) -> Document:
+    # Same shape as the documents returned by QdrantVectorStore
+    payload = point.payload or {}
+    metadata = payload.get(vectorstore.metadata_payload_key) or {}
+    metadata["_id"] = point.id
+    metadata["_collection_name"] = vectorstore.collection_name
+    return Document(
+        page_content=payload.get(vectorstore.content_payload_key, ""),
+        metadata=metadata,
+    )
+
+
+def build_filter(
+    filters: SearchFilter | None, metadata_payload_key: str = "metadata"
+) -> models.Filter | None:
+    """Qdrant filter for `filters`, on the payload fields indexed at collection creation."""
+    if filters is None:
+        return None
+
+    def key(field: str) -> str:
+        return f"{metadata_payload_key}.{field}"
+
+    conditions = []
+    if filters.sources:
+        conditions.append(
+            models.FieldCondition(key=key("source"), match=models.MatchAny(any=filters.sources))
+        )
+    if filters.source_type is not None:
+        conditions.append(
+            models.FieldCondition(
+                key=key("source_type"), match=models.MatchValue(value=filters.source_type.value)
+            )
+        )
+    if filters.page_from is not None or filters.page_to is not None:
+        conditions.append(
+            models.FieldCondition(
+                key=key("page"), range=models.Range(gte=filters.page_from, lte=filters.page_to)
+            )
+        )
+    if filters.ingested_after is not None or filters.ingested_before is not None:
+        conditions.append(
+            models.FieldCondition(
+                key=key("ingested_at"),
+                range=models.DatetimeRange(
+                    gte=filters.ingested_after, lte=filters.ingested_before
+                ),
+            )
+        )
+    return models.Filter(must=conditions) if conditions else None
+
+
+def search_params(
+    hnsw_ef: int = settings.VECTOR_SEARCH_HNSW_EF,
+    rescore: bool = settings.VECTOR_SEARCH_QUANTIZATION_RESCORE,
+    oversampling: float = settings.VECTOR_SEARCH_QUANTIZATION_OVERSAMPLING,
+) -> models.SearchParams:
+    """
+    HNSW beam width and quantization rescoring for dense searches.
+
+    Quantized collections are searched on the compressed vectors for
+    `oversampling` times the limit, then rescored with the original vectors.
+    Collections without quantization ignore the quantization part.
+    """
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef,
+        quantization=models.QuantizationSearchParams(
+            rescore=rescore, oversampling=oversampling
+        ),
+    )
+
+
+def retriever_search_kwargs(
+    vectorstore: QdrantVectorStore,
+    k: int = settings.VECTOR_SEARCH_TOP_K,
+    search_filter: models.Filter | None = None,
+) -> dict:
+    """`as_retriever` search kwargs for `vectorstore`."""
+    search_kwargs = {"k": k, "search_params": search_params(), "filter": search_filter}
+    # Hybrid results carry fusion scores, the similarity threshold does not apply
+    if getattr(vectorstore, "retrieval_mode", None) != RetrievalMode.HYBRID:
+        search_kwargs["score_threshold"] = settings.VECTOR_SEARCH_SIMILARITY_THRESHOLD
+    return search_kwargs
+
+
+async def asimilarity_search(
+    vectorstore: QdrantVectorStore,
+    async_client: AsyncQdrantClient,
+    query: str,
+    k: int = settings.VECTOR_SEARCH_TOP_K,
+    score_threshold: float = settings.VECTOR_SEARCH_SIMILARITY_THRESHOLD,
+    search_filter: models.Filter | None = None,
+) -> list[tuple[Document, float]]:
+    """
+    Top-k documents for `query` with their similarity scores, fully async.
+
+    `search_filter` (see `build_filter`) is applied by Qdrant during the search.
+    Concurrent searches of the same collection, query (ignoring case and
+    whitespace) and parameters share one embedding call and Qdrant request.
+    """
+    key = (
+        vectorstore.collection_name,
+        normalize_query(query),
+        k,
+        score_threshold,
+        search_filter.model_dump_json() if search_filter is not None else None,
+    )
+    with timed("retrieval"):
+        return await get_single_flight("retrieval").do(
+            key,
+            lambda: _asearch(
+                vectorstore, async_client, query, k, score_threshold, search_filter
+            ),
+        )
+
+
+async def _asearch(
+    vectorstore: QdrantVectorStore,
+    async_client: AsyncQdrantClient,
+    query: str,
+    k: int,
+    score_threshold: float,
+    search_filter: models.Filter | None,
+) -> list[tuple[Document, float]]:
+    query_vector = await vectorstore.embeddings.aembed_query(query)
+
+    if vectorstore.retrieval_mode == RetrievalMode.HYBRID:
+        return await _ahybrid_search(
+            vectorstore, async_client, query, query_vector, k, score_threshold, search_filter
+        )
+
+    response = await async_client.query_points(
+        collection_name=vectorstore.collection_name,
+        query=query_vector,
+        using=vectorstore.vector_name or None,
+        limit=k,
+        score_threshold=score_threshold,
+        query_filter=search_filter,
+        search_params=search_params(),
+        with_payload=True,
+        with_vectors=False,
+    )
+    return [
+        (_document_from_point(point, vectorstore), point.score)
+        for point in response.points
+    ]
+
+
+async def _ahybrid_search(
+    vectorstore: QdrantVectorStore,
+    async_client: AsyncQdrantClient,
+    query: str,
+    query_vector: list[float],
+    k: int,
+    score_threshold: float,
+    search_filter: models.Filter | None,
+) -> list[tuple[Document, float]]:
+    """
+    Dense and BM25 results fused with RRF by Qdrant, in one round trip.
+
+    Fusion scores only reflect ranks, so the dense similarity of each result is
+    fetched in the same batch and returned instead. Results found by BM25 alone
+    get `score_threshold`, they are relevant but not semantically close.
+    """
+    sparse = vectorstore.sparse_embeddings.embed_query(query)
+    sparse_vector = models.SparseVector(indices=sparse.indices, values=sparse.values)
+    using = vectorstore.vector_name or None
+    prefetch_limit = k * settings.HYBRID_PREFETCH_MULTIPLIER
+    params = search_params()
+
+    fused, dense = await async_client.query_batch_points(
+        collection_name=vectorstore.collection_name,
+        requests=[
+            models.QueryRequest(
+                prefetch=[
+                    models.Prefetch(
+                        query=query_vector,
+                        using=using,
+                        limit=prefetch_limit,
+                        score_threshold=score_threshold,
+                        filter=search_filter,
+                        params=params,
+                    ),
+                    models.Prefetch(
+                        query=sparse_vector,
+                        using=vectorstore.sparse_vector_name,
+                        filter=search_filter,
+                        limit=prefetch_limit,
+                    ),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=k,
+                with_payload=True,
+            ),
+            models.QueryRequest(
+                query=query_vector,
+                using=using,
+                limit=prefetch_limit,
+                score_threshold=score_threshold,
+                filter=search_filter,
+                params=params,
+                with_payload=False,
+            ),
+        ],
+    )
+    dense_scores = {point.id: point.score for point in dense.points}
+    return [
+        (
+            _document_from_point(point, vectorstore),
+            dense_scores.get(point.id, score_threshold),
+        )
+        for point in fused.points
+    ]
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller of a key runs the call, callers arriving while it is in
+    flight await the same result (or exception) instead of running it again.
+    Nothing is kept once the call finishes. The shared call is only cancelled
+    when every caller waiting on it has been cancelled. Results are shared,
+    callers must not mutate them.
+    """
+
+    def __init__(self, enabled: bool = settings.SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._flights: dict[Hashable, _Flight] = {}
+        self._calls = 0
+        self._executions = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        self._calls += 1
+        if not self.enabled:
+            self._executions += 1
+            return await call()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+            self._executions += 1
+        else:
+            self._coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers start afresh instead of joining the cancelled call
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def _land(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Awaited by the callers, mark the error as retrieved if they all left
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self._calls,
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._flights),
+        }
+
+
+_single_flights: dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """The shared SingleFlight for one kind of call, e.g. `retrieval`."""
+    if name not in _single_flights:
+        _single_flights[name] = SingleFlight()
+    return _single_flights[name]
+
+
+def single_flight_stats() -> dict:
+    return {name: flight.stats() for name, flight in _single_flights.items()}
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace insensitive form of `query` for coalescing keys."""
+    return " ".join(query.lower().split())
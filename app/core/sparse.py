@@ -0,0 +1,54 @@
+import zlib
+from collections import Counter
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+from app.core.tokens import content_tokens
+
+# Name of the sparse vector in hybrid collections, the langchain_qdrant default
+SPARSE_VECTOR_NAME = "langchain-sparse"
+
+
+class BM25SparseEmbeddings(SparseEmbeddings):
+    """
+    BM25 term vectors computed locally, for Qdrant sparse vectors.
+
+    Terms are hashed to 32 bit indices, so no vocabulary has to be kept. A
+    document stores the BM25 term frequency part of each term. The IDF part
+    depends on the whole collection and is applied by Qdrant, the sparse vector
+    is created with the IDF modifier. A query is the set of its terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 150):
+        self.k1 = k1
+        self.b = b
+        # Content words in a CHUNK_SIZE chunk
+        self.avg_doc_length = avg_doc_length
+
+    @staticmethod
+    def _index(term: str) -> int:
+        return zlib.crc32(term.encode("utf-8"))
+
+    def _vector(self, weights: dict[int, float]) -> SparseVector:
+        return SparseVector(indices=list(weights), values=list(weights.values()))
+
+    def embed_documents(self, texts: list[str]) -> list[SparseVector]:
+        vectors = []
+        for text in texts:
+            tokens = content_tokens(text)
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_length)
+            weights: dict[int, float] = {}
+            for term, tf in Counter(tokens).items():
+                index = self._index(term)
+                # Terms colliding on an index add up
+                weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+            vectors.append(self._vector(weights))
+        return vectors
+
+    def embed_query(self, text: str) -> SparseVector:
+        return self._vector({self._index(term): 1.0 for term in set(content_tokens(text))})
+
+
+def is_hybrid_collection(collection_info) -> bool:
+    """Whether a collection, from `get_collection`, has the BM25 sparse vector."""
+    sparse_vectors = collection_info.config.params.sparse_vectors or {}
+    return SPARSE_VECTOR_NAME in sparse_vectors
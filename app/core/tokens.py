@@ -0,0 +1,52 @@
+import math
+import re
+from langchain_core.messages import BaseMessage
+
+# English text averages about four characters per token across common tokenizers
+CHARS_PER_TOKEN = 4
+# Role and formatting tokens added around every chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate, without a provider-specific tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    return estimate_tokens(message.text) + MESSAGE_OVERHEAD_TOKENS
+
+
+# Words, and codes such as part numbers (X-1234, v2.1) kept whole
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+_PART_PATTERN = re.compile(r"\w+")
+# Words that say nothing about what a text is about
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be but by can could did do does for from had has have how
+    i if in is it its me my of on or our should so than that the their them then
+    there these they this to was we were what when where which who whom why will
+    with would you your about tell explain give show please
+    """.split()
+)
+
+
+def content_tokens(text: str) -> list[str]:
+    """
+    Lower-cased content words of `text` in order, repeats included. A code is
+    returned whole and also split into its parts.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(
+            part for part in parts if len(part) > 1 and part not in _STOPWORDS
+        )
+    return tokens
+
+
+def content_terms(text: str) -> set[str]:
+    """Distinct content words of `text`, for cheap lexical comparisons."""
+    return set(content_tokens(text))
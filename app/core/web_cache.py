@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import zlib
+from typing import Any, Awaitable, Callable
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "web_cache:"
+# How long one worker holds the right to refresh a stale entry
+REFRESH_LOCK_SECONDS = 60
+
+LoadMany = Callable[[list[str]], dict[str, Any]]
+ALoadMany = Callable[[list[str]], Awaitable[dict[str, Any]]]
+
+# Keeps background refreshes referenced until they finish
+_background_tasks: set[asyncio.Task] = set()
+
+
+class WebCache:
+    """
+    Cache of web results shared by all workers through Redis, e.g. Tavily
+    search results by query or extracted pages by URL.
+
+    Entries are fresh for `ttl_seconds`. For `stale_seconds` after that they
+    are still served, and refreshed in the background by one worker. Older
+    entries expire in Redis, and the oldest are evicted beyond `max_entries`.
+    Values are JSON, stored zlib compressed. Failed or empty responses are
+    returned but not cached. Redis errors are logged and the results loaded
+    directly.
+    """
+
+    def __init__(self, kind: str, ttl_seconds: float, stale_seconds: float, max_entries: int):
+        self.kind = kind
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._index = f"{KEY_PREFIX}{kind}:index"
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._errors = 0
+
+    def _key(self, name: str) -> str:
+        return f"{KEY_PREFIX}{self.kind}:{hashlib.sha256(name.encode('utf-8')).hexdigest()}"
+
+    def _refresh_key(self, name: str) -> str:
+        return f"{KEY_PREFIX}{self.kind}:refreshing:{hashlib.sha256(name.encode('utf-8')).hexdigest()}"
+
+    @property
+    def _lifetime(self) -> int:
+        return max(1, int(self.ttl_seconds + self.stale_seconds))
+
+    def _decode(self, names: list[str], values: list[bytes | None]) -> dict[str, tuple[Any, bool]]:
+        """Cached values by name, with whether they are stale."""
+        now = time.time()
+        entries = {}
+        for name, data in zip(names, values):
+            if data is None:
+                continue
+            entry = json.loads(zlib.decompress(data))
+            age = now - entry["stored_at"]
+            if age < self.ttl_seconds + self.stale_seconds:
+                entries[name] = (entry["value"], age >= self.ttl_seconds)
+        return entries
+
+    def _encode(self, value: Any, now: float) -> bytes:
+        entry = {"stored_at": now, "value": value}
+        return zlib.compress(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def _cacheable(value: Any) -> bool:
+        # Failed (TavilySearch returns its error) or empty responses are retried next time
+        if isinstance(value, dict):
+            return not value.get("error") and value.get("results", True) != []
+        return value is not None
+
+    def _encode_many(self, values: dict[str, Any], now: float) -> dict[str, bytes]:
+        """Encoded entries by key, leaving out values that should not or cannot be cached."""
+        entries = {}
+        for name, value in values.items():
+            if not self._cacheable(value):
+                continue
+            try:
+                entries[self._key(name)] = self._encode(value, now)
+            except (TypeError, ValueError) as e:
+                self._record_error("store", e)
+        return entries
+
+    def _record(self, names: list[str], entries: dict[str, tuple[Any, bool]]):
+        with self._lock:
+            for name in names:
+                if name not in entries:
+                    self._misses += 1
+                elif entries[name][1]:
+                    self._stale_hits += 1
+                else:
+                    self._hits += 1
+
+    def _record_error(self, action: str, error: Exception):
+        logger.warning(f"Web cache ({self.kind}) {action} failed: {error}")
+        with self._lock:
+            self._errors += 1
+
+    # Sync
+
+    def _get_many(self, client: redis.Redis, names: list[str]) -> dict[str, tuple[Any, bool]]:
+        return self._decode(names, client.mget([self._key(name) for name in names]))
+
+    def _put_many(self, client: redis.Redis, values: dict[str, Any]):
+        now = time.time()
+        entries = self._encode_many(values, now)
+        if not entries:
+            return
+        pipe = client.pipeline(transaction=False)
+        for key, data in entries.items():
+            pipe.set(key, data, ex=self._lifetime)
+            pipe.zadd(self._index, {key: now})
+        pipe.zremrangebyscore(self._index, "-inf", now - self._lifetime)
+        pipe.zcard(self._index)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = [key for key, _ in client.zpopmin(self._index, size - self.max_entries)]
+            if evicted:
+                client.delete(*evicted)
+
+    def _refresh(self, client: redis.Redis, names: list[str], load_many: LoadMany):
+        try:
+            names = [
+                name for name in names
+                if client.set(self._refresh_key(name), 1, nx=True, ex=REFRESH_LOCK_SECONDS)
+            ]
+            if names:
+                self._put_many(client, load_many(names))
+                with self._lock:
+                    self._refreshes += len(names)
+        except Exception as e:
+            self._record_error("refresh", e)
+
+    def fetch_many(
+        self, client: redis.Redis, names: list[str], load_many: LoadMany
+    ) -> dict[str, Any]:
+        """
+        Values of `names`, cached or loaded by `load_many`. `load_many` may
+        leave out names it has no value for, those are not cached.
+        """
+        try:
+            entries = self._get_many(client, names)
+        except (RedisError, ValueError, zlib.error) as e:
+            self._record_error("lookup", e)
+            return load_many(names)
+        self._record(names, entries)
+
+        values = {name: value for name, (value, _) in entries.items()}
+        missing = [name for name in names if name not in entries]
+        if missing:
+            loaded = load_many(missing)
+            values.update(loaded)
+            try:
+                self._put_many(client, loaded)
+            except RedisError as e:
+                self._record_error("store", e)
+
+        stale = [name for name, (_, is_stale) in entries.items() if is_stale]
+        if stale:
+            threading.Thread(
+                target=self._refresh, args=(client, stale, load_many), daemon=True
+            ).start()
+        return values
+
+    def fetch(self, client: redis.Redis, name: str, load: Callable[[], Any]) -> Any:
+        return self.fetch_many(client, [name], lambda _: {name: load()})[name]
+
+    # Async
+
+    async def _aget_many(
+        self, client: aioredis.Redis, names: list[str]
+    ) -> dict[str, tuple[Any, bool]]:
+        return self._decode(names, await client.mget([self._key(name) for name in names]))
+
+    async def _aput_many(self, client: aioredis.Redis, values: dict[str, Any]):
+        now = time.time()
+        entries = self._encode_many(values, now)
+        if not entries:
+            return
+        pipe = client.pipeline(transaction=False)
+        for key, data in entries.items():
+            pipe.set(key, data, ex=self._lifetime)
+            pipe.zadd(self._index, {key: now})
+        pipe.zremrangebyscore(self._index, "-inf", now - self._lifetime)
+        pipe.zcard(self._index)
+        size = (await pipe.execute())[-1]
+        if size > self.max_entries:
+            evicted = [key for key, _ in await client.zpopmin(self._index, size - self.max_entries)]
+            if evicted:
+                await client.delete(*evicted)
+
+    async def _arefresh(self, client: aioredis.Redis, names: list[str], load_many: ALoadMany):
+        try:
+            names = [
+                name for name in names
+                if await client.set(self._refresh_key(name), 1, nx=True, ex=REFRESH_LOCK_SECONDS)
+            ]
+            if names:
+                await self._aput_many(client, await load_many(names))
+                with self._lock:
+                    self._refreshes += len(names)
+        except Exception as e:
+            self._record_error("refresh", e)
+
+    async def afetch_many(
+        self, client: aioredis.Redis, names: list[str], load_many: ALoadMany
+    ) -> dict[str, Any]:
+        """Async `fetch_many`."""
+        try:
+            entries = await self._aget_many(client, names)
+        except (RedisError, ValueError, zlib.error) as e:
+            self._record_error("lookup", e)
+            return await load_many(names)
+        self._record(names, entries)
+
+        values = {name: value for name, (value, _) in entries.items()}
+        missing = [name for name in names if name not in entries]
+        if missing:
+            loaded = await load_many(missing)
+            values.update(loaded)
+            try:
+                await self._aput_many(client, loaded)
+            except RedisError as e:
+                self._record_error("store", e)
+
+        stale = [name for name, (_, is_stale) in entries.items() if is_stale]
+        if stale:
+            task = asyncio.create_task(self._arefresh(client, stale, load_many))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return values
+
+    async def afetch(
+        self, client: aioredis.Redis, name: str, load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        async def load_many(_: list[str]) -> dict[str, Any]:
+            return {name: await load()}
+
+        return (await self.afetch_many(client, [name], load_many))[name]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._stale_hits) / lookups if lookups else 0.0,
+                "refreshes": self._refreshes,
+                "errors": self._errors,
+            }
+
+
+_web_search_cache: WebCache | None = None
+_web_extract_cache: WebCache | None = None
+
+
+def get_web_search_cache() -> WebCache:
+    """Tavily search results, by top-K and normalized query."""
+    global _web_search_cache
+    if _web_search_cache is None:
+        _web_search_cache = WebCache(
+            "search",
+            ttl_seconds=settings.WEB_SEARCH_CACHE_TTL_SECONDS,
+            stale_seconds=settings.WEB_SEARCH_CACHE_STALE_SECONDS,
+            max_entries=settings.WEB_SEARCH_CACHE_MAX_ENTRIES,
+        )
+    return _web_search_cache
+
+
+def get_web_extract_cache() -> WebCache:
+    """Tavily extracted page content, by URL."""
+    global _web_extract_cache
+    if _web_extract_cache is None:
+        _web_extract_cache = WebCache(
+            "extract",
+            ttl_seconds=settings.WEB_EXTRACT_CACHE_TTL_SECONDS,
+            stale_seconds=settings.WEB_EXTRACT_CACHE_STALE_SECONDS,
+            max_entries=settings.WEB_EXTRACT_CACHE_MAX_ENTRIES,
+        )
+    return _web_extract_cache
+
+
+def web_cache_stats() -> dict:
+    return {
+        "search": get_web_search_cache().stats(),
+        "extract": get_web_extract_cache().stats(),
+    }
@@ -1,15 +1,19 @@
 from app.exception.base import CustomError
-from app.exception.llm import LLMProviderError
-from app.exception.ingest import IngestionError
+from app.exception.llm import LLMProviderError, ProviderRateLimitError
+from app.exception.ingest import IngestionError, JobNotFoundError, UploadTooLargeError
 from app.exception.query import QueryError
 from app.exception.vectordb import VectorDBError
-from app.exception.collection import CollectionAlreadyExistsError
+from app.exception.collection import CollectionAlreadyExistsError, CollectionBusyError
 
 __all__ = (
     "CustomError",
     "IngestionError",
+    "JobNotFoundError",
+    "UploadTooLargeError",
     "QueryError",
     "VectorDBError",
     "LLMProviderError",
+    "ProviderRateLimitError",
     "CollectionAlreadyExistsError",
+    "CollectionBusyError",
 )
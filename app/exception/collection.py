@@ -5,3 +5,9 @@ class CollectionAlreadyExistsError(CustomError):
     def __init__(self, message: str):
         self.message = message
         super().__init__(message)
+
+
+class CollectionBusyError(CustomError):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
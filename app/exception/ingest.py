@@ -5,3 +5,15 @@ class IngestionError(CustomError):
     def __init__(self, message: str):
         self.message = message
         super().__init__(message)
+
+
+class JobNotFoundError(CustomError):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class UploadTooLargeError(CustomError):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
@@ -5,3 +5,7 @@ class LLMProviderError(CustomError):
     def __init__(self, message: str):
         self.message = message
         super().__init__(message)
+
+
+class ProviderRateLimitError(LLMProviderError):
+    """The provider kept rejecting calls for rate limits or exhausted quota."""
@@ -1,8 +1,16 @@
 # app/exception_handlers.py
 from fastapi import Request, FastAPI, status
 from fastapi.responses import JSONResponse
-from app.exception.collection import CollectionAlreadyExistsError
-from app.exception import IngestionError, QueryError, VectorDBError, LLMProviderError
+from app.exception.collection import CollectionAlreadyExistsError, CollectionBusyError
+from app.exception import (
+    IngestionError,
+    JobNotFoundError,
+    UploadTooLargeError,
+    QueryError,
+    VectorDBError,
+    LLMProviderError,
+    ProviderRateLimitError,
+)
 from app.core.logging_config import get_logger
 from app.schema.api import ApiResponse
 
@@ -38,8 +46,12 @@ def register_exception_handlers(app: FastAPI):
         IngestionError: status.HTTP_400_BAD_REQUEST,
         QueryError: status.HTTP_400_BAD_REQUEST,
         LLMProviderError: status.HTTP_500_INTERNAL_SERVER_ERROR,
+        ProviderRateLimitError: status.HTTP_429_TOO_MANY_REQUESTS,
         VectorDBError: status.HTTP_500_INTERNAL_SERVER_ERROR,
         CollectionAlreadyExistsError: status.HTTP_400_BAD_REQUEST,
+        CollectionBusyError: status.HTTP_409_CONFLICT,
+        JobNotFoundError: status.HTTP_404_NOT_FOUND,
+        UploadTooLargeError: status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
     }
 
     # Register them in a loop
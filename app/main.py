@@ -1,8 +1,22 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.core.logging_config import get_logger, setup_logging
+from app.core.metrics import collect_stats, get_stage_timings, register_stats_provider
+from app.core.registry import ClientRegistry
+from app.core.embedding_cache import get_embedding_cache_store
+from app.core.history import get_history_window_cache
+from app.core.context_packer import get_context_packer
+from app.core.answer_cache import get_answer_cache
+from app.core.singleflight import single_flight_stats
+from app.core.embedding_batcher import embedding_batcher_stats
+from app.core.rate_limiter import rate_limiter_stats
+from app.core.web_cache import web_cache_stats
+from app.core.config import settings
+from app.service.ingestion_jobs import IngestionJobManager
+from app.service.query_router import get_query_router
 from app.api.api import api_router
 from app.schema.api import ApiResponse
+from app.schema.metrics import MetricsApiResponse
 from app.exception_handler import register_exception_handlers
 
 setup_logging()
@@ -12,10 +26,39 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("Starting RAG Bot")
 
+    client_registry = ClientRegistry()
+    app.state.client_registry = client_registry
+    register_stats_provider("client_pool", client_registry.stats)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        register_stats_provider("embedding_cache", get_embedding_cache_store().stats)
+    if settings.EMBEDDING_BATCH_ENABLED:
+        register_stats_provider("embedding_batcher", embedding_batcher_stats)
+    if settings.RATE_LIMIT_ENABLED:
+        register_stats_provider("rate_limiter", rate_limiter_stats)
+
+    register_stats_provider("stage_timings", get_stage_timings().stats)
+    register_stats_provider("single_flight", single_flight_stats)
+    register_stats_provider("history_window_cache", get_history_window_cache().stats)
+    if settings.CONTEXT_PACKING_ENABLED:
+        register_stats_provider("context_packer", get_context_packer().stats)
+
+    job_manager = IngestionJobManager()
+    app.state.job_manager = job_manager
+    register_stats_provider("ingestion_jobs", job_manager.stats)
+    if settings.QUERY_ROUTER_ENABLED:
+        register_stats_provider("query_router", get_query_router().stats)
+    if settings.ANSWER_CACHE_ENABLED:
+        register_stats_provider("answer_cache", get_answer_cache().stats)
+    if settings.WEB_CACHE_ENABLED:
+        register_stats_provider("web_cache", web_cache_stats)
+
     yield
 
     logger.info("Shutting down RAG Bot")
 
+    await job_manager.shutdown()
+    await client_registry.aclose()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -33,6 +76,11 @@ def health_check():
     return {"success": True, "message": "Server is healthy"}
 
 
+@app.get("/api/metrics", response_model=MetricsApiResponse)
+def metrics():
+    return {"data": {"metrics": collect_stats()}}
+
+
 if __name__ == "__main__":
     import uvicorn
 
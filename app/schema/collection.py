@@ -1,5 +1,31 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.schema.api import ApiResponse
+from app.schema.db import VectorQuantization
+from app.schema.llm import EmbeddingProvider
+
+
+class CollectionCreateRequest(BaseModel):
+    # Fields left as None use the COLLECTION_* settings
+    # Dense + BM25 hybrid search
+    hybrid: bool | None = None
+    # Compressed copy of the vectors searched first, originals used to rescore
+    quantization: VectorQuantization | None = None
+    # HNSW graph degree and build-time beam width
+    hnsw_m: int | None = Field(default=None, ge=0)
+    hnsw_ef_construct: int | None = Field(default=None, ge=4)
+    # Keep original vectors / payloads on disk instead of in RAM
+    on_disk_vectors: bool | None = None
+    on_disk_payload: bool | None = None
+    # Embedding size reduced from the model's, e.g. 768 of gemini-embedding-001's 3072
+    dimensions: int | None = Field(default=None, ge=1)
+
+
+class ReindexRequest(CollectionCreateRequest):
+    # None keeps the collection's embedding model / uses the CHUNK_* settings
+    chunk_size: int | None = Field(default=None, ge=1)
+    chunk_overlap: int | None = Field(default=None, ge=0)
+    embedding_provider: EmbeddingProvider | None = None
+    embedding_model_name: str | None = None
 
 
 class CollectionsList(BaseModel):
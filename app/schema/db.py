@@ -3,3 +3,9 @@ from enum import Enum
 
 class VectorDB(str, Enum):
     QDRANT = "qdrant"
+
+
+class VectorQuantization(str, Enum):
+    NONE = "none"
+    SCALAR = "scalar"
+    BINARY = "binary"
@@ -1,4 +1,48 @@
+from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel
+from app.schema.api import ApiResponse
+
+class SourceType(str, Enum):
+    FILE = "file"
+    URL = "url"
+
 
 class UrlRequest(BaseModel):
-    urls: list[str]
\ No newline at end of file
+    urls: list[str]
+
+
+class IngestJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class IngestStats(BaseModel):
+    files_total: int
+    files_parsed: int
+    pages_parsed: int
+    chunks_embedded: int
+    chunks_skipped: int
+    chunks_deleted: int
+    failures: list[str]
+
+
+class IngestStatsApiResponse(ApiResponse[IngestStats]):
+    pass
+
+
+class IngestJob(IngestStats):
+    job_id: str
+    collection_name: str
+    status: IngestJobStatus
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class IngestJobApiResponse(ApiResponse[IngestJob]):
+    pass
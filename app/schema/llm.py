@@ -9,4 +9,8 @@ class LLMProvider(str, Enum):
 class EmbeddingProvider(str, Enum):
     GOOGLE = "google"
     COHERE = "cohere"
-    BEDROCK = "bedrock"
\ No newline at end of file
+    BEDROCK = "bedrock"
+
+class RateLimitLane(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from app.schema.api import ApiResponse
+
+
+class MetricsData(BaseModel):
+    metrics: dict[str, dict]
+
+
+class MetricsApiResponse(ApiResponse[MetricsData]):
+    pass
@@ -1,5 +1,25 @@
+from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel, Field
 from app.schema.api import ApiResponse
+from app.schema.ingest import SourceType
+
+
+class QueryPipeline(str, Enum):
+    AGENTIC = "agentic"
+    RAG = "rag"
+
+
+class SpeculativeMode(str, Enum):
+    OFF = "off"
+    SEARCH = "search"
+    FULL = "full"
+
+
+class RouteDecision(str, Enum):
+    VECTOR = "vector"
+    WEB = "web"
+    BOTH = "both"
 
 
 class QueryResponse(BaseModel):
@@ -19,9 +39,22 @@ class SessionApiResponse(ApiResponse[SessionIDResponse]):
     pass
 
 
+class SearchFilter(BaseModel):
+    """Restricts retrieval to chunks matching every given condition."""
+
+    sources: list[str] | None = None
+    source_type: SourceType | None = None
+    page_from: int | None = Field(default=None, ge=1)
+    page_to: int | None = Field(default=None, ge=1)
+    ingested_after: datetime | None = None
+    ingested_before: datetime | None = None
+
+
 class ChatRequest(BaseModel):
     session_id: str
     query: str
+    filters: SearchFilter | None = None
+    bypass_cache: bool = False
 
 
 class RAGResponse(BaseModel):
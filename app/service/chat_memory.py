@@ -0,0 +1,90 @@
+import asyncio
+from typing import Sequence
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from app.schema.llm import RateLimitLane
+from app.core.history import AsyncRedisChatMessageHistory
+from app.core.prompt_manager import prompt_manager
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.rate_limiter import rate_limit_lane
+
+logger = get_logger(__name__)
+
+# Keeps running summary updates referenced until they finish
+_background_tasks: set[asyncio.Task] = set()
+
+
+class ChatMemory:
+    """
+    Bounded view of a session's history for prompts.
+
+    Loads the newest messages that fit in `max_tokens`. With a `summary_llm`,
+    messages that fell out of that window are folded into a rolling summary,
+    `summary_batch` at a time in the background after each append, and the
+    summary is placed before the window. A turn therefore costs the same
+    however long the session gets.
+    """
+
+    def __init__(
+        self,
+        history: AsyncRedisChatMessageHistory,
+        max_tokens: int = settings.CHAT_HISTORY_MAX_TOKENS,
+        summary_llm: BaseChatModel | None = None,
+        summary_batch: int = settings.CHAT_HISTORY_SUMMARY_BATCH,
+    ):
+        self.history = history
+        self.max_tokens = max_tokens
+        self.summary_llm = summary_llm
+        self.summary_batch = summary_batch
+
+    async def aload(self) -> list[BaseMessage]:
+        window, older = await self.history.aget_window(self.max_tokens)
+        if self.summary_llm is None or not older:
+            return window
+
+        summary, _ = await self.history.aget_summary()
+        if not summary:
+            return window
+        return [
+            SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")
+        ] + window
+
+    async def aappend(self, messages: Sequence[BaseMessage]):
+        await self.history.aadd_messages(messages)
+        if self.summary_llm is not None:
+            # Summaries can wait, the task keeps the lane set here
+            with rate_limit_lane(RateLimitLane.BULK):
+                task = asyncio.create_task(self._aupdate_summary())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+    async def _aupdate_summary(self):
+        try:
+            _, older = await self.history.aget_window(self.max_tokens)
+            summary, covered = await self.history.aget_summary()
+            if older - covered < self.summary_batch:
+                return
+
+            end = covered + self.summary_batch
+            messages = await self.history.aget_range(covered, end)
+            conversation = "\n".join(
+                f"{message.type}: {message.text}" for message in messages
+            )
+            chain = (
+                PromptTemplate.from_template(prompt_manager.get_prompt("history_summary"))
+                | self.summary_llm
+                | StrOutputParser()
+            )
+            summary = await chain.ainvoke(
+                {"summary": summary or "(empty)", "conversation": conversation}
+            )
+            await self.history.aset_summary(summary, end)
+            logger.info(
+                f"Summarized {end} messages of session {self.history.session_id}"
+            )
+        except Exception:
+            logger.exception("Failed to update the chat history summary")
@@ -0,0 +1,185 @@
+import bisect
+import re
+from collections import deque
+from typing import Iterable, Iterator
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.config import settings
+
+SEPARATORS = ["\n\n\n", "\n\n", ".", " "]
+
+
+class PageAwareChunker:
+    """
+    Splits a stream of (page_number, text) pages into the same chunks as
+    RecursiveCharacterTextSplitter on the whole document, incrementally.
+
+    The splitter cuts the text before each occurrence of its first separator
+    found in the text, greedily merges the pieces shorter than `chunk_size`
+    into chunks and splits longer pieces again with the next separators. A
+    piece is complete once the next separator arrives, so the chunker runs that
+    merge as pages come in: a chunk is yielded when the piece after it is
+    complete and does not fit, which is when the splitter closes it too. Chunks
+    therefore do not depend on how the text is split into pages, and only the
+    incomplete last piece and about `window_size` characters before it stay in
+    memory. Parsers still return a whole document at once (see
+    IngestionService._load), so this bounds the chunking, not the parsing.
+
+    The separator is picked from the first `window_size` characters. The
+    splitter picks it from the whole document, so chunks differ when a
+    separator of higher priority only appears later (e.g. a first "\\n\\n\\n"
+    on page 40).
+
+    Each chunk keeps `start_index` relative to the whole document, found the
+    same way as the splitter's, and the page it starts on, including chunks
+    that span a page break.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = settings.CHUNK_SIZE,
+        chunk_overlap: int = settings.CHUNK_OVERLAP,
+        window_size: int | None = None,
+    ):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.window_size = window_size or 8 * chunk_size
+
+    def split(self, pages: Iterable[tuple[int, str]], source: str) -> Iterator[Document]:
+        return _ChunkStream(self, source).split(pages)
+
+
+class _ChunkStream:
+    """State of one PageAwareChunker.split, in document offsets."""
+
+    def __init__(self, chunker: PageAwareChunker, source: str):
+        self.chunk_size = chunker.chunk_size
+        self.chunk_overlap = chunker.chunk_overlap
+        self.window_size = chunker.window_size
+        self.source = source
+        # Text from `text_start` on, back to where the next start_index is searched
+        self.text = ""
+        self.text_start = 0
+        # The next piece starts at `cut`, the next separator is searched from `scan`
+        self.cut = 0
+        self.scan = 0
+        self.separator: re.Pattern | None = None
+        self.piece_splitter: RecursiveCharacterTextSplitter | None = None
+        # Pieces of the chunk being merged, and their length
+        self.merging: deque[str] = deque()
+        self.merged = 0
+        # Where the previous chunk was found and its length, see create_documents
+        self.index = 0
+        self.previous_length = 0
+        # Offsets and numbers of the pages from `text_start` on
+        self.page_starts: list[int] = []
+        self.page_numbers: list[int] = []
+
+    def split(self, pages: Iterable[tuple[int, str]]) -> Iterator[Document]:
+        for page_number, page_text in pages:
+            self.page_starts.append(self.text_start + len(self.text))
+            self.page_numbers.append(page_number)
+            self.text += page_text
+
+            if self.separator is None:
+                if len(self.text) < self.window_size:
+                    continue
+                self._pick_separator()
+            yield from self._documents(self._complete_pieces())
+            self._trim()
+
+        if self.separator is None:
+            self._pick_separator()
+            yield from self._documents(self._complete_pieces())
+        last_piece = self.text[self.cut - self.text_start:]
+        self.cut += len(last_piece)
+        if last_piece:
+            yield from self._documents(self._chunks(last_piece))
+        yield from self._documents(self._flush())
+
+    def _pick_separator(self):
+        # Like RecursiveCharacterTextSplitter._split_text, falling back to the last one
+        for i, separator in enumerate(SEPARATORS):
+            if separator in self.text or i == len(SEPARATORS) - 1:
+                break
+        self.separator = re.compile(re.escape(separator))
+        if SEPARATORS[i + 1:] and separator in self.text:
+            self.piece_splitter = RecursiveCharacterTextSplitter(
+                separators=SEPARATORS[i + 1:],
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+            )
+
+    def _complete_pieces(self) -> Iterator[str]:
+        """Chunks of the pieces followed by a separator in the text so far."""
+        while match := self.separator.search(self.text, self.scan - self.text_start):
+            piece = self.text[self.cut - self.text_start:match.start()]
+            self.cut = self.text_start + match.start()
+            self.scan = self.text_start + match.end()
+            if piece:
+                yield from self._chunks(piece)
+
+    def _chunks(self, piece: str) -> Iterator[str]:
+        if len(piece) < self.chunk_size:
+            yield from self._merge(piece)
+            return
+        # Longer pieces end the merge and are split with the next separators
+        yield from self._flush()
+        if self.piece_splitter is None:
+            yield piece
+        else:
+            yield from self.piece_splitter.split_text(piece)
+
+    def _merge(self, piece: str) -> Iterator[str]:
+        # RecursiveCharacterTextSplitter._merge_splits, one piece at a time
+        if self.merged + len(piece) > self.chunk_size and self.merging:
+            chunk = "".join(self.merging).strip()
+            if chunk:
+                yield chunk
+            while self.merged > self.chunk_overlap or (
+                self.merged + len(piece) > self.chunk_size and self.merged > 0
+            ):
+                self.merged -= len(self.merging.popleft())
+        self.merging.append(piece)
+        self.merged += len(piece)
+
+    def _flush(self) -> Iterator[str]:
+        chunk = "".join(self.merging).strip()
+        self.merging.clear()
+        self.merged = 0
+        if chunk:
+            yield chunk
+
+    def _documents(self, chunks: Iterable[str]) -> Iterator[Document]:
+        for chunk in chunks:
+            # Searched like create_documents does in the whole document
+            offset = max(0, self.index + self.previous_length - self.chunk_overlap)
+            self.index = self.text_start + self.text.find(
+                chunk, max(0, offset - self.text_start)
+            )
+            self.previous_length = len(chunk)
+
+            page_index = bisect.bisect_right(self.page_starts, self.index) - 1
+            yield Document(
+                page_content=chunk,
+                metadata={
+                    "start_index": self.index,
+                    "source": self.source,
+                    "page": self.page_numbers[page_index],
+                },
+            )
+
+    def _trim(self):
+        """Forget the text and pages well before the next piece and the next search."""
+        next_search = self.index + self.previous_length - self.chunk_overlap
+        # Chunks shorter than the overlap move the search after them back, keep
+        # a window of text for a run of them
+        start = min(self.cut, next_search - self.window_size)
+        if start > self.text_start:
+            self.text = self.text[start - self.text_start:]
+            self.text_start = start
+        first = bisect.bisect_right(self.page_starts, self.text_start) - 1
+        if first > 0:
+            del self.page_starts[:first]
+            del self.page_numbers[:first]
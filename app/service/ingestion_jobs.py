@@ -0,0 +1,168 @@
+import asyncio
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from app.schema.ingest import IngestJobStatus
+from app.service.ingestion_pipeline import IngestionStats
+from app.exception import JobNotFoundError
+from app.core.config import settings
+from app.core.logging_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    collection_name: str
+    status: IngestJobStatus = IngestJobStatus.PENDING
+    stats: IngestionStats = field(default_factory=IngestionStats)
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (
+            IngestJobStatus.COMPLETED,
+            IngestJobStatus.FAILED,
+            IngestJobStatus.CANCELLED,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "collection_name": self.collection_name,
+            "status": self.status,
+            **asdict(self.stats),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs in the background of a single worker.
+
+    At most `max_concurrent_jobs` run at once, the rest wait as pending. A job
+    given a `lock` waits for it before taking one of those slots, so jobs held
+    back by a lock do not keep jobs for other collections waiting. Document
+    parsing is CPU heavy, so it is handed to a process pool shared by
+    all jobs of the worker. Only the latest `max_retained_jobs` finished jobs
+    are kept for status queries.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_jobs: int = settings.INGEST_MAX_CONCURRENT_JOBS,
+        parse_processes: int = settings.INGEST_PARSE_PROCESSES,
+        max_retained_jobs: int = settings.INGEST_MAX_RETAINED_JOBS,
+    ):
+        self._semaphore = asyncio.Semaphore(max_concurrent_jobs)
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self.max_retained_jobs = max_retained_jobs
+        # Spawn instead of fork, the server process is multi-threaded
+        self.parse_executor = ProcessPoolExecutor(
+            max_workers=parse_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_logging,
+        )
+
+    def submit(
+        self,
+        collection_name: str,
+        run: Callable[[IngestionJob], Awaitable[object]],
+        cleanup: Callable[[], None] | None = None,
+        lock: Callable[[], AbstractAsyncContextManager] | None = None,
+    ) -> IngestionJob:
+        """
+        Schedule `run(job)` in the background and return the pending job. `run`
+        starts with `lock()` held, e.g. a collection_lock of the collection.
+        """
+        job = IngestionJob(job_id=str(uuid.uuid4()), collection_name=collection_name)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._execute(job, run, cleanup, lock))
+        self._prune()
+        logger.info(f"Submitted ingestion job {job.job_id} for {collection_name}")
+        return job
+
+    async def _execute(
+        self,
+        job: IngestionJob,
+        run: Callable[[IngestionJob], Awaitable[object]],
+        cleanup: Callable[[], None] | None,
+        lock: Callable[[], AbstractAsyncContextManager] | None,
+    ):
+        try:
+            async with lock() if lock is not None else nullcontext():
+                async with self._semaphore:
+                    job.status = IngestJobStatus.RUNNING
+                    job.started_at = datetime.now(timezone.utc)
+                    await run(job)
+            if job.stats.files_total and job.stats.files_parsed == 0:
+                # Nothing was ingested, every file failed to parse
+                job.status = IngestJobStatus.FAILED
+                job.error = f"All {job.stats.files_total} files failed to parse."
+                logger.error(f"Ingestion job {job.job_id} failed: {job.error}")
+            else:
+                job.status = IngestJobStatus.COMPLETED
+                logger.info(f"Ingestion job {job.job_id} completed")
+        except asyncio.CancelledError:
+            job.status = IngestJobStatus.CANCELLED
+            logger.info(f"Ingestion job {job.job_id} cancelled")
+        except Exception as e:
+            job.status = IngestJobStatus.FAILED
+            job.error = str(e)
+            logger.exception(f"Ingestion job {job.job_id} failed")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            job.task = None
+            if cleanup is not None:
+                cleanup()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.max_retained_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str, collection_name: str) -> IngestionJob:
+        job = self._jobs.get(job_id)
+        if job is None or job.collection_name != collection_name:
+            raise JobNotFoundError(f"Ingestion job {job_id} not found.")
+        return job
+
+    def cancel(self, job_id: str, collection_name: str) -> IngestionJob:
+        """
+        Cancel a job. It stops embedding and storing chunks right away, and
+        parses that have not started are dropped, but a file already being
+        parsed in the process pool is parsed to the end: parsers return a
+        whole document at once, so there is no point in between to stop at.
+        Its result is discarded, and the pool process is busy until then.
+        """
+        job = self.get(job_id, collection_name)
+        if job.task is not None:
+            job.task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        counts = {status.value: 0 for status in IngestJobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {"jobs": counts}
+
+    async def shutdown(self):
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from app.core.config import settings
+from app.core.db import delete_points, get_source_point_ids
+from app.core.logging_config import get_logger
+from app.schema.ingest import SourceType
+
+logger = get_logger(__name__)
+
+# Marks the end of a stage's output on a queue
+_DONE = object()
+
+_CHUNK_ID_NAMESPACE = uuid.UUID("6f1c3a52-5d0e-4c8e-9a3b-2f7d1e4b8c90")
+
+
+def chunk_point_id(collection_name: str, source: str, text: str) -> str:
+    """Deterministic Qdrant point id for a chunk of `source` with content `text`."""
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    name = f"{collection_name}\x1f{source}\x1f{content_hash}"
+    return str(uuid.uuid5(_CHUNK_ID_NAMESPACE, name))
+
+
+@dataclass
+class IngestionSource:
+    """A named document and the callable that extracts its (page, text) pairs."""
+
+    name: str
+    load: Callable[[], list[tuple[int, str]]]
+    source_type: SourceType = SourceType.FILE
+
+
+@dataclass
+class _SourceSync:
+    """Tracks a source until its new chunks are stored and stale ones can go."""
+
+    name: str
+    stale_ids: set[str]
+    pending_batches: int = 0
+    chunked: bool = False
+
+
+@dataclass
+class IngestionStats:
+    files_total: int = 0
+    files_parsed: int = 0
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_skipped: int = 0
+    chunks_deleted: int = 0
+    failures: list[str] = field(default_factory=list)
+
+
+class IngestionPipeline:
+    """
+    Three stage ingestion pipeline: parse -> chunk -> embed+upsert.
+
+    Stages run concurrently and are connected by bounded queues, so parsing the
+    next file overlaps with embedding the previous one while memory stays
+    bounded. Chunks are embedded and upserted in batches of `batch_size`, with
+    at most `max_in_flight` batches talking to the provider at once.
+
+    Chunks get deterministic point ids derived from (collection, source,
+    content hash), where the collection is `point_id_namespace` if given (the
+    alias a rebuilt collection will be served under). When a source is ingested again, chunks that already exist
+    are skipped, new or changed ones are embedded, and chunks that no longer
+    appear are deleted once the new ones are stored.
+
+    Progress is recorded on `stats` while the pipeline runs. With
+    `skip_failed_sources` a file that fails to parse is recorded as a failure
+    instead of aborting the whole run.
+    """
+
+    def __init__(
+        self,
+        vectorstore: VectorStore,
+        chunk: Callable[[list[tuple[int, str]], str], Iterable[Document]],
+        batch_size: int = settings.INGEST_EMBED_BATCH_SIZE,
+        max_in_flight: int = settings.INGEST_MAX_IN_FLIGHT_EMBEDDINGS,
+        parse_concurrency: int = settings.INGEST_PARSE_CONCURRENCY,
+        queue_size: int = settings.INGEST_QUEUE_SIZE,
+        parse_executor: Executor | None = None,
+        stats: IngestionStats | None = None,
+        skip_failed_sources: bool = False,
+        point_id_namespace: str | None = None,
+    ):
+        self.vectorstore = vectorstore
+        self.point_id_namespace = point_id_namespace or vectorstore.collection_name
+        self.chunk = chunk
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.parse_concurrency = parse_concurrency
+        self.queue_size = queue_size
+        self.parse_executor = parse_executor
+        self.stats = stats if stats is not None else IngestionStats()
+        self.skip_failed_sources = skip_failed_sources
+
+    async def _parse_worker(self, sources: asyncio.Queue, pages_queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while not sources.empty():
+            source: IngestionSource = sources.get_nowait()
+            logger.info(f"Parsing {source.name}")
+            try:
+                if self.parse_executor is None:
+                    pages = await asyncio.to_thread(source.load)
+                else:
+                    pages = await loop.run_in_executor(self.parse_executor, source.load)
+            except Exception as e:
+                if not self.skip_failed_sources:
+                    raise
+                logger.exception(f"Failed to parse {source.name}, skipping it")
+                self.stats.failures.append(f"{source.name}: {e}")
+                continue
+
+            self.stats.files_parsed += 1
+            self.stats.pages_parsed += len(pages)
+            await pages_queue.put((source, pages))
+
+    async def _chunk_worker(self, pages_queue: asyncio.Queue, batch_queue: asyncio.Queue):
+        client = self.vectorstore.client
+        collection_name = self.vectorstore.collection_name
+        while (item := await pages_queue.get()) is not _DONE:
+            source, pages = item
+            existing_ids = await asyncio.to_thread(
+                get_source_point_ids,
+                client,
+                collection_name,
+                source.name,
+                self.vectorstore.metadata_payload_key,
+            )
+            sync = _SourceSync(name=source.name, stale_ids=set(existing_ids))
+            # Filterable payload fields, see build_filter. Chunks that already
+            # carry them (rebuilt from a stored collection) keep theirs
+            tags = {
+                "source_type": source.source_type.value,
+                "ingested_at": datetime.now(timezone.utc).isoformat(),
+            }
+
+            # Chunks are produced lazily, a batch at a time, off the event loop
+            chunks = iter(self.chunk(pages, source.name))
+            batch, batch_ids = [], []
+            while piece := await asyncio.to_thread(_take, chunks, self.batch_size):
+                for chunk in piece:
+                    point_id = chunk_point_id(
+                        self.point_id_namespace, source.name, chunk.page_content
+                    )
+                    if point_id in existing_ids:
+                        # Unchanged since the last ingestion
+                        if point_id in sync.stale_ids:
+                            sync.stale_ids.discard(point_id)
+                            self.stats.chunks_skipped += 1
+                        continue
+                    # Also drops repeated identical chunks within the source
+                    existing_ids.add(point_id)
+                    for key, value in tags.items():
+                        chunk.metadata.setdefault(key, value)
+                    batch.append(chunk)
+                    batch_ids.append(point_id)
+                    if len(batch) == self.batch_size:
+                        sync.pending_batches += 1
+                        await batch_queue.put((sync, batch, batch_ids))
+                        batch, batch_ids = [], []
+            if batch:
+                sync.pending_batches += 1
+                await batch_queue.put((sync, batch, batch_ids))
+
+            sync.chunked = True
+            await self._delete_stale(sync)
+
+    async def _delete_stale(self, sync: _SourceSync):
+        if not sync.chunked or sync.pending_batches or not sync.stale_ids:
+            return
+        stale_ids = list(sync.stale_ids)
+        sync.stale_ids.clear()
+        await asyncio.to_thread(
+            delete_points,
+            self.vectorstore.client,
+            self.vectorstore.collection_name,
+            stale_ids,
+        )
+        self.stats.chunks_deleted += len(stale_ids)
+        logger.info(f"Deleted {len(stale_ids)} stale chunks of {sync.name}")
+
+    async def _embed_worker(self, batch_queue: asyncio.Queue):
+        while (item := await batch_queue.get()) is not _DONE:
+            sync, batch, batch_ids = item
+            # One provider embedding call and one Qdrant upsert per batch
+            await asyncio.to_thread(
+                self.vectorstore.add_documents,
+                batch,
+                ids=batch_ids,
+                batch_size=len(batch),
+            )
+            self.stats.chunks_embedded += len(batch)
+            logger.info(f"Embedded {self.stats.chunks_embedded} chunks")
+
+            sync.pending_batches -= 1
+            await self._delete_stale(sync)
+
+    async def run(self, sources: list[IngestionSource]) -> IngestionStats:
+        self.stats.files_total += len(sources)
+
+        source_queue: asyncio.Queue = asyncio.Queue()
+        for source in sources:
+            source_queue.put_nowait(source)
+        pages_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        batch_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                parsers = [
+                    tg.create_task(self._parse_worker(source_queue, pages_queue))
+                    for _ in range(max(1, min(self.parse_concurrency, len(sources))))
+                ]
+                chunker = tg.create_task(self._chunk_worker(pages_queue, batch_queue))
+                embedders = [
+                    tg.create_task(self._embed_worker(batch_queue))
+                    for _ in range(max(1, self.max_in_flight))
+                ]
+
+                # Shut the stages down in order once their producers are done
+                await asyncio.gather(*parsers)
+                await pages_queue.put(_DONE)
+                await chunker
+                for _ in embedders:
+                    await batch_queue.put(_DONE)
+        except ExceptionGroup as group:
+            # Surface the first failure to callers instead of the exception group
+            raise _first_leaf(group) from None
+
+        return self.stats
+
+
+def _take(iterator: Iterator, n: int) -> list:
+    return list(islice(iterator, n))
+
+
+def _first_leaf(group: ExceptionGroup) -> Exception:
+    exc = group.exceptions[0]
+    while isinstance(exc, ExceptionGroup):
+        exc = exc.exceptions[0]
+    return exc
@@ -1,42 +1,122 @@
+import asyncio
 from langchain_community.document_loaders import Docx2txtLoader
 from langchain_docling import DoclingLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai._common import GoogleGenerativeAIError
 from langchain_core.document_loaders import BaseLoader
 from langchain_community.vectorstores import VectorStore
 from langchain_core.documents import Document
 from langchain_tavily import TavilyExtract
 from langfuse.langchain import CallbackHandler
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from functools import partial
+from io import BytesIO
 from pathlib import Path
-from typing import Type
-import bisect
+from typing import Callable, Iterable, Iterator, Type
+from urllib.parse import urlsplit, urlunsplit
+import docx2txt
+import redis.asyncio as aioredis
 
-from app.exception import IngestionError
+from app.exception import (
+    CollectionBusyError,
+    IngestionError,
+    ProviderRateLimitError,
+    VectorDBError,
+)
+from app.schema.ingest import SourceType
+from app.schema.llm import RateLimitLane
 from app.core.config import settings
+from app.core.answer_cache import get_answer_cache
+from app.core.collection_lock import collection_writer
+from app.core.web_cache import get_web_extract_cache
 from app.core.logging_config import get_logger
+from app.core.rate_limiter import is_rate_limit_error, rate_limit_lane
+from app.service.chunker import PageAwareChunker
+from app.service.ingestion_pipeline import (
+    IngestionPipeline,
+    IngestionSource,
+    IngestionStats,
+)
 
 logger = get_logger(__name__)
 
 
+def _single_page(text: str) -> list[tuple[int, str]]:
+    """Pages for pageless content such as extracted web pages."""
+    return [(1, text)]
+
+
+def _url_key(url: str) -> str:
+    """`url` ignoring the case of its scheme and host, a trailing slash and the fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, "")
+    )
+
+
+def _by_requested_url(urls: list[str], response: dict) -> dict[str, dict]:
+    """
+    Results of a Tavily extract `response` keyed by the requested URL each
+    answers. Tavily may report a URL in another form than requested (a
+    trailing slash, a redirect target), so results are matched exactly, then
+    by `_url_key`, then in order with the requested URLs left that did not fail.
+    """
+    keys = {_url_key(url): url for url in urls}
+    matched, unmatched = {}, []
+    for result in response.get("results", []):
+        url = result.get("url", "")
+        requested = url if url in urls else keys.get(_url_key(url))
+        if requested is not None and requested not in matched:
+            matched[requested] = result
+        else:
+            unmatched.append(result)
+    if unmatched:
+        failed = {_url_key(f.get("url", "")) for f in response.get("failed_results", [])}
+        remaining = [
+            url for url in urls if url not in matched and _url_key(url) not in failed
+        ]
+        if len(remaining) == len(unmatched):
+            matched.update(zip(remaining, unmatched))
+        else:
+            logger.warning(
+                f"Left out {len(unmatched)} extracted pages not matching a requested url"
+            )
+    return matched
+
+
+def _load_docx_bytes(data: bytes) -> list[tuple[int, str]]:
+    # Same extraction as Docx2txtLoader, without a file on disk
+    return [(1, docx2txt.process(BytesIO(data)))]
+
+
 class IngestionService:
     SUPPORTED_LOADERS: dict[str, Type[BaseLoader]] = {
         ".pdf": DoclingLoader,
         ".docx": Docx2txtLoader,
     }
+    # Formats that can be parsed straight from an in-memory buffer
+    BUFFER_LOADERS: dict[str, Callable[[bytes], list[tuple[int, str]]]] = {
+        ".docx": _load_docx_bytes,
+    }
 
-    def __init__(self):
-        pass
+    def __init__(self, redis_client: aioredis.Redis | None = None):
+        # Used to invalidate the cached answers of the collection after ingestion
+        self.redis_client = redis_client
 
-    def _load(self, file_path: str) -> list[tuple[int, str]]:
-        """Take a file_path and extract pages from the document"""
+    @staticmethod
+    def _load(file_path: str) -> list[tuple[int, str]]:
+        """
+        Take a file_path and extract pages from the document. Static, so that
+        only the path is pickled when parsing runs in a process pool.
+        """
         logger.info("Loading text from files")
         file_ext = Path(file_path).suffix.lower()
 
-        if file_ext not in self.SUPPORTED_LOADERS:
+        if file_ext not in IngestionService.SUPPORTED_LOADERS:
             logger.error(f"Unsupported file type attempted: {file_ext}")
             raise IngestionError(f"Unsupported file type: {file_ext}")
 
-        loader_class = self.SUPPORTED_LOADERS[file_ext]
+        loader_class = IngestionService.SUPPORTED_LOADERS[file_ext]
         loader = loader_class(file_path)
 
         if file_ext == ".pdf":
@@ -49,86 +129,158 @@ class IngestionService:
             text = loader.load()[0].page_content
             return [(1, text)]
 
-    def _chunk(self, pages: list[tuple[int, str]], source: str) -> list[Document]:
+    def _chunk(self, pages: Iterable[tuple[int, str]], source: str) -> Iterator[Document]:
         logger.info("Chunking text")
-        full_text = ""
-        page_boundaries = []  # Store (char_index, page_number)
-
-        current_char_index = 0
-        for page_number, page_text in pages:
-            page_boundaries.append(current_char_index)
-
-            full_text += page_text
+        return PageAwareChunker().split(pages, source)
 
-            current_char_index += len(page_text)
-
-        splitter = RecursiveCharacterTextSplitter(
-            separators=["\n\n\n", "\n\n", ".", " "],
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            add_start_index=True,
+    async def _run_pipeline(
+        self, sources: list[IngestionSource], vectorstore: VectorStore, **pipeline_kwargs
+    ) -> IngestionStats:
+        pipeline = IngestionPipeline(
+            vectorstore=vectorstore, chunk=self._chunk, **pipeline_kwargs
         )
+        try:
+            logger.info("Adding documents to vectorstore")
+            # Chat requests get the provider first
+            with rate_limit_lane(RateLimitLane.BULK):
+                return await pipeline.run(sources)
+        except IngestionError:
+            raise
+        except Exception as e:
+            # Checked first, quota errors are GoogleGenerativeAIErrors too
+            if is_rate_limit_error(e):
+                logger.exception("Embedding provider kept rate limiting during ingestion")
+                raise ProviderRateLimitError(
+                    "The embedding provider is rate limiting or out of quota, retry the ingestion later."
+                ) from e
+            if isinstance(e, GoogleGenerativeAIError):
+                logger.exception("Google GenAI embedding failed during ingestion")
+                raise IngestionError(
+                    "Please check your Google Generative AI API key."
+                ) from e
+            raise
+        finally:
+            # Even a failed or cancelled run may have added chunks
+            if self.redis_client is not None and settings.ANSWER_CACHE_ENABLED:
+                await get_answer_cache().ainvalidate(
+                    self.redis_client, vectorstore.collection_name
+                )
 
-        chunks = splitter.create_documents([full_text])
-
-        final_chunks = []
-
-        for chunk in chunks:
-            start_index = chunk.metadata["start_index"]
-
-            page_index = bisect.bisect_right(page_boundaries, start_index) - 1
-
-            # Get the actual page number from document
-            original_page_number = pages[page_index][0]
+    def file_source(self, file_path: str) -> IngestionSource:
+        return IngestionSource(
+            name=Path(file_path).name, load=partial(self._load, file_path)
+        )
 
-            chunk.metadata["source"] = source
-            chunk.metadata["page"] = original_page_number
+    @classmethod
+    def supports_buffer(cls, filename: str) -> bool:
+        return Path(filename).suffix.lower() in cls.BUFFER_LOADERS
 
-            final_chunks.append(chunk)
+    def buffer_source(self, filename: str, data: bytes) -> IngestionSource:
+        """Source parsed from `data` directly, see `supports_buffer`."""
+        loader = self.BUFFER_LOADERS[Path(filename).suffix.lower()]
+        return IngestionSource(name=Path(filename).name, load=partial(loader, data))
 
-        return final_chunks
+    async def ingest_documents(
+        self,
+        file_paths: list[str],
+        vectorstore: VectorStore,
+        parse_executor: Executor | None = None,
+        stats: IngestionStats | None = None,
+        skip_failed_sources: bool = False,
+    ) -> IngestionStats:
+        return await self.ingest_sources(
+            [self.file_source(file_path) for file_path in file_paths],
+            vectorstore,
+            parse_executor=parse_executor,
+            stats=stats,
+            skip_failed_sources=skip_failed_sources,
+        )
 
-    def ingest_documents(self, file_paths: list[str], vectorstore: VectorStore):
+    async def ingest_sources(
+        self,
+        sources: list[IngestionSource],
+        vectorstore: VectorStore,
+        parse_executor: Executor | None = None,
+        stats: IngestionStats | None = None,
+        skip_failed_sources: bool = False,
+    ) -> IngestionStats:
+        """
+        Ingest documents through the pipeline. `parse_executor` (e.g. a process
+        pool) runs the CPU heavy parsing, and `stats` receives live progress.
+        Callers hold `collection_writer` of the collection when it may be
+        reindexed meanwhile, and build `vectorstore` once they hold it.
+        """
+        try:
+            return await self._run_pipeline(
+                sources,
+                vectorstore,
+                parse_executor=parse_executor,
+                stats=stats,
+                skip_failed_sources=skip_failed_sources,
+            )
+        except (IngestionError, ProviderRateLimitError):
+            raise
+        except Exception as e:
+            logger.exception("Unexpected ingestion error while ingesting documents.")
+            raise IngestionError("Failed to add documents to vectorstore.") from e
 
-        for file_path in file_paths:
-            pages = self._load(file_path)
-            filename = Path(file_path).name
+    async def _aextract(
+        self, urls: list[str], langfuse_handler: CallbackHandler
+    ) -> dict[str, dict]:
+        """
+        Tavily extractions of `urls`, keyed by the requested URL. Pages
+        extracted before come from the web cache when WEB_CACHE_ENABLED. URLs
+        that failed to extract are left out.
+        """
+        tavily_retriever = TavilyExtract(k=settings.WEB_SEARCH_TOP_K)
 
-            chunks = self._chunk(pages, source=filename)
+        async def extract(missing: list[str]) -> dict[str, dict]:
+            response = await tavily_retriever.ainvoke(
+                {"urls": missing}, config={"callbacks": [langfuse_handler]}
+            )
+            return _by_requested_url(missing, response)
 
-            try:
-                logger.info("Adding documents to vectorstore")
-                vectorstore.add_documents(chunks)
-            except GoogleGenerativeAIError as e:
-                logger.exception("Google GenAI embedding failed during ingestion")
-                raise IngestionError(
-                    "Please check your Google Generative AI API key."
-                ) from e
-            except Exception as e:
-                logger.exception("Unexpected ingestion error while ingesting documents.")
-                raise IngestionError("Failed to add documents to vectorstore.") from e
+        urls = list(dict.fromkeys(url.strip() for url in urls))
+        if not settings.WEB_CACHE_ENABLED or self.redis_client is None:
+            return await extract(urls)
+        return await get_web_extract_cache().afetch_many(self.redis_client, urls, extract)
 
-    def ingest_urls(self, urls: list[str], vectorstore: VectorStore):
-        
+    async def ingest_urls(
+        self,
+        urls: list[str],
+        collection_name: str,
+        get_vectorstore: Callable[[], VectorStore],
+    ) -> IngestionStats:
+        """
+        Extract `urls` and ingest them into `collection_name`, whose vector store
+        `get_vectorstore` builds once no reindex can change it anymore.
+        """
+        # A URL ingestion is a request, it fails instead of waiting for a reindex
+        if self.redis_client is not None:
+            lock = collection_writer(self.redis_client, collection_name, wait=False)
+        else:
+            lock = nullcontext()
         try:
-            langfuse_handler = CallbackHandler()
-            
-            tavily_retriever = TavilyExtract(k=settings.WEB_SEARCH_TOP_K)
-            
-            responses = tavily_retriever.invoke({"urls": urls}, config={"callbacks": [langfuse_handler]})
-            
-            for response in responses.get("results", []):
-                url = response.get("url", "")
-                content = response.get("raw_content", "")
-                chunks = self._chunk(pages= [(1, content)], source=url)
-                logger.info("Adding url text to vectorstore")
-                vectorstore.add_documents(chunks)
-        except GoogleGenerativeAIError as e:
-                logger.exception("Google GenAI embedding failed during ingestion")
-                raise IngestionError(
-                    "Please check your Google Generative AI API key."
-                ) from e
+            async with lock:
+                return await self._ingest_urls(urls, await asyncio.to_thread(get_vectorstore))
+        except (IngestionError, ProviderRateLimitError, CollectionBusyError, VectorDBError):
+            raise
         except Exception as e:
             logger.exception("Unexpected ingestion error while ingesting urls.")
             raise IngestionError("Failed to add urls to vectorstore.") from e
 
+    async def _ingest_urls(self, urls: list[str], vectorstore: VectorStore) -> IngestionStats:
+        langfuse_handler = CallbackHandler()
+
+        responses = await self._aextract(urls, langfuse_handler)
+
+        sources = [
+            IngestionSource(
+                name=url,
+                load=partial(_single_page, response.get("raw_content", "")),
+                source_type=SourceType.URL,
+            )
+            for url, response in responses.items()
+        ]
+        logger.info("Adding url text to vectorstore")
+        return await self._run_pipeline(sources, vectorstore)
@@ -0,0 +1,82 @@
+from langchain_core.documents import Document
+
+from app.schema.query import RouteDecision
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.tokens import content_terms
+
+logger = get_logger(__name__)
+
+
+def lexical_overlap(query: str, documents: list[Document]) -> float:
+    """Share of the query's content words found in any of `documents`."""
+    query_terms = content_terms(query)
+    if not query_terms:
+        # Nothing to compare, leave the decision to the scores
+        return 1.0
+    document_terms = set()
+    for document in documents:
+        document_terms |= content_terms(document.page_content)
+    return len(query_terms & document_terms) / len(query_terms)
+
+
+class QueryRouter:
+    """
+    Picks the retrieval route of a query before any LLM call.
+
+    Uses the similarity scores of the vector search and the lexical overlap
+    between the query and the retrieved chunks:
+    - a strong top score with enough overlap answers from the vectorstore only,
+    - no results, or a weak top score with little overlap, goes to the web only,
+    - anything in between tries the vectorstore and falls back to the web.
+    """
+
+    def __init__(
+        self,
+        vector_score_threshold: float = settings.QUERY_ROUTER_VECTOR_SCORE_THRESHOLD,
+        web_score_threshold: float = settings.QUERY_ROUTER_WEB_SCORE_THRESHOLD,
+        min_lexical_overlap: float = settings.QUERY_ROUTER_MIN_LEXICAL_OVERLAP,
+    ):
+        self.vector_score_threshold = vector_score_threshold
+        self.web_score_threshold = web_score_threshold
+        self.min_lexical_overlap = min_lexical_overlap
+        self._decisions = {decision.value: 0 for decision in RouteDecision}
+        self._fallbacks = 0
+
+    def route(self, query: str, results: list[tuple[Document, float]]) -> RouteDecision:
+        if not results:
+            decision = RouteDecision.WEB
+        else:
+            top_score = max(score for _, score in results)
+            overlap = lexical_overlap(query, [document for document, _ in results])
+
+            if top_score >= self.vector_score_threshold and overlap >= self.min_lexical_overlap:
+                decision = RouteDecision.VECTOR
+            elif top_score < self.web_score_threshold and overlap < self.min_lexical_overlap:
+                decision = RouteDecision.WEB
+            else:
+                decision = RouteDecision.BOTH
+            logger.info(
+                f"Routed query to {decision.value} "
+                f"(top score {top_score:.3f}, lexical overlap {overlap:.2f})"
+            )
+
+        self._decisions[decision.value] += 1
+        return decision
+
+    def record_fallback(self):
+        """Count a vector-only route whose answer was not found in the context."""
+        self._fallbacks += 1
+
+    def stats(self) -> dict:
+        return {"decisions": dict(self._decisions), "vector_fallbacks": self._fallbacks}
+
+
+_router: QueryRouter | None = None
+
+
+def get_query_router() -> QueryRouter:
+    global _router
+    if _router is None:
+        _router = QueryRouter()
+    return _router
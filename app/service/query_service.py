@@ -1,4 +1,6 @@
+import asyncio
 import json
+from typing import AsyncIterator, Awaitable, Callable
 from langchain_core.vectorstores import VectorStore
 from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import (
@@ -9,22 +11,47 @@ from langchain_core.prompts import (
 from langchain_core.tools import Tool
 from langchain.agents import create_agent
 from langchain_core.runnables import RunnableWithMessageHistory
-from langchain_tavily import TavilySearch
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from langfuse.langchain import CallbackHandler
 from langfuse import observe
 from operator import itemgetter
+from qdrant_client import AsyncQdrantClient
+import redis.asyncio as aioredis
 
 from app.core.prompt_manager import PromptManager
-from app.schema.query import QueryResponse, RAGResponse
-from app.exception import QueryError
+from app.schema.query import (
+    QueryResponse,
+    RAGResponse,
+    RouteDecision,
+    SearchFilter,
+    SpeculativeMode,
+)
+from app.exception import ProviderRateLimitError, QueryError
 from app.core.logging_config import get_logger
-from app.tools.query_tools import vector_search_tool, web_search_tool
+from app.tools.query_tools import (
+    avector_search_tool,
+    aweb_search_tool,
+    format_scored_results,
+    search_web,
+    vector_search_tool,
+    web_search_tool,
+)
 from app.core.db import get_session_history
+from app.core.history import get_async_session_history
 from app.core.config import settings
+from app.core.answer_cache import AnswerCache, get_answer_cache
+from app.core.singleflight import get_single_flight, normalize_query
+from app.core.search import asimilarity_search, build_filter, retriever_search_kwargs
+from app.core.rerank import arerank, candidate_count, rerank
+from app.core.metrics import timed
+from app.core.rate_limiter import is_rate_limit_error
+from app.service.chat_memory import ChatMemory
+from app.service.query_router import QueryRouter, get_query_router
 
 logger = get_logger(__name__)
 
+RATE_LIMITED_MESSAGE = "The language model provider is rate limiting, please retry in a moment."
+
 
 class QueryService:
     def __init__(self):
@@ -36,10 +63,7 @@ class QueryService:
         langfuse_handler: CallbackHandler,
     ) -> tuple[str, list[dict]]:
         logger.info("Performing Web Search")
-        tavily_retriever = TavilySearch(k=settings.WEB_SEARCH_TOP_K)
-        web_docs = tavily_retriever.invoke(
-            query, config={"callbacks": [langfuse_handler], "verbose": False}
-        )
+        web_docs = search_web(query, langfuse_handler)
         formatted_docs = []
         for i, doc in enumerate(web_docs.get("results", [])):
             formatted_docs.append(
@@ -66,23 +90,37 @@ class QueryService:
         logger.info("Performing Vector Search")
         retriever = vectorstore.as_retriever(
             search_type="similarity",
-            search_kwargs={
-                "k": settings.VECTOR_SEARCH_TOP_K,
-                "score_threshold": settings.VECTOR_SEARCH_SIMILARITY_THRESHOLD,
-            },
+            search_kwargs=retriever_search_kwargs(vectorstore, k=candidate_count()),
         )
-        docs = retriever.invoke(query, config={"callbacks": [langfuse_handler]})
-        formatted_docs = []
+        with timed("retrieval"):
+            docs = retriever.invoke(query, config={"callbacks": [langfuse_handler]})
 
-        for i, doc in enumerate(docs):
-            formatted_docs.append(f"Source ID: [{i + 1}]\nContent: {doc.page_content}")
+        return format_scored_results(rerank(query, [(doc, None) for doc in docs]))
 
-        context = "\n\n".join(formatted_docs)
+    def _build_prompt_template(self, prompt_manager: PromptManager) -> ChatPromptTemplate:
+        TEMPLATE_SYSTEM = prompt_manager.get_prompt("query_system")
+        TEMPLATE_HUMAN = prompt_manager.get_prompt("query")
 
-        sources = [
-            {"source_id": i + 1, **doc.model_dump()} for i, doc in enumerate(docs)
-        ]
-        return context, sources
+        return ChatPromptTemplate.from_messages(
+            [
+                ("system", TEMPLATE_SYSTEM),
+                MessagesPlaceholder(variable_name="chat_history"),
+                HumanMessagePromptTemplate.from_template(TEMPLATE_HUMAN),
+            ]
+        )
+
+    def _parse_agent_response(self, response_state: dict) -> tuple[str, list[dict]]:
+        final_answer = response_state['messages'][-1].content
+        sources = self._parse_tool_sources(response_state['messages'][-2])
+        return final_answer, sources
+
+    def _parse_tool_sources(self, message) -> list[dict]:
+        # Tools return (context, sources), serialized as a JSON list
+        try:
+            return json.loads(message.model_dump()['content'])[1]
+        except Exception as e:
+            logger.error(f"Failed to parse sources from agent response: {e}")
+            return []
 
     @observe()
     def query(
@@ -96,16 +134,7 @@ class QueryService:
         try:
             langfuse_handler = CallbackHandler()
 
-            TEMPLATE_SYSTEM = prompt_manager.get_prompt("query_system")
-            TEMPLATE_HUMAN = prompt_manager.get_prompt("query")
-
-            prompt_template = ChatPromptTemplate.from_messages(
-                [
-                    ("system", TEMPLATE_SYSTEM),
-                    MessagesPlaceholder(variable_name="chat_history"),
-                    HumanMessagePromptTemplate.from_template(TEMPLATE_HUMAN),
-                ]
-            )
+            prompt_template = self._build_prompt_template(prompt_manager)
 
             context, sources = self._vector_search(
                 query=query,
@@ -134,18 +163,12 @@ class QueryService:
             raise QueryError(str(e)) from e
         except Exception as e:
             logger.exception("Error occurred during query processing")
+            if is_rate_limit_error(e):
+                raise ProviderRateLimitError(RATE_LIMITED_MESSAGE) from e
             raise QueryError("An error occurred while processing the query.") from e
 
-    def _process_query(
-        self,
-        query: str,
-        context: str,
-        session_id: str,
-        llm: BaseChatModel,
-        langfuse_handler: CallbackHandler,
-        prompt_template: ChatPromptTemplate,
-    ):
-        chain = (
+    def _build_chain(self, llm: BaseChatModel, prompt_template: ChatPromptTemplate):
+        return (
             {
                 "context": itemgetter("context"),
                 "query": itemgetter("query"),
@@ -155,13 +178,32 @@ class QueryService:
             | llm.with_structured_output(RAGResponse)
         )
 
-        chain_with_history = RunnableWithMessageHistory(
-            runnable=chain,
-            get_session_history=get_session_history,
+    def _build_chain_with_history(
+        self,
+        llm: BaseChatModel,
+        prompt_template: ChatPromptTemplate,
+        history_factory,
+    ) -> RunnableWithMessageHistory:
+        return RunnableWithMessageHistory(
+            runnable=self._build_chain(llm, prompt_template),
+            get_session_history=history_factory,
             input_messages_key="query",
             history_messages_key="chat_history",
         )
 
+    def _process_query(
+        self,
+        query: str,
+        context: str,
+        session_id: str,
+        llm: BaseChatModel,
+        langfuse_handler: CallbackHandler,
+        prompt_template: ChatPromptTemplate,
+    ):
+        chain_with_history = self._build_chain_with_history(
+            llm, prompt_template, get_session_history
+        )
+
         response = chain_with_history.invoke(
             {"query": query, "context": context},
             config={
@@ -237,12 +279,7 @@ class QueryService:
                 },
             )
 
-            final_answer = response_state['messages'][-1].content
-            try:
-                sources = json.loads(response_state['messages'][-2].model_dump()['content'])[1]
-            except Exception as e:
-                logger.error(f"Failed to parse sources from agent response: {e}")
-                sources = []
+            final_answer, sources = self._parse_agent_response(response_state)
 
             history_obj.add_user_message(query)
             history_obj.add_ai_message(final_answer)
@@ -251,4 +288,487 @@ class QueryService:
             raise QueryError(str(e)) from e
         except Exception as e:
             logger.exception("Error occurred during query processing")
+            if is_rate_limit_error(e):
+                raise ProviderRateLimitError(RATE_LIMITED_MESSAGE) from e
+            raise QueryError("An error occurred while processing the query.") from e
+
+    async def _aanswer(
+        self,
+        query: str,
+        context: str,
+        chat_history: list[BaseMessage],
+        llm: BaseChatModel,
+        langfuse_handler: CallbackHandler,
+        prompt_template: ChatPromptTemplate,
+    ) -> RAGResponse:
+        """Answer from `context` without touching the stored history."""
+        chain = self._build_chain(llm, prompt_template)
+
+        with timed("generation"):
+            return await chain.ainvoke(
+                {"query": query, "context": context, "chat_history": chat_history},
+                config={"callbacks": [langfuse_handler], "verbose": False},
+            )
+
+    async def _aweb_answer(
+        self,
+        web_search: Awaitable[tuple[str, list[dict]]],
+        query: str,
+        chat_history: list[BaseMessage],
+        llm: BaseChatModel,
+        langfuse_handler: CallbackHandler,
+        prompt_template: ChatPromptTemplate,
+    ) -> tuple[RAGResponse, list[dict]]:
+        context, sources = await web_search
+        response = await self._aanswer(
+            query, context, chat_history, llm, langfuse_handler, prompt_template
+        )
+        return response, sources
+
+    @observe()
+    async def aquery(
+        self,
+        query: str,
+        session_id: str,
+        llm: BaseChatModel,
+        vectorstore: VectorStore,
+        prompt_manager: PromptManager,
+        async_client: AsyncQdrantClient,
+        redis_client: aioredis.Redis,
+        speculative_mode: SpeculativeMode = settings.QUERY_SPECULATIVE_MODE,
+        speculation_budget: float = settings.QUERY_SPECULATION_BUDGET_SECONDS,
+        router: QueryRouter | None = None,
+        filters: SearchFilter | None = None,
+    ) -> QueryResponse:
+        """
+        Async `query` built on the async Qdrant and Redis clients.
+
+        With `speculative_mode` the web search starts alongside the vector search
+        (`search`), or the whole web answer is computed alongside the vector answer
+        (`full`), so falling back to the web costs about one round trip instead of
+        two. Speculative work is cancelled when the vector answer is found. With
+        speculation running, after `speculation_budget` seconds the fallback is
+        abandoned and the vector answer is returned. Only the chosen answer is
+        written to the chat history.
+
+        A `router` (the shared one when QUERY_ROUTER_ENABLED) picks the route from
+        the search scores first: `vector` skips the web, `web` skips the vector
+        answer, `both` answers from the vectorstore and falls back to the web. A
+        `vector` route cancels the speculation, so a fallback after it is awaited.
+
+        `filters` restrict the vector search to matching chunks, e.g. one document.
+        """
+        if router is None and settings.QUERY_ROUTER_ENABLED:
+            router = get_query_router()
+        speculative = []
+        try:
+            langfuse_handler = CallbackHandler()
+            deadline = asyncio.get_running_loop().time() + speculation_budget
+
+            prompt_template = self._build_prompt_template(prompt_manager)
+
+            memory = self._chat_memory(session_id, redis_client, llm)
+            chat_history = await memory.aload()
+
+            web_search = web_answer = None
+            if speculative_mode != SpeculativeMode.OFF:
+                web_search = asyncio.create_task(
+                    aweb_search_tool(
+                        query=query, langfuse_handler=langfuse_handler, redis_client=redis_client
+                    )
+                )
+                speculative.append(web_search)
+            if speculative_mode == SpeculativeMode.FULL:
+                web_answer = asyncio.create_task(
+                    self._aweb_answer(
+                        web_search, query, chat_history, llm, langfuse_handler, prompt_template
+                    )
+                )
+                speculative.append(web_answer)
+
+            logger.info("Performing Vector Search")
+            results = await asimilarity_search(
+                vectorstore,
+                async_client,
+                query,
+                k=candidate_count(),
+                search_filter=build_filter(filters, vectorstore.metadata_payload_key),
+            )
+
+            decision = (
+                router.route(query, results[: settings.VECTOR_SEARCH_TOP_K])
+                if router
+                else RouteDecision.BOTH
+            )
+            context, sources = format_scored_results(await arerank(query, results))
+            if decision == RouteDecision.VECTOR:
+                for task in speculative:
+                    task.cancel()
+                web_search = web_answer = None
+
+            response = None
+            if decision != RouteDecision.WEB:
+                response = await self._aanswer(
+                    query, context, chat_history, llm, langfuse_handler, prompt_template
+                )
+                if not response.found_answer:
+                    logger.info(
+                        "Answer not found in vectorstore continuing with web search"
+                    )
+                    if decision == RouteDecision.VECTOR:
+                        router.record_fallback()
+
+            if response is None or not response.found_answer:
+                if web_answer is None:
+                    web_answer = self._aweb_answer(
+                        web_search
+                        or aweb_search_tool(
+                            query=query, langfuse_handler=langfuse_handler, redis_client=redis_client
+                        ),
+                        query, chat_history, llm, langfuse_handler, prompt_template,
+                    )
+                # The budget bounds speculation only. Without it (off, or cancelled
+                # by a `vector` route), or without a vector answer to return
+                # instead, wait for the web
+                timeout = (
+                    max(0.0, deadline - asyncio.get_running_loop().time())
+                    if response is not None and web_search is not None
+                    else None
+                )
+                try:
+                    response, sources = await asyncio.wait_for(web_answer, timeout)
+                except TimeoutError:
+                    logger.warning(
+                        f"Web search fallback exceeded the {speculation_budget}s budget, "
+                        "returning the vectorstore answer"
+                    )
+
+            await memory.aappend(
+                [HumanMessage(content=query), AIMessage(content=response.answer)]
+            )
+            return QueryResponse(answer=response.answer, sources=sources)
+        except ValueError as e:
+            raise QueryError(str(e)) from e
+        except Exception as e:
+            logger.exception("Error occurred during query processing")
+            if is_rate_limit_error(e):
+                raise ProviderRateLimitError(RATE_LIMITED_MESSAGE) from e
+            raise QueryError("An error occurred while processing the query.") from e
+        finally:
+            for task in speculative:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # A discarded branch may have failed, mark its error as handled
+                    task.exception()
+
+    def _chat_memory(
+        self, session_id: str, redis_client: aioredis.Redis, llm: BaseChatModel
+    ) -> ChatMemory:
+        return ChatMemory(
+            get_async_session_history(session_id, redis_client),
+            summary_llm=llm if settings.CHAT_HISTORY_SUMMARY_ENABLED else None,
+        )
+
+    async def acached_query(
+        self,
+        answer: Callable[..., Awaitable[QueryResponse]],
+        query: str,
+        session_id: str,
+        llm: BaseChatModel,
+        vectorstore: VectorStore,
+        redis_client: aioredis.Redis,
+        collection_version: str,
+        filters: SearchFilter | None = None,
+        bypass_cache: bool = False,
+        cache: AnswerCache | None = None,
+        **kwargs,
+    ) -> QueryResponse:
+        """
+        `answer` (`aquery` or `aquery_agentic`) behind the semantic answer cache,
+        the shared one when ANSWER_CACHE_ENABLED.
+
+        Only the first question of a session is looked up and stored, later ones
+        may refer to the conversation. A cached answer is still added to the chat
+        history. Identical questions (ignoring case and whitespace) arriving
+        while one is being answered wait for that answer. `bypass_cache` answers
+        without looking up, sharing or storing.
+        """
+        if cache is None and settings.ANSWER_CACHE_ENABLED:
+            cache = get_answer_cache()
+
+        async def run() -> QueryResponse:
+            return await answer(
+                query=query,
+                session_id=session_id,
+                llm=llm,
+                vectorstore=vectorstore,
+                redis_client=redis_client,
+                filters=filters,
+                **kwargs,
+            )
+
+        if cache is None:
+            return await run()
+        if bypass_cache:
+            cache.record_bypass()
+            return await run()
+
+        memory = self._chat_memory(session_id, redis_client, llm)
+        try:
+            follow_up = bool(await memory.aload())
+            if not follow_up:
+                # Read before answering, an ingestion finishing meanwhile outdates the answer
+                generation = await cache.ageneration(redis_client, vectorstore.collection_name)
+                # Served from the embedding cache when the search embeds the query again
+                vector = await vectorstore.embeddings.aembed_query(query)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed, answering without it: {e}")
+            return await run()
+        if follow_up:
+            return await run()
+
+        filters_key = filters.model_dump_json(exclude_none=True) if filters else None
+        cached = cache.get(collection_version, generation, filters_key, vector)
+        if cached is not None:
+            await self._asave_shared_answer(memory, query, cached)
+            return cached
+
+        answered_here = []
+
+        async def answer_and_store() -> QueryResponse:
+            answered_here.append(True)
+            response = await run()
+            cache.put(collection_version, generation, filters_key, vector, response)
+            return response
+
+        # The same question asked again while it is being answered shares the answer
+        response = await get_single_flight("answer").do(
+            (collection_version, generation, filters_key, normalize_query(query)),
+            answer_and_store,
+        )
+        if not answered_here:
+            await self._asave_shared_answer(memory, query, response)
+        return response
+
+    async def _asave_shared_answer(
+        self, memory: ChatMemory, query: str, response: QueryResponse
+    ):
+        """Add an answer computed for another request to this session's history."""
+        try:
+            await memory.aappend(
+                [HumanMessage(content=query), AIMessage(content=response.answer)]
+            )
+        except Exception as e:
+            logger.exception("Error occurred while saving a shared answer")
+            raise QueryError("An error occurred while processing the query.") from e
+
+    def _build_async_agent(
+        self,
+        llm: BaseChatModel,
+        vectorstore: VectorStore,
+        prompt_manager: PromptManager,
+        async_client: AsyncQdrantClient,
+        langfuse_handler: CallbackHandler,
+        filters: SearchFilter | None = None,
+        redis_client: aioredis.Redis | None = None,
+        retrieved: dict[str, tuple[str, list[dict]]] | None = None,
+    ):
+        """
+        Agent with the vector and web search tools. `retrieved` maps normalized
+        queries to vector search results already fetched, which the vector tool
+        returns instead of searching again.
+        """
+        TEMPLATE_SYSTEM = prompt_manager.get_prompt("query_system")
+        search_filter = build_filter(filters, vectorstore.metadata_payload_key)
+
+        async def vector_search(q: str) -> tuple[str, list[dict]]:
+            if retrieved and normalize_query(q) in retrieved:
+                return retrieved[normalize_query(q)]
+            return await avector_search_tool(
+                query=q,
+                vectorstore=vectorstore,
+                async_client=async_client,
+                search_filter=search_filter,
+            )
+
+        vector_tool = Tool(
+            name="VectorSearch",
+            func=None,
+            coroutine=vector_search,
+            description="Searches documents in the vectorstore and returns context and sources",
+        )
+
+        web_tool = Tool(
+            name="WebSearch",
+            func=None,
+            coroutine=lambda q: aweb_search_tool(
+                query=q, langfuse_handler=langfuse_handler, redis_client=redis_client
+            ),
+            description="Searches the web and returns top-K results with content and URLs",
+        )
+
+        return create_agent(
+            model=llm,
+            tools=[vector_tool, web_tool],
+            system_prompt=TEMPLATE_SYSTEM,
+        )
+
+    @observe()
+    async def aquery_agentic(
+        self,
+        query: str,
+        session_id: str,
+        llm: BaseChatModel,
+        vectorstore: VectorStore,
+        prompt_manager: PromptManager,
+        async_client: AsyncQdrantClient,
+        redis_client: aioredis.Redis,
+        filters: SearchFilter | None = None,
+    ) -> QueryResponse:
+        """
+        Async `query_agentic`. Tools, chat history and the agent all run on the
+        event loop, so a worker is not limited by its threadpool size.
+        """
+        try:
+            langfuse_handler = CallbackHandler()
+
+            memory = self._chat_memory(session_id, redis_client, llm)
+            past_messages = await memory.aload()
+
+            input_messages = past_messages + [HumanMessage(content=query)]
+
+            agent = self._build_async_agent(
+                llm, vectorstore, prompt_manager, async_client, langfuse_handler, filters,
+                redis_client,
+            )
+
+            response_state = await agent.ainvoke(
+                {"messages": input_messages},
+                config={
+                    "callbacks": [langfuse_handler],
+                },
+            )
+
+            final_answer, sources = self._parse_agent_response(response_state)
+
+            await memory.aappend(
+                [HumanMessage(content=query), AIMessage(content=final_answer)]
+            )
+            return QueryResponse(answer=final_answer, sources=sources)
+        except ValueError as e:
+            raise QueryError(str(e)) from e
+        except Exception as e:
+            logger.exception("Error occurred during query processing")
+            if is_rate_limit_error(e):
+                raise ProviderRateLimitError(RATE_LIMITED_MESSAGE) from e
             raise QueryError("An error occurred while processing the query.") from e
+
+    async def astream_agentic(
+        self,
+        query: str,
+        session_id: str,
+        llm: BaseChatModel,
+        vectorstore: VectorStore,
+        prompt_manager: PromptManager,
+        async_client: AsyncQdrantClient,
+        redis_client: aioredis.Redis,
+        filters: SearchFilter | None = None,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Streaming `aquery_agentic`. Yields (event, data) pairs as the agent runs:
+        `sources` first with the vector search results for the query, `tool`
+        when a tool call starts or finishes (with its sources once it does),
+        `token` for each piece of answer text, and a final `done` with the full
+        answer. The vector search runs before the agent, so the sources precede
+        any tool progress and the first token, and the agent's VectorSearch
+        call for the same query reuses it. History is saved after the stream.
+        """
+        try:
+            langfuse_handler = CallbackHandler()
+
+            memory = self._chat_memory(session_id, redis_client, llm)
+            past_messages = await memory.aload()
+
+            input_messages = past_messages + [HumanMessage(content=query)]
+
+            retrieved = await avector_search_tool(
+                query=query,
+                vectorstore=vectorstore,
+                async_client=async_client,
+                search_filter=build_filter(filters, vectorstore.metadata_payload_key),
+            )
+            sources = retrieved[1]
+            yield "sources", {"sources": sources}
+
+            agent = self._build_async_agent(
+                llm, vectorstore, prompt_manager, async_client, langfuse_handler, filters,
+                redis_client, {normalize_query(query): retrieved},
+            )
+
+            tokens = []
+            final_answer = None
+            async for mode, payload in agent.astream(
+                {"messages": input_messages},
+                config={"callbacks": [langfuse_handler]},
+                stream_mode=["updates", "messages"],
+            ):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    # Answer text only, tool call arguments are reported as `tool` events
+                    if (
+                        metadata.get("langgraph_node") == "model"
+                        and isinstance(chunk, AIMessage)
+                        and not chunk.tool_calls
+                        and not getattr(chunk, "tool_call_chunks", None)
+                    ):
+                        text = _message_text(chunk.content)
+                        if text:
+                            tokens.append(text)
+                            yield "token", {"text": text}
+                    continue
+
+                for update in payload.values():
+                    for message in (update or {}).get("messages", []):
+                        if isinstance(message, AIMessage) and message.tool_calls:
+                            for tool_call in message.tool_calls:
+                                yield "tool", {
+                                    "name": tool_call["name"],
+                                    "status": "started",
+                                    "args": tool_call["args"],
+                                }
+                        elif isinstance(message, AIMessage):
+                            final_answer = _message_text(message.content)
+                        elif isinstance(message, ToolMessage):
+                            sources = self._parse_tool_sources(message)
+                            yield "tool", {
+                                "name": message.name,
+                                "status": "completed",
+                                "sources": sources,
+                            }
+
+            if final_answer is None:
+                final_answer = "".join(tokens)
+
+            await memory.aappend(
+                [HumanMessage(content=query), AIMessage(content=final_answer)]
+            )
+            yield "done", QueryResponse(answer=final_answer, sources=sources).model_dump()
+        except Exception as e:
+            # The response has already started, report the failure in-stream
+            logger.exception("Error occurred during streaming query processing")
+            if is_rate_limit_error(e):
+                yield "error", {"message": RATE_LIMITED_MESSAGE}
+            else:
+                yield "error", {"message": "An error occurred while processing the query."}
+
+
+def _message_text(content) -> str:
+    """Text of a message content, which is a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
@@ -0,0 +1,252 @@
+import asyncio
+from functools import partial
+from typing import Callable, Iterator
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient, models
+
+from app.schema.ingest import SourceType
+from app.schema.llm import EmbeddingProvider, RateLimitLane
+from app.core.config import settings
+from app.core.db import (
+    collection_embedding,
+    create_collection_qdrant,
+    get_vectorstore,
+    new_collection_version,
+    resolve_collection,
+    swap_alias,
+)
+from app.core.sparse import is_hybrid_collection
+from app.core.logging_config import get_logger
+from app.core.rate_limiter import rate_limit_lane
+from app.core.registry import ClientRegistry
+from app.service.chunker import PageAwareChunker
+from app.service.ingestion_pipeline import IngestionPipeline, IngestionSource, IngestionStats
+
+logger = get_logger(__name__)
+
+# Chunk metadata set by the chunker, everything else is carried over
+_CHUNKER_FIELDS = ("source", "page", "start_index")
+
+
+class StoredDocuments:
+    """
+    Reads the documents of a collection back from its stored chunks.
+
+    Chunks of a source are laid out at their `start_index`, so overlaps
+    collapse and the whitespace trimmed between chunks comes back as newlines.
+    A page starts where its first chunk does, so rechunked text keeps its page
+    numbers. Other chunk metadata (source_type, ingested_at, ...) is carried
+    over to the new chunks.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        content_payload_key: str = "page_content",
+        metadata_payload_key: str = "metadata",
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.content_payload_key = content_payload_key
+        self.metadata_payload_key = metadata_payload_key
+        self._metadata: dict[str, dict] = {}
+
+    def _scroll(self, scroll_filter: models.Filter | None, with_payload) -> Iterator:
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=256,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False,
+            )
+            yield from points
+            if offset is None:
+                return
+
+    def sources(self) -> list[str]:
+        sources = set()
+        for point in self._scroll(None, [f"{self.metadata_payload_key}.source"]):
+            source = ((point.payload or {}).get(self.metadata_payload_key) or {}).get("source")
+            if source:
+                sources.add(source)
+        return sorted(sources)
+
+    def load(self, source: str) -> list[tuple[int, str]]:
+        """(page, text) pairs of `source`, rebuilt from its chunks."""
+        source_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"{self.metadata_payload_key}.source",
+                    match=models.MatchValue(value=source),
+                )
+            ]
+        )
+        chunks = []
+        for point in self._scroll(source_filter, True):
+            payload = point.payload or {}
+            chunks.append(
+                (
+                    payload.get(self.metadata_payload_key) or {},
+                    payload.get(self.content_payload_key, ""),
+                )
+            )
+        if not chunks:
+            return []
+
+        extra = {
+            key: value
+            for key, value in chunks[0][0].items()
+            if key not in _CHUNKER_FIELDS
+        }
+        if "source_type" not in extra:
+            is_url = source.startswith(("http://", "https://"))
+            extra["source_type"] = (SourceType.URL if is_url else SourceType.FILE).value
+        self._metadata[source] = extra
+        return _rebuild_pages(chunks)
+
+    def chunker(
+        self, chunker: PageAwareChunker
+    ) -> Callable[[list[tuple[int, str]], str], Iterator[Document]]:
+        """IngestionPipeline `chunk` callable that carries over the stored metadata."""
+
+        def chunk(pages: list[tuple[int, str]], source: str) -> Iterator[Document]:
+            extra = self._metadata.pop(source, {})
+            for document in chunker.split(pages, source):
+                document.metadata.update(extra)
+                yield document
+
+        return chunk
+
+
+def _rebuild_pages(chunks: list[tuple[dict, str]]) -> list[tuple[int, str]]:
+    positioned = sorted(
+        (chunk for chunk in chunks if isinstance(chunk[0].get("start_index"), int)),
+        key=lambda chunk: chunk[0]["start_index"],
+    )
+    pages: list[tuple[int, list[str]]] = []
+    end = 0
+    for metadata, text in positioned:
+        start = metadata["start_index"]
+        page = metadata.get("page", 1)
+        if start + len(text) <= end:
+            continue
+        # Keep document offsets, the gap was whitespace trimmed by the splitter
+        new_text = "\n" * (start - end) + text if start >= end else text[end - start :]
+        if not pages or pages[-1][0] != page:
+            pages.append((page, []))
+        pages[-1][1].append(new_text)
+        end = start + len(text)
+
+    rebuilt = [(page, "".join(parts)) for page, parts in pages]
+    # Chunks without an offset are kept as they are
+    rebuilt += [
+        (metadata.get("page", 1), text)
+        for metadata, text in chunks
+        if not isinstance(metadata.get("start_index"), int)
+    ]
+    return rebuilt
+
+
+class ReindexService:
+    """
+    Rebuilds a collection with new chunking, embedding model or storage options
+    while the current one keeps serving queries.
+
+    The new version is created next to the current collection and filled from
+    the chunk text already stored there, so no document is parsed again; chunks
+    are re-embedded in parallel batches bounded by the ingestion settings.
+    The collection name, an alias, is then moved to the new version in one
+    atomic update and the old version is deleted. Ingestion into the collection
+    is held back meanwhile, see `collection_reindex`.
+    """
+
+    async def reindex(
+        self,
+        collection_name: str,
+        client: QdrantClient,
+        registry: ClientRegistry,
+        stats: IngestionStats | None = None,
+        chunk_size: int = settings.CHUNK_SIZE,
+        chunk_overlap: int = settings.CHUNK_OVERLAP,
+        embedding_provider: EmbeddingProvider | None = None,
+        embedding_model_name: str | None = None,
+        dimensions: int | None = None,
+        **collection_options,
+    ) -> str:
+        """
+        Rebuild `collection_name` and return the name of its new version.
+
+        The embedding model, its size and hybrid search default to the current
+        collection's, other storage options (see create_collection_qdrant) to
+        the COLLECTION_* settings. Callers hold `collection_reindex` of the
+        collection, chunks ingested meanwhile would go to the old version.
+        """
+        current = await asyncio.to_thread(resolve_collection, client, collection_name)
+        info = await asyncio.to_thread(client.get_collection, current)
+        current_provider, current_model, current_dimensions = collection_embedding(info)
+        provider = embedding_provider or current_provider
+        model = embedding_model_name or current_model
+        if dimensions is None and (provider, model) == (current_provider, current_model):
+            dimensions = current_dimensions
+        collection_options.setdefault("hybrid", is_hybrid_collection(info))
+
+        version = new_collection_version(collection_name)
+        logger.info(f"Reindexing {collection_name} ({current}) into {version}")
+        await asyncio.to_thread(
+            partial(
+                create_collection_qdrant,
+                version,
+                client=client,
+                embedding_function=registry.get_embedding_function(provider, model),
+                dimensions=dimensions,
+                embedding_provider=provider,
+                embedding_model=model,
+                alias=False,
+                **collection_options,
+            )
+        )
+        try:
+            vectorstore = await asyncio.to_thread(
+                get_vectorstore,
+                settings.VECTOR_DB,
+                provider,
+                version,
+                model,
+                client=client,
+                embedding_function=registry.get_embedding_function(provider, model, dimensions),
+            )
+            stored = StoredDocuments(client, current)
+            sources = [
+                IngestionSource(name=source, load=partial(stored.load, source))
+                for source in await asyncio.to_thread(stored.sources)
+            ]
+            pipeline = IngestionPipeline(
+                vectorstore=vectorstore,
+                chunk=stored.chunker(PageAwareChunker(chunk_size, chunk_overlap)),
+                stats=stats,
+                # Ids as if ingested under the alias, so re-ingestion keeps matching
+                point_id_namespace=collection_name,
+            )
+            with rate_limit_lane(RateLimitLane.BULK):
+                await pipeline.run(sources)
+        except BaseException:
+            logger.exception(f"Reindexing {collection_name} failed, dropping {version}")
+            await asyncio.to_thread(client.delete_collection, version)
+            raise
+
+        if current == collection_name:
+            # Created before aliases, the collection has to go before an alias can
+            # take its name, queries fail until the alias exists
+            logger.warning(f"Replacing {collection_name} by an alias of {version}")
+            await asyncio.to_thread(client.delete_collection, current)
+            await asyncio.to_thread(swap_alias, client, collection_name, version)
+        else:
+            await asyncio.to_thread(swap_alias, client, collection_name, version)
+            await asyncio.to_thread(client.delete_collection, current)
+        registry.evict_collection(collection_name)
+        logger.info(f"Reindexed {collection_name} into {version}")
+        return version
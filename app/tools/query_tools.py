@@ -2,14 +2,71 @@ from langchain_core.vectorstores import VectorStore
 from langchain_core.callbacks.base import BaseCallbackHandler
 from langchain_core.documents import Document
 from langchain_tavily import TavilySearch
+from qdrant_client import AsyncQdrantClient, models
+import redis.asyncio as aioredis
 from app.core.logging_config import get_logger
 from app.core.config import settings
+from app.core.db import get_redis_client
+from app.core.web_cache import get_web_search_cache
+from app.core.singleflight import get_single_flight, normalize_query
+from app.core.search import asimilarity_search, retriever_search_kwargs
+from app.core.context_packer import get_context_packer
+from app.core.metrics import timed
+from app.core.rerank import arerank, candidate_count, rerank
 
 logger = get_logger(__name__)
 
 
+def format_vector_results(
+    docs: list[Document], scores: list[float] | None = None
+) -> tuple[str, list[dict]]:
+    """Context and sources for ranked `docs`, packed when CONTEXT_PACKING_ENABLED."""
+    if settings.CONTEXT_PACKING_ENABLED:
+        with timed("context_packing"):
+            docs = get_context_packer().pack(docs, scores)
+
+    # Format context for LLM
+    formatted_docs = [
+        f"Source ID: [{i + 1}]\nContent: {doc.page_content}"
+        for i, doc in enumerate(docs)
+    ]
+    context = "\n\n".join(formatted_docs)
+
+    # Build structured source metadata
+    sources = [{"source_id": i + 1, **doc.model_dump()} for i, doc in enumerate(docs)]
+
+    return context, sources
+
+
+def _format_web_results(results: list[dict]) -> tuple[str, list[dict]]:
+    # Format context for LLM
+    formatted_docs = [
+        f"Source ID: [{i + 1}]\nTitle: {doc.get('title', '')}\nContent: {doc.get('content', '')}"
+        for i, doc in enumerate(results)
+    ]
+    context = "\n\n".join(formatted_docs)
+
+    # Build structured source metadata
+    sources = [
+        {
+            "source_id": i + 1,
+            "metadata": {
+                "source": doc.get("url", ""),
+                "title": doc.get("title", ""),
+            },
+            "type": "websearch",
+        }
+        for i, doc in enumerate(results)
+    ]
+
+    return context, sources
+
+
 def vector_search_tool(
-    query: str, vectorstore: VectorStore, langfuse_handler: BaseCallbackHandler
+    query: str,
+    vectorstore: VectorStore,
+    langfuse_handler: BaseCallbackHandler,
+    search_filter: models.Filter | None = None,
 ) -> tuple[str, list[dict]]:
     """
     Tool for LangChain agent or direct LLM call to perform a vector search.
@@ -21,28 +78,44 @@ def vector_search_tool(
 
     retriever = vectorstore.as_retriever(
         search_type="similarity",
-        search_kwargs={
-            "k": settings.VECTOR_SEARCH_TOP_K,
-            "score_threshold": settings.VECTOR_SEARCH_SIMILARITY_THRESHOLD,
-        },
+        search_kwargs=retriever_search_kwargs(
+            vectorstore, k=candidate_count(), search_filter=search_filter
+        ),
     )
 
     # Invoke retriever with Langfuse callback for metrics
-    docs: list[Document] = retriever.invoke(
-        query, config={"callbacks": [langfuse_handler]}
+    with timed("retrieval"):
+        docs: list[Document] = retriever.invoke(
+            query, config={"callbacks": [langfuse_handler]}
+        )
+
+    return format_scored_results(rerank(query, [(doc, None) for doc in docs]))
+
+
+async def avector_search_tool(
+    query: str,
+    vectorstore: VectorStore,
+    async_client: AsyncQdrantClient,
+    search_filter: models.Filter | None = None,
+) -> tuple[str, list[dict]]:
+    """Async `vector_search_tool` using the async Qdrant client."""
+    logger.info("Performing Vector Search Tool call")
+
+    results = await asimilarity_search(
+        vectorstore, async_client, query, k=candidate_count(), search_filter=search_filter
     )
 
-    # Format context for LLM
-    formatted_docs = [
-        f"Source ID: [{i + 1}]\nContent: {doc.page_content}"
-        for i, doc in enumerate(docs)
-    ]
-    context = "\n\n".join(formatted_docs)
+    return format_scored_results(await arerank(query, results))
 
-    # Build structured source metadata
-    sources = [{"source_id": i + 1, **doc.model_dump()} for i, doc in enumerate(docs)]
 
-    return context, sources
+def format_scored_results(
+    results: list[tuple[Document, float | None]],
+) -> tuple[str, list[dict]]:
+    """Context and sources for ranked (document, score) pairs, scores may be None."""
+    scores = [score for _, score in results]
+    return format_vector_results(
+        [doc for doc, _ in results], None if None in scores else scores
+    )
 
 
 def web_search_tool(
@@ -58,33 +131,60 @@ def web_search_tool(
     """
     logger.info("Performing Web Search Tool call")
 
+    web_docs = search_web(query, langfuse_handler)
+
+    return _format_web_results(web_docs.get("results", []))
+
+
+async def aweb_search_tool(
+    query: str,
+    langfuse_handler: BaseCallbackHandler,
+    redis_client: aioredis.Redis | None = None,
+) -> tuple[str, list[dict]]:
+    """Async `web_search_tool`, results are cached only with a `redis_client`."""
+    logger.info("Performing Web Search Tool call")
+
+    web_docs = await asearch_web(query, langfuse_handler, redis_client)
+
+    return _format_web_results(web_docs.get("results", []))
+
+
+def _web_search_name(query: str) -> str:
+    return f"{settings.WEB_SEARCH_TOP_K}:{normalize_query(query)}"
+
+
+def search_web(query: str, langfuse_handler: BaseCallbackHandler) -> dict:
+    """Tavily search response for `query`, cached in Redis when WEB_CACHE_ENABLED."""
     tavily_retriever = TavilySearch(k=settings.WEB_SEARCH_TOP_K)
 
-    # Invoke the web search with Langfuse callback
-    web_docs: dict[str, list[dict]] = tavily_retriever.invoke(
-        query, config={"callbacks": [langfuse_handler], "verbose": False}
-    )
+    def search() -> dict:
+        # Invoke the web search with Langfuse callback
+        return tavily_retriever.invoke(
+            query, config={"callbacks": [langfuse_handler], "verbose": False}
+        )
 
-    results = web_docs.get("results", [])
+    if not settings.WEB_CACHE_ENABLED:
+        return search()
+    return get_web_search_cache().fetch(get_redis_client(), _web_search_name(query), search)
 
-    # Format context for LLM
-    formatted_docs = [
-        f"Source ID: [{i + 1}]\nTitle: {doc.get('title', '')}\nContent: {doc.get('content', '')}"
-        for i, doc in enumerate(results)
-    ]
-    context = "\n\n".join(formatted_docs)
 
-    # Build structured source metadata
-    sources = [
-        {
-            "source_id": i + 1,
-            "metadata": {
-                "source": doc.get("url", ""),
-                "title": doc.get("title", ""),
-            },
-            "type": "websearch",
-        }
-        for i, doc in enumerate(results)
-    ]
+async def asearch_web(
+    query: str,
+    langfuse_handler: BaseCallbackHandler,
+    redis_client: aioredis.Redis | None = None,
+) -> dict:
+    """Async `search_web`, cached only with a `redis_client`."""
+    tavily_retriever = TavilySearch(k=settings.WEB_SEARCH_TOP_K)
 
-    return context, sources
+    async def search() -> dict:
+        return await tavily_retriever.ainvoke(
+            query, config={"callbacks": [langfuse_handler], "verbose": False}
+        )
+
+    if not settings.WEB_CACHE_ENABLED or redis_client is None:
+        return await search()
+    name = _web_search_name(query)
+    # The same search running concurrently in this worker looks up and loads once
+    return await get_single_flight("web_search").do(
+        name, lambda: get_web_search_cache().afetch(redis_client, name, search)
+    )
@@ -0,0 +1,103 @@
+"""
+Throughput and peak memory of the streaming PageAwareChunker against the
+previous whole-document implementation of IngestionService._chunk.
+
+Usage: python -m benchmarks.bench_chunker [--pages 1000] [--page-chars 3000]
+"""
+import argparse
+import bisect
+import random
+import time
+import tracemalloc
+from typing import Callable, Iterable
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.config import settings
+from app.service.chunker import PageAwareChunker, SEPARATORS
+
+WORDS = "the quick brown fox jumps over lazy dog retrieval vector chunk page".split()
+
+
+def legacy_chunk(pages: list[tuple[int, str]], source: str):
+    """The implementation PageAwareChunker replaced, kept as the baseline."""
+    full_text = ""
+    page_boundaries = []
+
+    current_char_index = 0
+    for page_number, page_text in pages:
+        page_boundaries.append(current_char_index)
+        full_text += page_text
+        current_char_index += len(page_text)
+
+    splitter = RecursiveCharacterTextSplitter(
+        separators=SEPARATORS,
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        add_start_index=True,
+    )
+    chunks = splitter.create_documents([full_text])
+
+    for chunk in chunks:
+        page_index = bisect.bisect_right(page_boundaries, chunk.metadata["start_index"]) - 1
+        chunk.metadata["source"] = source
+        chunk.metadata["page"] = pages[page_index][0]
+    return chunks
+
+
+def generate_pages(n_pages: int, page_chars: int, seed: int = 0) -> Iterable[tuple[int, str]]:
+    rng = random.Random(seed)
+    for page_number in range(1, n_pages + 1):
+        paragraphs, length = [], 0
+        while length < page_chars:
+            sentence = " ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + ". "
+            if rng.random() < 0.1:
+                sentence += "\n\n"
+            paragraphs.append(sentence)
+            length += len(sentence)
+        yield page_number, "".join(paragraphs)
+
+
+def measure(name: str, run: Callable[[], int], total_chars: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    n_chunks = run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<10} chunks={n_chunks:<7} time={elapsed:7.3f}s "
+        f"throughput={total_chars / elapsed / 1e6:6.2f} MB/s peak={peak / 1e6:8.2f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--page-chars", type=int, default=3000)
+    args = parser.parse_args()
+
+    total_chars = sum(len(text) for _, text in generate_pages(args.pages, args.page_chars))
+    print(f"{args.pages} pages, {total_chars / 1e6:.1f}M characters")
+
+    # The legacy chunker needs the whole document up front, the streaming one
+    # consumes pages lazily and never holds more than its window
+    measure(
+        "legacy",
+        lambda: len(legacy_chunk(list(generate_pages(args.pages, args.page_chars)), "bench")),
+        total_chars,
+    )
+    measure(
+        "streaming",
+        lambda: sum(
+            1
+            for _ in PageAwareChunker().split(
+                generate_pages(args.pages, args.page_chars), "bench"
+            )
+        ),
+        total_chars,
+    )
+
+
+if __name__ == "__main__":
+    main()
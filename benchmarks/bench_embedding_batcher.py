@@ -0,0 +1,121 @@
+"""
+Latency and throughput of query embeddings sent one request each against
+batched by QueryEmbeddingBatcher, at several arrival rates.
+
+The provider is a local fake with a fixed latency per request, a small cost
+per text and a requests-per-second limit, like the per-request quotas of
+hosted embedding APIs: requests beyond the limit queue for the next slot.
+Queries arrive at a steady rate, each from its own task like concurrent
+/chat requests.
+
+Usage: python -m benchmarks.bench_embedding_batcher [--queries 2000]
+       [--qps 20 100 500 2000] [--latency-ms 40] [--rps 50] [--max-batch 64]
+       [--max-wait-ms 2 5] [--max-in-flight 4]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import zlib
+
+from app.core.embedding_batcher import QueryEmbeddingBatcher
+
+
+class FakeProvider:
+    """Embedding endpoint with a per-request latency and a request rate limit."""
+
+    def __init__(self, latency: float, per_text: float, requests_per_second: float):
+        self.latency = latency
+        self.per_text = per_text
+        self.interval = 1 / requests_per_second
+        self.requests = 0
+        self._next_slot = 0.0
+
+    async def _request(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        await asyncio.sleep(slot - now + self.latency + self.per_text * len(texts))
+        self.requests += 1
+        return [[float(zlib.crc32(text.encode("utf-8")) % 997)] for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self._request([text]))[0]
+
+    async def aembed_batch(self, texts: list[str]) -> list[list[float]]:
+        return await self._request(texts)
+
+
+async def run(embed, queries: int, qps: float) -> tuple[list[float], float]:
+    latencies = []
+
+    async def query(i: int):
+        started = time.perf_counter()
+        await embed(f"question number {i}")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(queries):
+        # Steady arrivals, sleeping only when ahead of schedule
+        delay = started + i / qps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(query(i)))
+    await asyncio.gather(*tasks)
+    return latencies, queries / (time.perf_counter() - started)
+
+
+def report(name: str, latencies: list[float], throughput: float, requests: int):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(
+        f"  {name:<16} {throughput:8.1f} q/s  p50 {p50:8.1f} ms  p95 {p95:8.1f} ms  "
+        f"mean {statistics.mean(latencies) * 1000:8.1f} ms  {requests:5d} provider requests"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--qps", type=float, nargs="+", default=[20, 100, 500, 2000])
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--per-text-ms", type=float, default=0.2)
+    parser.add_argument("--rps", type=float, default=50, help="provider requests per second")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[2, 5])
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    def provider() -> FakeProvider:
+        return FakeProvider(args.latency_ms / 1000, args.per_text_ms / 1000, args.rps)
+
+    print(
+        f"{args.queries} queries, provider {args.latency_ms} ms per request "
+        f"+ {args.per_text_ms} ms per text, limited to {args.rps} requests/s"
+    )
+    for qps in args.qps:
+        # Keep each run short at low rates
+        queries = min(args.queries, int(qps * 10))
+        print(f"{qps:g} queries/s ({queries} queries)")
+
+        fake = provider()
+        latencies, throughput = await run(fake.aembed_query, queries, qps)
+        report("one per request", latencies, throughput, fake.requests)
+
+        for max_wait_ms in args.max_wait_ms:
+            fake = provider()
+            batcher = QueryEmbeddingBatcher(
+                fake.aembed_batch,
+                max_batch=args.max_batch,
+                max_wait_seconds=max_wait_ms / 1000,
+                max_in_flight=args.max_in_flight,
+            )
+            latencies, throughput = await run(batcher.embed, queries, qps)
+            report(f"batched {max_wait_ms:g} ms", latencies, throughput, fake.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
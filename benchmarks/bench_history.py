@@ -0,0 +1,96 @@
+"""
+Memory per chat session of the compact history layout against the JSON layout
+of RedisChatMessageHistory.
+
+Without --redis the stored value bytes are compared. With --redis both layouts
+are written to that server under a throwaway session id and measured with
+MEMORY USAGE, which includes Redis' own overhead.
+
+Usage: python -m benchmarks.bench_history [--turns 100] [--redis redis://localhost:6379]
+"""
+import argparse
+import json
+import random
+import uuid
+
+import redis
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, message_to_dict
+
+from app.core.history import CompactRedisChatMessageHistory, encode_message
+
+WORDS = (
+    "the document says invoice total amount page section policy customer order "
+    "shipping date contract clause renewal refund product warranty support"
+).split()
+
+
+def generate_session(turns: int, seed: int = 0) -> list[BaseMessage]:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(turns):
+        question = " ".join(rng.choices(WORDS, k=rng.randint(6, 25))) + "?"
+        answer = " ".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + f" [{i + 1}]."
+            for i in range(rng.randint(2, 8))
+        )
+        messages += [HumanMessage(content=question), AIMessage(content=answer)]
+    return messages
+
+
+def legacy_items(messages: list[BaseMessage]) -> list[bytes]:
+    return [json.dumps(message_to_dict(message)).encode("utf-8") for message in messages]
+
+
+def compact_items(messages: list[BaseMessage]) -> list[bytes]:
+    return [encode_message(message) for message in messages]
+
+
+def report(name: str, size: int, messages: int, baseline: int | None = None):
+    ratio = f" ({size / baseline:5.1%} of legacy)" if baseline else ""
+    print(f"{name:<8} {size / 1024:9.1f} KiB  {size / messages:7.1f} B/message{ratio}")
+
+
+def measure_redis(url: str, messages: list[BaseMessage]) -> tuple[int, int]:
+    client = redis.Redis.from_url(url)
+    session_id = f"bench-{uuid.uuid4()}"
+    legacy_key = f"message_store:{session_id}"
+    history = CompactRedisChatMessageHistory(
+        session_id, client, ttl=None, max_messages=len(messages)
+    )
+    try:
+        # Compact first, its first write would otherwise migrate the legacy list
+        history.add_messages(messages)
+        client.lpush(legacy_key, *legacy_items(messages))
+        legacy = client.memory_usage(legacy_key, samples=0)
+        compact = client.memory_usage(history.key, samples=0) + client.memory_usage(
+            history.meta_key, samples=0
+        )
+        return legacy, compact
+    finally:
+        client.delete(legacy_key, history.key, history.meta_key)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--redis", help="Redis URL to measure MEMORY USAGE on")
+    args = parser.parse_args()
+
+    messages = generate_session(args.turns)
+    print(f"{args.turns} turns, {len(messages)} messages")
+
+    legacy = sum(len(item) for item in legacy_items(messages))
+    compact = sum(len(item) for item in compact_items(messages))
+    print("Stored value bytes")
+    report("legacy", legacy, len(messages))
+    report("compact", compact, len(messages), legacy)
+
+    if args.redis:
+        legacy, compact = measure_redis(args.redis, messages)
+        print("Redis MEMORY USAGE")
+        report("legacy", legacy, len(messages))
+        report("compact", compact, len(messages), legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Recall@k and query latency of hybrid (dense + BM25, RRF fused) collections
+against dense-only collections.
+
+The corpus is synthetic product documents, each with a part number. Two query
+sets are run: exact part number lookups, and descriptions reworded from the
+documents.
+
+By default Qdrant runs in memory and dense vectors come from HashingEmbeddings,
+a local stand-in that, like most semantic models, does not capture rare
+identifiers. Pass --embeddings configured to embed with EMBEDDING_PROVIDER and
+--url to benchmark against a Qdrant server.
+
+Usage: python -m benchmarks.bench_hybrid [--docs 2000] [--queries 200] [--k 5]
+       [--embeddings hashing|configured] [--url http://localhost:6333]
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+import uuid
+import zlib
+
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+
+from app.core.config import settings
+from app.core.db import create_collection_qdrant, delete_collection_qdrant, get_vectorstore
+from app.core.llm import get_embedding_function
+from app.schema.db import VectorDB
+
+WORDS = (
+    "compact industrial pump valve sensor bracket motor housing steel aluminium "
+    "waterproof outdoor heavy duty lightweight silent wireless battery charger cable "
+    "adapter filter hose clamp gear bearing seal thermostat controller display panel"
+).split()
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag of hashed alphabetic words, projected to `size` signed dimensions."""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            word = word.strip(".,?:")
+            if not word.isalpha():
+                continue
+            digest = zlib.crc32(word.encode("utf-8"))
+            vector[digest % self.size] += 1.0 if digest & 1 << 31 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def generate_corpus(n_docs: int, rng: random.Random) -> list[tuple[str, list[str], str]]:
+    corpus = []
+    for i in range(n_docs):
+        code = f"{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}-{10000 + i}"
+        description = rng.sample(WORDS, 8)
+        text = (
+            f"Part {code}: {' '.join(description)}. "
+            f"Warranty {rng.randint(1, 5)} years, ships in {rng.randint(1, 30)} days."
+        )
+        corpus.append((code, description, text))
+    return corpus
+
+
+def generate_queries(corpus, n_queries: int, rng: random.Random):
+    code_queries, description_queries = [], []
+    for index in rng.sample(range(len(corpus)), n_queries):
+        code, description, _ = corpus[index]
+        code_queries.append((f"What is the warranty for {code}?", index))
+        words = rng.sample(description, 5)
+        description_queries.append((f"Looking for a {' '.join(words)}", index))
+    return code_queries, description_queries
+
+
+def run_queries(vectorstore, queries, ids, k: int) -> tuple[float, float]:
+    hits, latencies = 0, []
+    for query, index in queries:
+        started = time.perf_counter()
+        results = vectorstore.similarity_search(query, k=k)
+        latencies.append(time.perf_counter() - started)
+        hits += any(document.metadata["_id"] == ids[index] for document in results)
+    return hits / len(queries), statistics.mean(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embeddings", choices=["hashing", "configured"], default="hashing")
+    parser.add_argument("--url", help="Qdrant URL, in memory when omitted")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = generate_corpus(args.docs, rng)
+    code_queries, description_queries = generate_queries(corpus, args.queries, rng)
+    ids = [str(uuid.uuid4()) for _ in corpus]
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(location=":memory:")
+    if args.embeddings == "configured":
+        embeddings = get_embedding_function(
+            settings.EMBEDDING_PROVIDER, settings.EMBEDDING_MODEL_NAME
+        )
+    else:
+        embeddings = HashingEmbeddings()
+
+    print(f"{args.docs} documents, {args.queries} queries per set, recall@{args.k}")
+    for mode, hybrid in (("dense", False), ("hybrid", True)):
+        collection_name = f"bench-{mode}-{uuid.uuid4().hex[:8]}"
+        create_collection_qdrant(
+            collection_name, client=client, embedding_function=embeddings, hybrid=hybrid
+        )
+        try:
+            vectorstore = get_vectorstore(
+                VectorDB.QDRANT,
+                settings.EMBEDDING_PROVIDER,
+                collection_name,
+                settings.EMBEDDING_MODEL_NAME,
+                client=client,
+                embedding_function=embeddings,
+            )
+            vectorstore.add_texts(
+                [text for _, _, text in corpus],
+                metadatas=[{"source": code} for code, _, _ in corpus],
+                ids=ids,
+            )
+            for name, queries in (("part number", code_queries), ("description", description_queries)):
+                recall, latency = run_queries(vectorstore, queries, ids, args.k)
+                print(f"{mode:<7} {name:<12} recall={recall:6.1%} latency={latency:7.2f} ms")
+        finally:
+            delete_collection_qdrant(collection_name, client)
+
+
+if __name__ == "__main__":
+    main()
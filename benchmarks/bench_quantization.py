@@ -0,0 +1,190 @@
+"""
+Memory per million vectors and recall@k of the collection storage presets:
+full precision, scalar int8 and binary quantization, each in RAM and with the
+original vectors on disk.
+
+Memory is estimated from the collection layout: vectors in RAM, quantized
+vectors (always in RAM) and the HNSW graph links. Vectors on disk are read
+through the page cache and only counted as disk. Recall is measured against
+exact float32 search on synthetic clustered embeddings. Without --url the
+quantized search (oversampling, then rescoring with the original vectors) is
+simulated with numpy, the HNSW graph is not. With --url the collections are
+created on that Qdrant server and searched with VECTOR_SEARCH_HNSW_EF.
+
+Usage: python -m benchmarks.bench_quantization [--vectors 10000] [--dim 3072]
+       [--queries 200] [--k 10] [--oversampling 2.0] [--url http://localhost:6333]
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient, models
+
+from app.core.config import settings
+from app.core.db import create_collection_qdrant, delete_collection_qdrant
+from app.core.search import search_params
+from app.schema.db import VectorQuantization
+
+PRESETS = {
+    "float32": dict(quantization=VectorQuantization.NONE, on_disk_vectors=False),
+    "float32-on-disk": dict(quantization=VectorQuantization.NONE, on_disk_vectors=True),
+    "scalar": dict(quantization=VectorQuantization.SCALAR, on_disk_vectors=False),
+    "scalar-on-disk": dict(quantization=VectorQuantization.SCALAR, on_disk_vectors=True),
+    "binary": dict(quantization=VectorQuantization.BINARY, on_disk_vectors=False),
+    "binary-on-disk": dict(quantization=VectorQuantization.BINARY, on_disk_vectors=True),
+}
+
+
+class ZeroEmbeddings(Embeddings):
+    """Only tells create_collection_qdrant the vector size, vectors are upserted directly."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [[0.0] * self.size for _ in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [0.0] * self.size
+
+
+def generate_vectors(n: int, dim: int, rng: np.random.Generator, centers: np.ndarray) -> np.ndarray:
+    # Points around topic centers, like embeddings of documents on a few subjects
+    labels = rng.integers(len(centers), size=n)
+    noise = rng.normal(scale=0.6 / np.sqrt(dim), size=(n, dim)).astype(np.float32)
+    vectors = centers[labels] + noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def memory_per_million(dim: int, quantization: VectorQuantization, on_disk_vectors: bool, m: int):
+    """(RAM, disk) bytes for a million vectors."""
+    original = dim * 4
+    quantized = {
+        VectorQuantization.NONE: 0,
+        VectorQuantization.SCALAR: dim,
+        VectorQuantization.BINARY: (dim + 7) // 8,
+    }[quantization]
+    # Level 0 of the graph holds 2 * m links of 4 bytes per point
+    graph = 2 * m * 4
+    ram = quantized + graph + (0 if on_disk_vectors else original)
+    disk = original + quantized + graph
+    return ram * 1_000_000, disk * 1_000_000
+
+
+def simulated_search(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    quantization: VectorQuantization,
+    k: int,
+    oversampling: float,
+) -> np.ndarray:
+    """Top-k ids per query as Qdrant finds them with exact (non-HNSW) search."""
+    if quantization == VectorQuantization.NONE:
+        return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+    if quantization == VectorQuantization.SCALAR:
+        # int8 over the 0.99 quantile range, like ScalarQuantizationConfig(quantile=0.99)
+        low, high = np.quantile(vectors, [0.005, 0.995])
+        scale = (high - low) / 255
+        quantized = np.round((np.clip(vectors, low, high) - low) / scale) * scale + low
+        query_quantized = np.round((np.clip(queries, low, high) - low) / scale) * scale + low
+        approximate = query_quantized @ quantized.T
+    else:
+        # Hamming similarity of the sign bits
+        approximate = np.sign(queries) @ np.sign(vectors).T
+
+    top = np.argsort(-approximate, axis=1)[:, : int(k * oversampling)]
+    exact = np.einsum("qd,qcd->qc", queries, vectors[top])
+    order = np.argsort(-exact, axis=1)[:, :k]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def server_search(
+    client: QdrantClient,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    oversampling: float,
+    preset: dict,
+) -> tuple[np.ndarray, float]:
+    collection_name = f"bench-quantization-{uuid.uuid4().hex[:8]}"
+    create_collection_qdrant(
+        collection_name,
+        client=client,
+        embedding_function=ZeroEmbeddings(vectors.shape[1]),
+        hybrid=False,
+        **preset,
+    )
+    try:
+        for start in range(0, len(vectors), 256):
+            batch = vectors[start : start + 256]
+            client.upsert(
+                collection_name,
+                points=models.Batch(
+                    ids=list(range(start, start + len(batch))), vectors=batch.tolist()
+                ),
+            )
+        while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+            time.sleep(0.5)
+
+        results, latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            response = client.query_points(
+                collection_name, query=query.tolist(), limit=k,
+                search_params=search_params(rescore=True, oversampling=oversampling),
+            )
+            latencies.append(time.perf_counter() - started)
+            results.append([point.id for point in response.points])
+        return np.array(results), float(np.mean(latencies) * 1000)
+    finally:
+        delete_collection_qdrant(collection_name, client)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--oversampling", type=float, default=settings.VECTOR_SEARCH_QUANTIZATION_OVERSAMPLING
+    )
+    parser.add_argument("--url", help="Qdrant URL, simulated search when omitted")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(50, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+    vectors = generate_vectors(args.vectors, args.dim, rng, centers)
+    queries = generate_vectors(args.queries, args.dim, rng, centers)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+    client = QdrantClient(url=args.url) if args.url else None
+
+    print(
+        f"{args.vectors} vectors of {args.dim} dimensions, {args.queries} queries, "
+        f"recall@{args.k}, oversampling {args.oversampling}, {'Qdrant at ' + args.url if client else 'simulated search'}"
+    )
+    print(f"{'preset':<16} {'RAM/1M':>10} {'disk/1M':>10} {'recall':>8}")
+    for name, preset in PRESETS.items():
+        ram, disk = memory_per_million(args.dim, m=settings.COLLECTION_HNSW_M, **preset)
+        line = f"{name:<16} {ram / 2**30:7.2f} GiB {disk / 2**30:6.2f} GiB"
+        if client is None:
+            found = simulated_search(
+                vectors, queries, preset["quantization"], args.k, args.oversampling
+            )
+            print(f"{line} {recall(found, truth):7.1%}")
+        else:
+            found, latency = server_search(
+                client, vectors, queries, args.k, args.oversampling, preset
+            )
+            print(f"{line} {recall(found, truth):7.1%} {latency:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
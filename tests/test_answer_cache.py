@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+from app.core.answer_cache import AnswerCache
+from app.exception import IngestionError
+from app.schema.query import QueryResponse
+from app.service import ingestion_service
+from app.service.ingestion_pipeline import IngestionSource
+from app.service.ingestion_service import IngestionService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+VECTOR = [1.0, 0.0, 0.0]
+ANSWER = QueryResponse(answer="cached", sources=[])
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AnswerCache(similarity_threshold=0.9, max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(ingestion_service.settings, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(ingestion_service, "get_answer_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def vectorstore():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "docs", vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+    )
+    return QdrantVectorStore(client, "docs", DeterministicFakeEmbedding(size=8))
+
+
+def ingest_with_cached_answers(cache, vectorstore, load) -> tuple[int, int]:
+    """Generations of the ingested and of another collection after ingesting."""
+    redis_client = fakeredis.FakeAsyncRedis()
+
+    async def main():
+        for collection in ("docs", "other"):
+            generation = await cache.ageneration(redis_client, collection)
+            cache.put(collection, generation, None, VECTOR, ANSWER)
+        try:
+            await IngestionService(redis_client).ingest_sources(
+                [IngestionSource("a.pdf", load)], vectorstore
+            )
+        except IngestionError:
+            pass
+        return (
+            await cache.ageneration(redis_client, "docs"),
+            await cache.ageneration(redis_client, "other"),
+        )
+
+    return asyncio.run(main())
+
+
+def test_ingestion_outdates_the_cached_answers_of_its_collection(cache, vectorstore):
+    generations = ingest_with_cached_answers(cache, vectorstore, lambda: [(1, "pump gasket")])
+
+    assert generations == (1, 0)
+    assert cache.get("docs", 1, None, VECTOR) is None
+    assert cache.get("other", 0, None, VECTOR) == ANSWER
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_a_failed_ingestion_outdates_the_cached_answers_too(cache, vectorstore):
+    def load():
+        raise IngestionError("Unsupported file type: .txt")
+
+    assert ingest_with_cached_answers(cache, vectorstore, load) == (1, 0)
+    assert cache.get("docs", 1, None, VECTOR) is None
+
+
+def test_answers_are_matched_within_a_generation():
+    cache = AnswerCache(similarity_threshold=0.9, max_entries=10, ttl_seconds=60)
+    cache.put("docs", 0, None, VECTOR, ANSWER)
+
+    assert cache.get("docs", 0, None, [0.99, 0.1, 0.0]) == ANSWER
+    assert cache.get("docs", 0, None, [0.0, 1.0, 0.0]) is None
+    assert cache.get("docs", 0, '{"source": "a.pdf"}', VECTOR) is None
+    assert cache.get("docs", 1, None, VECTOR) is None
+    # Outdated by the newer generation
+    assert cache.get("docs", 0, None, VECTOR) is None
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from app.service.chunker import PageAwareChunker
+from benchmarks.bench_chunker import WORDS, generate_pages, legacy_chunk
+
+
+def random_pages(seed: int) -> list[tuple[int, str]]:
+    """Pages with every separator, runs of them and pieces longer than a chunk."""
+    rng = random.Random(seed)
+    separators = ["\n\n\n", "\n\n", ".", " ", "\n", "  "]
+    pages = []
+    for page_number in range(1, rng.randint(2, 12)):
+        words = []
+        for _ in range(rng.randint(0, 200)):
+            words.append(rng.choice(WORDS) if rng.random() < 0.8 else rng.choice(separators))
+            if rng.random() < 0.01:
+                words.append("x" * rng.randint(100, 1500))
+        pages.append((page_number, "".join(rng.choice(["", " "]) + word for word in words)))
+    # The splitter picks its separator from the whole document, the chunker
+    # from its first window
+    pages[0] = (1, "\n\n\n" + pages[0][1])
+    return pages
+
+
+def assert_same_chunks(pages: list[tuple[int, str]], **kwargs):
+    expected = legacy_chunk(pages, "doc")
+    chunks = list(PageAwareChunker(**kwargs).split(iter(pages), "doc"))
+
+    assert [(c.page_content, c.metadata) for c in chunks] == [
+        (c.page_content, c.metadata) for c in expected
+    ]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_benchmark_corpus_matches_the_whole_document_splitter(seed):
+    assert_same_chunks(list(generate_pages(200, 3000, seed=seed)))
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("window_size", [50, 5000])
+def test_random_corpus_matches_the_whole_document_splitter(seed, window_size):
+    assert_same_chunks(random_pages(seed), window_size=window_size)
+
+
+def test_chunks_do_not_depend_on_page_breaks():
+    text = "".join(page for _, page in generate_pages(20, 3000))
+    one_page = [(1, text)]
+    many_pages = [(1, text[i : i + 700]) for i in range(0, len(text), 700)]
+
+    contents = [
+        [c.page_content for c in PageAwareChunker().split(pages, "doc")]
+        for pages in (one_page, many_pages)
+    ]
+    assert contents[0] == contents[1]
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.core import collection_lock
+from app.core.collection_lock import collection_reindex, collection_writer
+from app.exception import CollectionBusyError
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(collection_lock, "POLL_SECONDS", 0.01)
+
+
+def test_writer_without_waiting_fails_during_a_reindex():
+    async def main():
+        client = fakeredis.FakeAsyncRedis()
+        async with collection_reindex(client, "docs"):
+            with pytest.raises(CollectionBusyError):
+                async with collection_writer(client, "docs", wait=False):
+                    pass
+        # Other collections are not affected
+        async with collection_writer(client, "other", wait=False):
+            pass
+
+    asyncio.run(main())
+
+
+def test_writer_waits_for_the_reindex():
+    async def main():
+        client = fakeredis.FakeAsyncRedis()
+        events = []
+
+        async def write():
+            async with collection_writer(client, "docs"):
+                events.append("write")
+
+        async with collection_reindex(client, "docs"):
+            writer = asyncio.create_task(write())
+            await asyncio.sleep(0.05)
+            events.append("reindexed")
+        await writer
+        return events
+
+    assert asyncio.run(main()) == ["reindexed", "write"]
+
+
+def test_reindex_waits_for_running_writers_and_excludes_a_second_reindex():
+    async def main():
+        client = fakeredis.FakeAsyncRedis()
+        events = []
+
+        async def reindex():
+            async with collection_reindex(client, "docs"):
+                events.append("reindex")
+
+        async with collection_writer(client, "docs"):
+            task = asyncio.create_task(reindex())
+            await asyncio.sleep(0.05)
+            events.append("written")
+            with pytest.raises(CollectionBusyError):
+                async with collection_reindex(client, "docs"):
+                    pass
+        await task
+        return events
+
+    assert asyncio.run(main()) == ["written", "reindex"]
@@ -0,0 +1,72 @@
+from langchain_core.documents import Document
+
+from app.core.context_packer import ContextPacker
+
+
+def doc(text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata=metadata)
+
+
+def texts(documents: list[Document]) -> list[str]:
+    return [document.page_content for document in documents]
+
+
+def test_touching_chunks_of_a_source_merge_without_the_overlap():
+    documents = [
+        doc("pump gasket", source="a.pdf", start_index=10),
+        doc("the pump", source="a.pdf", start_index=6),
+        doc("the pump", source="b.pdf", start_index=6),
+    ]
+
+    packed = ContextPacker(max_tokens=1000).pack(documents, [0.9, 0.5, 0.4])
+
+    assert texts(packed) == ["the pump gasket", "the pump"]
+    # The merged passage keeps the metadata of its best chunk and its own start
+    assert packed[0].metadata == {"source": "a.pdf", "start_index": 6, "page": None}
+
+
+def test_duplicates_are_dropped():
+    documents = [doc("pump  gasket"), doc("pump gasket"), doc("valve seal")]
+
+    assert texts(ContextPacker(max_tokens=1000).pack(documents)) == ["pump  gasket", "valve seal"]
+
+
+def test_mmr_prefers_a_different_passage_over_a_near_duplicate():
+    documents = [
+        doc("alpha beta gamma delta"),
+        doc("alpha beta gamma delta epsilon"),
+        doc("zeta theta iota kappa"),
+    ]
+    scores = [1.0, 0.95, 0.7]
+
+    relevance_only = ContextPacker(max_tokens=1000, mmr_lambda=1.0).pack(documents, scores)
+    diverse = ContextPacker(max_tokens=1000, mmr_lambda=0.5).pack(documents, scores)
+
+    assert texts(relevance_only) == texts(documents)
+    assert texts(diverse) == [
+        "alpha beta gamma delta", "zeta theta iota kappa", "alpha beta gamma delta epsilon"
+    ]
+
+
+def test_passages_over_the_budget_are_skipped_for_smaller_ones():
+    documents = [doc("a" * 40), doc("b" * 60), doc("c" * 20)]
+
+    # 10 + 15 + 5 tokens against a budget of 16
+    packed = ContextPacker(max_tokens=16, mmr_lambda=1.0).pack(documents)
+
+    assert texts(packed) == ["a" * 40, "c" * 20]
+
+
+def test_the_best_passage_is_cut_to_the_budget_when_nothing_fits():
+    packed = ContextPacker(max_tokens=5).pack([doc("a" * 100), doc("b" * 100)])
+
+    assert texts(packed) == ["a" * 20]
+
+
+def test_stats_count_the_tokens_saved():
+    packer = ContextPacker(max_tokens=1000)
+    packer.pack([doc("a" * 40), doc("a" * 40)])
+
+    assert packer.stats() == {
+        "requests": 1, "tokens_in": 20, "tokens_out": 10, "tokens_saved": 10
+    }
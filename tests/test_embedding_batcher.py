@@ -0,0 +1,47 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.embedding_batcher import CoalescedQueryEmbeddings
+
+
+class SlowEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+    async def aembed_query(self, text):
+        self.queries.append(text)
+        await asyncio.sleep(0.05)
+        return [float(len(text))]
+
+
+def test_concurrent_identical_queries_share_one_call():
+    underlying = SlowEmbeddings()
+    embeddings = CoalescedQueryEmbeddings(underlying, "test")
+
+    async def main():
+        return await asyncio.gather(
+            *(embeddings.aembed_query(text) for text in ["pump", "pump", "gasket", "pump"])
+        )
+
+    assert asyncio.run(main()) == [[4.0], [4.0], [6.0], [4.0]]
+    assert sorted(underlying.queries) == ["gasket", "pump"]
+
+
+def test_queries_after_a_call_lands_run_again():
+    underlying = SlowEmbeddings()
+    embeddings = CoalescedQueryEmbeddings(underlying, "test")
+
+    async def main():
+        await embeddings.aembed_query("pump")
+        await embeddings.aembed_query("pump")
+
+    asyncio.run(main())
+
+    assert underlying.queries == ["pump", "pump"]
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.history import AsyncRedisChatMessageHistory
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_async_history_round_trip():
+    history = AsyncRedisChatMessageHistory("session", fakeredis.FakeAsyncRedis())
+    messages = [HumanMessage(content="question"), AIMessage(content="answer")]
+
+    async def main():
+        await history.aadd_messages(messages)
+        stored = await history.aget_messages()
+        await history.aclear()
+        return stored, await history.aget_messages()
+
+    stored, cleared = asyncio.run(main())
+
+    assert [(type(m), m.content) for m in stored] == [(type(m), m.content) for m in messages]
+    assert cleared == []
@@ -0,0 +1,126 @@
+import asyncio
+import pickle
+import zipfile
+
+import pytest
+import redis.asyncio as aioredis
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+from app.schema.ingest import IngestJobStatus
+from app.service.ingestion_jobs import IngestionJob, IngestionJobManager
+from app.service.ingestion_service import IngestionService
+
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>"
+)
+
+
+def write_docx(path, text: str):
+    with zipfile.ZipFile(path, "w") as docx:
+        docx.writestr("word/document.xml", DOCUMENT_XML.format(text=text))
+
+
+def in_memory_vectorstore() -> QdrantVectorStore:
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "docs",
+        vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE),
+    )
+    return QdrantVectorStore(
+        client=client, collection_name="docs", embedding=DeterministicFakeEmbedding(size=8)
+    )
+
+
+def run_job(manager: IngestionJobManager, service: IngestionService, sources) -> IngestionJob:
+    vectorstore = in_memory_vectorstore()
+
+    async def run(job: IngestionJob):
+        await service.ingest_sources(
+            sources,
+            vectorstore,
+            parse_executor=manager.parse_executor,
+            stats=job.stats,
+            skip_failed_sources=True,
+        )
+
+    async def main() -> IngestionJob:
+        job = manager.submit("docs", run)
+        await job.task
+        return job
+
+    return asyncio.run(main())
+
+
+def unreachable_redis() -> aioredis.Redis:
+    # Unpicklable like any client, never connected to here
+    return aioredis.Redis.from_url("redis://localhost:1")
+
+
+def test_file_source_load_pickles_without_the_service(tmp_path):
+    path = tmp_path / "notes.docx"
+    write_docx(path, "hello")
+    service = IngestionService(redis_client=unreachable_redis())
+
+    load = pickle.loads(pickle.dumps(service.file_source(str(path)).load))
+
+    assert load() == [(1, "hello")]
+
+
+def test_job_parses_files_in_the_process_pool(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    path = tmp_path / "notes.docx"
+    write_docx(path, "Ingestion jobs parse documents in a process pool.")
+    manager = IngestionJobManager(parse_processes=1)
+    # Holds locks, like a real client
+    service = IngestionService(redis_client=fakeredis.FakeAsyncRedis())
+    try:
+        job = run_job(manager, service, [service.file_source(str(path))])
+    finally:
+        manager.parse_executor.shutdown()
+
+    assert job.stats.failures == []
+    assert job.stats.files_parsed == 1
+    assert job.stats.chunks_embedded > 0
+    assert job.status == IngestJobStatus.COMPLETED
+
+
+def test_job_with_every_file_failing_is_failed(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("unsupported")
+    manager = IngestionJobManager(parse_processes=1)
+    service = IngestionService()
+    try:
+        job = run_job(manager, service, [service.file_source(str(path))])
+    finally:
+        manager.parse_executor.shutdown()
+
+    assert len(job.stats.failures) == 1
+    assert job.status == IngestJobStatus.FAILED
+    assert job.error is not None
+
+
+def test_a_job_waiting_for_its_lock_does_not_take_a_slot():
+    async def main():
+        manager = IngestionJobManager(max_concurrent_jobs=1, parse_processes=1)
+        collection_lock = asyncio.Lock()
+        ran = []
+
+        async def run(job: IngestionJob):
+            ran.append(job.collection_name)
+
+        try:
+            async with collection_lock:
+                blocked = manager.submit("reindexed", run, lock=lambda: collection_lock)
+                other = manager.submit("other", run)
+                await asyncio.wait_for(other.task, timeout=1)
+                assert blocked.status == IngestJobStatus.PENDING
+            await blocked.task
+        finally:
+            manager.parse_executor.shutdown()
+        return ran
+
+    assert asyncio.run(main()) == ["other", "reindexed"]
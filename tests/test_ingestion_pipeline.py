@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+from app.service.ingestion_pipeline import IngestionPipeline, IngestionSource, chunk_point_id
+
+
+def page_chunks(pages: list[tuple[int, str]], source: str) -> list[Document]:
+    """One chunk per page."""
+    return [
+        Document(page_content=text, metadata={"source": source, "page": page})
+        for page, text in pages
+    ]
+
+
+@pytest.fixture
+def vectorstore():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "docs", vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+    )
+    return QdrantVectorStore(client, "docs", DeterministicFakeEmbedding(size=8))
+
+
+def ingest(vectorstore, source: str, texts: list[str]):
+    # One source per run, the in-memory Qdrant client is not thread safe and
+    # the pipeline reads the points of a source while it stores another's
+    pipeline = IngestionPipeline(vectorstore, page_chunks, batch_size=2)
+    return asyncio.run(pipeline.run([
+        IngestionSource(source, lambda: list(enumerate(texts, start=1)))
+    ]))
+
+
+def stored(vectorstore) -> dict[str, str]:
+    points, _ = vectorstore.client.scroll("docs", limit=100)
+    return {str(point.id): point.payload["page_content"] for point in points}
+
+
+def test_first_ingestion_embeds_every_chunk(vectorstore):
+    stats = ingest(vectorstore, "a.pdf", ["one", "two", "three"])
+    ingest(vectorstore, "b.pdf", ["four"])
+
+    assert (stats.chunks_embedded, stats.chunks_skipped, stats.chunks_deleted) == (3, 0, 0)
+    assert stored(vectorstore) == {
+        chunk_point_id("docs", "a.pdf", "one"): "one",
+        chunk_point_id("docs", "a.pdf", "two"): "two",
+        chunk_point_id("docs", "a.pdf", "three"): "three",
+        chunk_point_id("docs", "b.pdf", "four"): "four",
+    }
+
+
+def test_reingesting_an_unchanged_source_skips_every_chunk(vectorstore):
+    ingest(vectorstore, "a.pdf", ["one", "two", "three"])
+    before = stored(vectorstore)
+
+    stats = ingest(vectorstore, "a.pdf", ["one", "two", "three"])
+
+    assert (stats.chunks_embedded, stats.chunks_skipped, stats.chunks_deleted) == (0, 3, 0)
+    assert stored(vectorstore) == before
+
+
+def test_an_edited_source_replaces_only_the_changed_chunks(vectorstore):
+    ingest(vectorstore, "a.pdf", ["one", "two", "three"])
+    ingest(vectorstore, "b.pdf", ["four"])
+
+    stats = ingest(vectorstore, "a.pdf", ["one", "TWO", "three"])
+
+    assert (stats.chunks_embedded, stats.chunks_skipped, stats.chunks_deleted) == (1, 2, 1)
+    assert sorted(stored(vectorstore).values()) == ["TWO", "four", "one", "three"]
+
+
+def test_removed_chunks_are_deleted(vectorstore):
+    ingest(vectorstore, "a.pdf", ["one", "two", "three"])
+
+    stats = ingest(vectorstore, "a.pdf", ["one"])
+
+    assert (stats.chunks_embedded, stats.chunks_skipped, stats.chunks_deleted) == (0, 1, 2)
+    assert stored(vectorstore) == {chunk_point_id("docs", "a.pdf", "one"): "one"}
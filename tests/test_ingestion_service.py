@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.web_cache import WebCache
+from app.service import ingestion_service
+from app.service.ingestion_service import IngestionService, _by_requested_url
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def result(url: str) -> dict:
+    return {"url": url, "raw_content": f"content of {url}"}
+
+
+def test_results_are_keyed_by_the_requested_url():
+    urls = ["https://example.com/a", "https://Example.com/b/", "https://example.com/c"]
+    response = {
+        "results": [
+            result("https://example.com/a"),
+            result("https://example.com/b"),
+            result("https://example.com/moved"),
+        ]
+    }
+
+    assert _by_requested_url(urls, response) == {
+        "https://example.com/a": result("https://example.com/a"),
+        "https://Example.com/b/": result("https://example.com/b"),
+        "https://example.com/c": result("https://example.com/moved"),
+    }
+
+
+def test_failed_urls_are_left_out_of_the_order_matching():
+    urls = ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+    response = {
+        "results": [result("https://example.com/a"), result("https://example.com/c2")],
+        "failed_results": [{"url": "https://example.com/b", "error": "timeout"}],
+    }
+
+    assert _by_requested_url(urls, response) == {
+        "https://example.com/a": result("https://example.com/a"),
+        "https://example.com/c": result("https://example.com/c2"),
+    }
+
+
+def test_unmatched_results_are_left_out_when_the_order_is_ambiguous():
+    urls = ["https://example.com/a", "https://example.com/b"]
+    response = {"results": [result("https://example.com/moved")]}
+
+    assert _by_requested_url(urls, response) == {}
+
+
+def test_extractions_are_cached_under_the_requested_url(monkeypatch):
+    extracted = []
+
+    class FakeTavilyExtract:
+        def __init__(self, **kwargs):
+            pass
+
+        async def ainvoke(self, request, config):
+            extracted.extend(request["urls"])
+            # Reported with a trailing slash
+            return {"results": [result(url + "/") for url in request["urls"]]}
+
+    monkeypatch.setattr(ingestion_service.settings, "WEB_CACHE_ENABLED", True)
+    monkeypatch.setattr(ingestion_service, "TavilyExtract", FakeTavilyExtract)
+    cache = WebCache("test", ttl_seconds=60, stale_seconds=60, max_entries=10)
+    monkeypatch.setattr(ingestion_service, "get_web_extract_cache", lambda: cache)
+    service = IngestionService(fakeredis.FakeAsyncRedis())
+
+    async def main():
+        first = await service._aextract(["https://example.com/a"], None)
+        second = await service._aextract(["https://example.com/a"], None)
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert first == second == {"https://example.com/a": result("https://example.com/a/")}
+    assert extracted == ["https://example.com/a"]
@@ -0,0 +1,62 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.schema.query import RouteDecision
+from app.service.query_router import QueryRouter, lexical_overlap
+
+MATCHING = Document(page_content="The X-1234 pump needs a new gasket every year.")
+UNRELATED = Document(page_content="Quarterly revenue grew in every region.")
+
+
+@pytest.fixture
+def router():
+    return QueryRouter(vector_score_threshold=0.8, web_score_threshold=0.5, min_lexical_overlap=0.5)
+
+
+def test_lexical_overlap_counts_the_query_words_found():
+    assert lexical_overlap("Does the X-1234 pump have a gasket?", [MATCHING]) == 1.0
+    assert lexical_overlap("X-1234 pump warranty", [MATCHING]) == 0.75
+    assert lexical_overlap("pump warranty", [UNRELATED]) == 0.0
+    # Only stopwords, nothing to compare
+    assert lexical_overlap("what is it?", [UNRELATED]) == 1.0
+
+
+@pytest.mark.parametrize(
+    "score, document, decision",
+    [
+        # A strong score with enough overlap, at and above the vector threshold
+        (0.8, MATCHING, RouteDecision.VECTOR),
+        (0.95, MATCHING, RouteDecision.VECTOR),
+        # A strong score alone is not enough
+        (0.95, UNRELATED, RouteDecision.BOTH),
+        # Enough overlap below the vector threshold
+        (0.79, MATCHING, RouteDecision.BOTH),
+        (0.3, MATCHING, RouteDecision.BOTH),
+        # Little overlap at and below the web threshold
+        (0.5, UNRELATED, RouteDecision.BOTH),
+        (0.49, UNRELATED, RouteDecision.WEB),
+    ],
+)
+def test_route_thresholds(router, score, document, decision):
+    assert router.route("X-1234 pump gasket", [(document, score)]) == decision
+
+
+def test_the_top_score_decides(router):
+    results = [(MATCHING, 0.2), (MATCHING, 0.9)]
+
+    assert router.route("X-1234 pump gasket", results) == RouteDecision.VECTOR
+
+
+def test_no_results_go_to_the_web(router):
+    assert router.route("X-1234 pump gasket", []) == RouteDecision.WEB
+
+
+def test_stats_count_decisions_and_fallbacks(router):
+    router.route("X-1234 pump gasket", [])
+    router.route("X-1234 pump gasket", [(MATCHING, 0.9)])
+    router.record_fallback()
+
+    assert router.stats() == {
+        "decisions": {"vector": 1, "web": 1, "both": 0},
+        "vector_fallbacks": 1,
+    }
@@ -0,0 +1,201 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from app.schema.query import RAGResponse, RouteDecision, SpeculativeMode
+from app.service import query_service
+from app.service.query_service import QueryService
+
+
+VECTORSTORE = SimpleNamespace(metadata_payload_key="metadata")
+RETRIEVED = ("context", [{"source_id": 1, "type": "vectorstore"}])
+
+
+class FakeMemory:
+    def __init__(self):
+        self.appended = []
+
+    async def aload(self):
+        return []
+
+    async def aappend(self, messages):
+        self.appended.extend(messages)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    async def asimilarity_search(*args, **kwargs):
+        return []
+
+    async def arerank(query, results):
+        return results
+
+    async def aweb_search_tool(**kwargs):
+        return "web context", [{"source_id": 1, "type": "websearch"}]
+
+    async def avector_search_tool(**kwargs):
+        return RETRIEVED
+
+    monkeypatch.setattr(query_service.settings, "QUERY_ROUTER_ENABLED", False)
+    monkeypatch.setattr(query_service, "CallbackHandler", lambda: None)
+    monkeypatch.setattr(query_service, "asimilarity_search", asimilarity_search)
+    monkeypatch.setattr(query_service, "arerank", arerank)
+    monkeypatch.setattr(query_service, "aweb_search_tool", aweb_search_tool)
+    monkeypatch.setattr(query_service, "avector_search_tool", avector_search_tool)
+
+    service = QueryService()
+    memory = FakeMemory()
+    monkeypatch.setattr(service, "_chat_memory", lambda *args: memory)
+    monkeypatch.setattr(service, "_build_prompt_template", lambda prompt_manager: None)
+    return service
+
+
+def test_off_mode_falls_back_to_the_web_after_a_slow_vector_answer(service, monkeypatch):
+    async def aanswer(query, context, *args):
+        if context == "web context":
+            return RAGResponse(answer="from the web", found_answer=True)
+        # Slower than the whole speculation budget
+        await asyncio.sleep(0.2)
+        return RAGResponse(answer="not found", found_answer=False)
+
+    monkeypatch.setattr(service, "_aanswer", aanswer)
+
+    response = asyncio.run(
+        service.aquery(
+            "question",
+            "session",
+            llm=None,
+            vectorstore=VECTORSTORE,
+            prompt_manager=None,
+            async_client=None,
+            redis_client=None,
+            speculative_mode=SpeculativeMode.OFF,
+            speculation_budget=0.05,
+            router=None,
+        )
+    )
+
+    assert response.answer == "from the web"
+
+
+def test_a_fallback_after_a_vector_route_is_not_bound_by_the_budget(service, monkeypatch):
+    async def aanswer(query, context, *args):
+        # Slower than the whole speculation budget
+        await asyncio.sleep(0.1)
+        if context == "web context":
+            return RAGResponse(answer="from the web", found_answer=True)
+        return RAGResponse(answer="not found", found_answer=False)
+
+    monkeypatch.setattr(service, "_aanswer", aanswer)
+    fallbacks = []
+    router = SimpleNamespace(
+        route=lambda query, results: RouteDecision.VECTOR,
+        record_fallback=lambda: fallbacks.append(True),
+    )
+
+    response = asyncio.run(
+        service.aquery(
+            "question",
+            "session",
+            llm=None,
+            vectorstore=VECTORSTORE,
+            prompt_manager=None,
+            async_client=None,
+            redis_client=None,
+            speculative_mode=SpeculativeMode.SEARCH,
+            speculation_budget=0.05,
+            router=router,
+        )
+    )
+
+    assert response.answer == "from the web"
+    assert fallbacks == [True]
+
+
+class ScriptedAgent:
+    """Replays `astream` output of an agent."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def astream(self, *args, **kwargs):
+        for item in self.stream:
+            yield item
+
+
+def model_token(text: str):
+    return "messages", (AIMessageChunk(content=text), {"langgraph_node": "model"})
+
+
+def model_update(message: AIMessage):
+    return "updates", {"model": {"messages": [message]}}
+
+
+def stream_events(service, monkeypatch, stream) -> list[tuple[str, dict]]:
+    monkeypatch.setattr(service, "_build_async_agent", lambda *args: ScriptedAgent(stream))
+
+    async def main():
+        events = service.astream_agentic(
+            "question", "session", None, VECTORSTORE, None, None, None
+        )
+        return [item async for item in events]
+
+    return asyncio.run(main())
+
+
+def test_stream_sends_the_retrieved_sources_first(service, monkeypatch):
+    stream = [model_token("Answer"), model_update(AIMessage(content="Answer"))]
+
+    events = stream_events(service, monkeypatch, stream)
+
+    assert events[0] == ("sources", {"sources": RETRIEVED[1]})
+    assert [event for event, _ in events] == ["sources", "token", "done"]
+    assert events[-1][1]["sources"] == RETRIEVED[1]
+
+
+def test_stream_reports_tool_results_as_tool_progress(service, monkeypatch):
+    tool_call = {"name": "WebSearch", "args": {"__arg1": "question"}, "id": "1"}
+    web_sources = [{"source_id": 1, "type": "websearch"}]
+    stream = [
+        model_update(AIMessage(content="", tool_calls=[tool_call])),
+        (
+            "updates",
+            {"tools": {"messages": [ToolMessage(
+                content=json.dumps(["web context", web_sources]),
+                name="WebSearch",
+                tool_call_id="1",
+            )]}},
+        ),
+        model_token("Answer"),
+        model_update(AIMessage(content="Answer")),
+    ]
+
+    events = stream_events(service, monkeypatch, stream)
+
+    assert [event for event, _ in events] == ["sources", "tool", "tool", "token", "done"]
+    assert events[2][1] == {"name": "WebSearch", "status": "completed", "sources": web_sources}
+    assert events[-1][1]["sources"] == web_sources
+
+
+def test_agent_vector_search_reuses_the_retrieved_results(service, monkeypatch):
+    searches = []
+
+    async def avector_search_tool(query, **kwargs):
+        searches.append(query)
+        return "other context", []
+
+    monkeypatch.setattr(query_service, "avector_search_tool", avector_search_tool)
+    monkeypatch.setattr(query_service, "create_agent", lambda model, tools, system_prompt: tools)
+    vector_tool, _ = service._build_async_agent(
+        None, VECTORSTORE, SimpleNamespace(get_prompt=lambda name: ""), None, None,
+        retrieved={"question": RETRIEVED},
+    )
+
+    async def main():
+        return [await vector_tool.coroutine(q) for q in (" Question ", "another question")]
+
+    assert asyncio.run(main()) == [RETRIEVED, ("other context", [])]
+    assert searches == ["another question"]
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient, models
+
+from app.core.db import swap_alias
+from app.core.registry import ClientRegistry
+from app.exception import VectorDBError
+from app.schema.db import VectorDB
+from app.schema.llm import EmbeddingProvider
+
+
+def test_a_slow_client_does_not_hold_back_other_keys():
+    registry = ClientRegistry()
+    started = threading.Event()
+
+    def slow_factory():
+        started.set()
+        time.sleep(0.5)
+        return "slow"
+
+    with ThreadPoolExecutor(1) as pool:
+        pool.submit(registry._get_or_create, ("test", "slow"), slow_factory)
+        started.wait()
+        begin = time.monotonic()
+        assert registry._get_or_create(("test", "fast"), lambda: "fast") == "fast"
+        assert time.monotonic() - begin < 0.25
+
+
+def test_concurrent_requests_for_a_key_build_one_client():
+    registry = ClientRegistry()
+    built = []
+
+    def factory():
+        time.sleep(0.1)
+        built.append(object())
+        return built[-1]
+
+    with ThreadPoolExecutor(4) as pool:
+        clients = list(pool.map(lambda _: registry._get_or_create(("test", 1), factory), range(4)))
+
+    assert len(built) == 1
+    assert all(client is built[0] for client in clients)
+    assert registry.stats()["by_kind"]["test"] == {"size": 1, "hits": 3, "misses": 1}
+
+
+def test_missing_collection_raises_vector_db_error():
+    registry = ClientRegistry()
+    registry._clients[("qdrant", "memory")] = QdrantClient(":memory:")
+
+    with pytest.raises(VectorDBError):
+        registry.get_vectorstore(
+            VectorDB.QDRANT, EmbeddingProvider.GOOGLE, "missing", "model", "memory"
+        )
+
+
+def test_refresh_alias_builds_the_store_of_the_collection_now_aliased(monkeypatch):
+    registry = ClientRegistry(alias_cache_seconds=60)
+    client = QdrantClient(":memory:")
+    registry._clients[("qdrant", "memory")] = client
+    monkeypatch.setattr(
+        registry, "get_embedding_function", lambda **kwargs: DeterministicFakeEmbedding(size=8)
+    )
+    for name in ("docs__1", "docs__2"):
+        client.create_collection(
+            name, vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+        )
+    swap_alias(client, "docs", "docs__1")
+
+    def vectorstore(refresh_alias: bool):
+        return registry.get_vectorstore(
+            VectorDB.QDRANT, EmbeddingProvider.GOOGLE, "docs", "model", "memory",
+            refresh_alias=refresh_alias,
+        )
+
+    before = vectorstore(False)
+    swap_alias(client, "docs", "docs__2")
+
+    assert vectorstore(False) is before
+    assert vectorstore(True) is not before
+    assert registry.resolve_collection("docs", "memory") == "docs__2"
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.api.uploads import UploadReceiver
+from app.exception import UploadTooLargeError
+
+BOUNDARY = "boundary"
+
+
+def multipart_body(files: dict[str, bytes]) -> bytes:
+    body = b""
+    for filename, data in files.items():
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def streamed_request(body: bytes, chunk_size: int = 1024) -> tuple[Request, list[int]]:
+    """A request over `body` sent in chunks, with a list of the bytes sent."""
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    sent = []
+
+    async def receive():
+        chunk = chunks.pop(0)
+        sent.append(len(chunk))
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [
+            (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())
+        ],
+    }
+    return Request(scope, receive), sent
+
+
+def test_files_are_written_or_kept_in_memory(tmp_path):
+    body = multipart_body({"a.pdf": b"pdf bytes", "../b.docx": b"docx bytes"})
+    request, _ = streamed_request(body, chunk_size=7)
+    receiver = UploadReceiver(str(tmp_path), keep_in_memory=lambda name: name.endswith(".pdf"))
+
+    files = asyncio.run(receiver.receive(request))
+
+    assert [(f.filename, f.data) for f in files] == [("a.pdf", b"pdf bytes"), ("b.docx", None)]
+    assert (tmp_path / "b.docx").read_bytes() == b"docx bytes"
+
+
+def test_large_in_memory_files_spill_to_disk(tmp_path):
+    request, _ = streamed_request(multipart_body({"a.pdf": b"x" * 100}), chunk_size=16)
+    receiver = UploadReceiver(str(tmp_path), in_memory_max_bytes=50, keep_in_memory=lambda name: True)
+
+    (file,) = asyncio.run(receiver.receive(request))
+
+    assert file.data is None
+    assert (tmp_path / "a.pdf").read_bytes() == b"x" * 100
+
+
+def test_reading_stops_at_the_file_limit(tmp_path):
+    body = multipart_body({"big.docx": b"x" * 100_000})
+    request, sent = streamed_request(body)
+    receiver = UploadReceiver(str(tmp_path), max_file_bytes=10_000)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(receiver.receive(request))
+
+    assert sum(sent) < 20_000
+
+
+def test_reading_stops_at_the_request_limit(tmp_path):
+    body = multipart_body({f"{i}.docx": b"x" * 5_000 for i in range(20)})
+    request, sent = streamed_request(body)
+    receiver = UploadReceiver(str(tmp_path), max_request_bytes=10_000)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(receiver.receive(request))
+
+    assert sum(sent) <= 11_000
+
+
+def test_files_with_the_same_name_are_rejected(tmp_path):
+    body = multipart_body({"a.docx": b"first", "dir/a.docx": b"second"})
+    request, _ = streamed_request(body)
+    receiver = UploadReceiver(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        asyncio.run(receiver.receive(request))
+
+    assert (tmp_path / "a.docx").read_bytes() == b"first"
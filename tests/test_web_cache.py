@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.web_cache import WebCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_cache() -> WebCache:
+    return WebCache("test", ttl_seconds=60, stale_seconds=60, max_entries=10)
+
+
+def test_error_responses_are_returned_and_not_cached():
+    cache, client = make_cache(), fakeredis.FakeRedis()
+    error = {"error": ConnectionError("tavily is down")}
+
+    assert cache.fetch(client, "query", lambda: error) is error
+    assert cache.fetch(client, "query", lambda: {"results": [{"url": "u"}]}) == {
+        "results": [{"url": "u"}]
+    }
+    assert cache.stats()["misses"] == 2
+
+
+def test_empty_results_are_not_cached():
+    cache, client = make_cache(), fakeredis.FakeRedis()
+
+    cache.fetch(client, "query", lambda: {"results": []})
+    cache.fetch(client, "query", lambda: {"results": []})
+
+    assert cache.stats()["hits"] == 0
+
+
+def test_unencodable_values_are_returned_and_counted_as_errors():
+    cache, client = make_cache(), fakeredis.FakeRedis()
+    value = {"results": [object()]}
+
+    assert cache.fetch(client, "query", lambda: value) is value
+    assert cache.stats()["errors"] == 1
+
+
+def test_results_are_served_from_the_cache():
+    cache, client = make_cache(), fakeredis.FakeRedis()
+    cache.fetch(client, "query", lambda: {"results": [1]})
+
+    assert cache.fetch(client, "query", lambda: pytest.fail("loaded again")) == {"results": [1]}
+    assert cache.stats()["hits"] == 1